@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Compare cold-load time and peak RSS of the JSON backends on a large synthetic cache.
+
+Each (backend, mode) combination runs in a fresh interpreter so peak RSS isn't
+polluted by an earlier run.
+
+    python bench_json_backend.py --meetings 20000
+    python bench_json_backend.py --cache "/path/to/cache-v3.json"
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _worker(path, backend, from_slice, repeat):
+    import json_backend
+
+    baseline = _peak_rss_mb()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            raw = f.read()
+        top = json_backend.decode_cache(raw, backend=backend, from_slice=from_slice)
+        timings.append(time.perf_counter() - start)
+        documents = top["cache"]["state"]["documents"]
+        del raw, top
+    print(json.dumps({
+        "best_seconds": min(timings),
+        "peak_rss_mb": _peak_rss_mb(),
+        "baseline_rss_mb": baseline,
+        "documents": len(documents),
+    }))
+
+
+def _run(path, backend, from_slice, repeat):
+    cmd = [sys.executable, __file__, "--worker", path, backend, "slice" if from_slice else "full", str(repeat)]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON backend cold-load benchmark")
+    parser.add_argument("--meetings", type=int, default=20000, help="size of the synthetic cache")
+    parser.add_argument("--cache", help="benchmark an existing cache file instead")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    import json_backend
+
+    tmp = None
+    path = args.cache
+    if not path:
+        from synthetic_cache import write_cache
+
+        tmp = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+        tmp.close()
+        print(f"🛠️ Generating synthetic cache with {args.meetings} meetings...")
+        path = write_cache(tmp.name, args.meetings)
+
+    try:
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"📦 {path} ({size_mb:.1f} MB)")
+        print(f"{'backend':<10} {'mode':<6} {'cold load':>10} {'peak RSS':>10} {'docs':>8}")
+        for backend in json_backend.LOADERS:
+            for from_slice in (False, True):
+                r = _run(path, backend, from_slice, args.repeat)
+                mode = "slice" if from_slice else "full"
+                print(f"{backend:<10} {mode:<6} {r['best_seconds'] * 1000:>8.0f}ms "
+                      f"{r['peak_rss_mb']:>8.0f}MB {r['documents']:>8}")
+    finally:
+        if tmp is not None:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 6 and sys.argv[1] == "--worker":
+        _worker(sys.argv[2], sys.argv[3], sys.argv[4] == "slice", int(sys.argv[5]))
+    else:
+        main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the loader on synthetic caches of standard sizes.
+
+Each size runs in a fresh interpreter. Every stage is timed (best and median
+of --repeat runs) and then run once more under tracemalloc to record its peak
+and retained allocations. Results are appended to bench_history.jsonl with the
+git revision, and each run is compared with the previous one so regressions
+show up between versions.
+
+    python bench_loader.py                     # 100 and 10k meetings
+    python bench_loader.py --sizes 100,10k,100k --repeat 3
+    python bench_loader.py --stages get_last_7_days_content_warm --no-save
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+HISTORY_PATH = HERE / "bench_history.jsonl"
+CACHE_DIR = Path(tempfile.gettempdir()) / "granola-bench"
+DEFAULT_SIZES = "100,10k"
+
+
+def _stages(g):
+    """
+    name -> (setup, run). setup() puts the loader in the state the stage
+    measures (cold or warm) and isn't timed; run() is what gets timed.
+    """
+    def fresh_snapshot():
+        # A new snapshot with nothing derived from it, empty per-document caches and
+        # no ownership verdicts or panel text left over from earlier runs
+        g._ownership.forget(list(g.get_snapshot().documents))
+        g._panel_text_cache.clear()
+        g._snapshots.invalidate()
+        return g.get_snapshot()
+
+    def warm_snapshot():
+        return g.get_snapshot()
+
+    def nothing():
+        return None
+
+    def forget_ownership():
+        snapshot = g.get_snapshot()
+        g._ownership.forget(list(snapshot.documents))
+        return snapshot
+
+    def clear_panels():
+        snapshot = g.get_snapshot()
+        g._panel_text_cache.clear()
+        return snapshot
+
+    def my_documents(snapshot):
+        return [doc_id for doc_id, doc in snapshot.documents.items() if g.is_my_document(doc_id, doc)]
+
+    def all_notes(snapshot):
+        panels = snapshot.document_panels
+        return [g.extract_enhanced_notes(doc_id, doc, panels) for doc_id, doc in snapshot.documents.items()]
+
+    return {
+        "load_cache": (nothing, lambda _: g.load_cache()),
+        "snapshot_build": (lambda: g._snapshots.invalidate(), lambda _: g.get_snapshot()),
+        "is_my_document": (forget_ownership, my_documents),
+        "is_my_document_memo": (warm_snapshot, my_documents),
+        "extract_enhanced_notes": (clear_panels, all_notes),
+        "get_recent_meetings_cold": (fresh_snapshot, lambda s: g.get_recent_meetings(10, snapshot=s)),
+        "get_recent_meetings_warm": (warm_snapshot, lambda s: g.get_recent_meetings(10, snapshot=s)),
+        "get_last_7_days_content_cold": (fresh_snapshot, lambda s: g.get_last_7_days_content(7, snapshot=s)),
+        "get_last_7_days_content_warm": (warm_snapshot, lambda s: g.get_last_7_days_content(7, snapshot=s)),
+    }
+
+
+def _worker(path, repeat, stage_names):
+    # Always benchmark the in-memory path
+    os.environ.pop("GRANOLA_STORE_PATH", None)
+    import granola_loader as g
+    from diagnostics import log
+
+    log.setLevel("WARNING")
+    g.CACHE_PATH = Path(path)
+    g.get_snapshot()
+
+    results = {}
+    for name, (setup, run) in _stages(g).items():
+        if stage_names and name not in stage_names:
+            continue
+        timings = []
+        for _ in range(repeat):
+            state = setup()
+            start = time.perf_counter()
+            run(state)
+            timings.append(time.perf_counter() - start)
+
+        state = setup()
+        tracemalloc.start()
+        try:
+            kept = run(state)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del kept
+        results[name] = {
+            "best_ms": min(timings) * 1000,
+            "median_ms": statistics.median(timings) * 1000,
+            "alloc_peak_mb": peak / (1024 * 1024),
+            "alloc_retained_mb": current / (1024 * 1024),
+        }
+    print(json.dumps(results))
+
+
+def _run(path, repeat, stage_names):
+    cmd = [sys.executable, __file__, "--worker", path, str(repeat), ",".join(stage_names)]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True, cwd=HERE)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _cache_file(label, seed):
+    """Generate the synthetic cache for a size once and reuse it on later runs"""
+    from synthetic_cache import parse_count, write_cache
+
+    count = parse_count(label)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = CACHE_DIR / f"cache-{count}-seed{seed}.json"
+    if not path.exists():
+        print(f"🛠️ Generating synthetic cache with {count} meetings...")
+        tmp = path.with_suffix(".tmp")
+        write_cache(tmp, count, seed=seed)
+        os.replace(tmp, path)
+    return count, path
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=HERE)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _previous_run(history_path):
+    if not history_path.exists():
+        return None
+    last = None
+    with open(history_path) as f:
+        for line in f:
+            if line.strip():
+                last = json.loads(line)
+    return last
+
+
+def _delta(current, previous):
+    if not previous:
+        return ""
+    change = (current - previous) / previous * 100 if previous else 0.0
+    marker = " ⚠️" if change > 10 else ""
+    return f"{change:+6.1f}%{marker}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Loader micro-benchmarks")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated meeting counts, e.g. 100,10k,100k")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stages", default="", help="only run these comma-separated stages")
+    parser.add_argument("--history", default=str(HISTORY_PATH), help="JSONL file results are appended to")
+    parser.add_argument("--no-save", action="store_true", help="don't append this run to the history")
+    args = parser.parse_args()
+
+    import json_backend
+
+    stage_names = [s for s in args.stages.split(",") if s]
+    history_path = Path(args.history)
+    previous = _previous_run(history_path)
+    run = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_rev": _git_revision(),
+        "python": platform.python_version(),
+        "json_backend": json_backend.BACKEND,
+        "repeat": args.repeat,
+        "results": {},
+    }
+    if previous:
+        print(f"📊 Comparing with {previous.get('git_rev')} ({previous.get('timestamp')})")
+
+    for label in args.sizes.split(","):
+        count, path = _cache_file(label.strip(), args.seed)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"\n📦 {count} meetings ({size_mb:.1f} MB)")
+        print(f"{'stage':<30} {'best':>10} {'median':>10} {'alloc peak':>11} {'retained':>9} {'vs last':>9}")
+        results = _run(str(path), args.repeat, stage_names)
+        run["results"][str(count)] = results
+        before = ((previous or {}).get("results") or {}).get(str(count), {})
+        for name, r in results.items():
+            print(f"{name:<30} {r['best_ms']:>8.1f}ms {r['median_ms']:>8.1f}ms {r['alloc_peak_mb']:>9.1f}MB "
+                  f"{r['alloc_retained_mb']:>7.1f}MB {_delta(r['best_ms'], before.get(name, {}).get('best_ms'))}")
+
+    if not args.no_save:
+        with open(history_path, "a") as f:
+            f.write(json.dumps(run) + "\n")
+        print(f"\n💾 Saved to {history_path}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--worker":
+        _worker(sys.argv[2], int(sys.argv[3]), [s for s in sys.argv[4].split(",") if s])
+    else:
+        main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Resident memory of a loaded cache, per 10k meetings.
+
+Each mode runs in a fresh interpreter that imports the loader, notes its RSS,
+loads a synthetic cache and notes the RSS again:
+
+    raw      the decoded cache state plus version tokens - what a snapshot
+             held before documents were projected into Meeting records
+    snapshot get_snapshot(): compact Meetings, summary panels, trimmed state
+    warm     snapshot, after serving a 7-day window with transcripts and the
+             recent meetings list
+    joined   snapshot, after reading every transcript's text - what a snapshot
+             holds once every transcript has been joined
+
+    python bench_memory.py                  # 10k meetings
+    python bench_memory.py --sizes 10k,100k
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from bench_loader import _cache_file
+
+HERE = Path(__file__).resolve().parent
+MODES = ("raw", "snapshot", "warm", "joined")
+DEFAULT_SIZES = "10k"
+
+
+def _rss_bytes():
+    """Current resident set size (peak RSS where /proc isn't available)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _worker(path, mode):
+    os.environ.pop("GRANOLA_STORE_PATH", None)
+    import granola_loader as g
+    from cache_snapshot import compute_tokens, decode_cache_bytes
+    from diagnostics import log
+
+    log.setLevel("WARNING")
+    g.CACHE_PATH = Path(path)
+    gc.collect()
+    before = _rss_bytes()
+
+    if mode == "raw":
+        top = decode_cache_bytes(Path(path).read_bytes())
+        state = top["cache"]["state"]
+        kept = (top, compute_tokens(state["documents"], state["transcripts"], state["documentPanels"]))
+    else:
+        kept = g.get_snapshot()
+        if mode == "warm":
+            g.get_last_7_days_content(7, snapshot=kept)
+            g.get_recent_meetings(10, snapshot=kept)
+        elif mode == "joined":
+            for transcript in kept.transcripts.values():
+                transcript.text()
+    gc.collect()
+    after = _rss_bytes()
+    print(json.dumps({"count": len(g.get_snapshot().documents) if mode != "raw" else len(kept[0]["cache"]["state"]["documents"]),
+                      "rss_mb": (after - before) / (1024 * 1024)}))
+
+
+def _run(path, mode):
+    cmd = [sys.executable, __file__, "--worker", path, mode]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True, cwd=HERE)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident memory per 10k meetings")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated meeting counts, e.g. 10k,100k")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for label in args.sizes.split(","):
+        count, path = _cache_file(label.strip(), args.seed)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"\n📦 {count} meetings ({size_mb:.1f} MB)")
+        print(f"{'mode':<10} {'RSS':>10} {'per 10k':>10} {'vs raw':>8}")
+        raw = None
+        for mode in MODES:
+            r = _run(str(path), mode)
+            per_10k = r["rss_mb"] * 10_000 / max(r["count"], 1)
+            raw = raw if raw is not None else per_10k
+            change = f"{(per_10k - raw) / raw * 100:+.0f}%" if raw else ""
+            print(f"{mode:<10} {r['rss_mb']:>8.1f}MB {per_10k:>8.1f}MB {change:>8}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--worker":
+        _worker(sys.argv[2], sys.argv[3])
+    else:
+        main()
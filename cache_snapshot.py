@@ -0,0 +1,418 @@
+"""
+In-memory snapshot of Granola's cache-v3.json.
+
+Granola keeps everything in one big double-encoded JSON file that it rewrites
+while the app is open. Parsing it is by far the most expensive thing the server
+does, so we keep one decoded copy per process and only re-read the file when its
+(mtime, size, inode) signature changes.
+"""
+import hashlib
+import os
+import threading
+import time
+
+import json_backend
+from diagnostics import get_logger
+from meetings import STATE_KEYS, compact_documents, compact_panels, compact_transcripts, detached, interned_id
+from metrics import Counter, Histogram, stage
+
+log = get_logger("snapshot")
+
+RELOADS = Counter("granola_snapshot_loads_total", "Cache file loads by outcome (ok, retry, failed)", ["outcome"])
+LOAD_SECONDS = Histogram("granola_snapshot_load_duration_seconds",
+                         "Time to read, decode and publish a new snapshot", ["kind"])
+
+# How long to wait before retrying a file that failed to decode (usually because
+# Granola was halfway through writing it)
+RETRY_DELAY_SECONDS = 0.25
+# How many times a cold load retries a half-written file before giving up
+COLD_LOAD_ATTEMPTS = 8
+
+
+def file_signature(path):
+    """Return (mtime_ns, size, inode) for path, or None if it doesn't exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def snapshot_tag(path, signature):
+    """Identifies one version of the file at path across restarts and processes"""
+    return hashlib.blake2b(repr((str(path), signature)).encode(), digest_size=8).hexdigest()
+
+
+def decode_cache_bytes(raw):
+    """Decode the outer cache file and the JSON string embedded in its "cache" key"""
+    return json_backend.decode_cache(raw)
+
+
+def content_hash(value):
+    """Short, stable hash of a decoded JSON value"""
+    return hashlib.blake2b(json_backend.dumps(value), digest_size=12).digest()
+
+
+def _document_token(doc):
+    if isinstance(doc, dict) and doc.get("updated_at"):
+        return detached(doc["updated_at"])
+    return content_hash(doc)
+
+
+def _panels_token(panels):
+    if isinstance(panels, dict) and panels and all(
+        isinstance(p, dict) and p.get("updated_at") for p in panels.values()
+    ):
+        return content_hash([(panel_id, p["updated_at"]) for panel_id, p in panels.items()])
+    return content_hash(panels)
+
+
+def compute_tokens(documents, transcripts, document_panels):
+    """
+    Map every ID in documents/transcripts/documentPanels to a version token.
+
+    Documents and panels use their updated_at when Granola sets one and fall back
+    to a content hash; transcripts have no timestamp, so they are always hashed.
+    Two snapshots with equal tokens for an ID have the same data for that ID.
+    Tokens don't share strings with the decoded data, so it can be freed.
+    """
+    doc_tokens = {doc_id: _document_token(doc) for doc_id, doc in documents.items()}
+    transcript_tokens = {doc_id: content_hash(t) for doc_id, t in transcripts.items()}
+    panel_tokens = {doc_id: _panels_token(p) for doc_id, p in document_panels.items()}
+
+    tokens = {}
+    for doc_id in doc_tokens.keys() | transcript_tokens.keys() | panel_tokens.keys():
+        tokens[interned_id(doc_id)] = (
+            doc_tokens.get(doc_id),
+            transcript_tokens.get(doc_id),
+            panel_tokens.get(doc_id),
+        )
+    return tokens
+
+
+class Changeset:
+    """IDs that were added, modified or removed between two snapshot versions"""
+
+    def __init__(self, from_version, to_version, added=(), modified=(), removed=()):
+        self.from_version = from_version
+        self.to_version = to_version
+        self.added = frozenset(added)
+        self.modified = frozenset(modified)
+        self.removed = frozenset(removed)
+
+    @classmethod
+    def between(cls, from_version, old_tokens, to_version, new_tokens):
+        old_ids = old_tokens.keys()
+        new_ids = new_tokens.keys()
+        modified = [doc_id for doc_id in new_ids & old_ids if new_tokens[doc_id] != old_tokens[doc_id]]
+        return cls(from_version, to_version, new_ids - old_ids, modified, old_ids - new_ids)
+
+    @property
+    def touched(self):
+        return self.added | self.modified | self.removed
+
+    def __bool__(self):
+        return bool(self.added or self.modified or self.removed)
+
+    def merge(self, later):
+        """Combine this changeset with the one that followed it"""
+        added, modified, removed = [], [], []
+        first, second = self.touched, later.touched
+        for doc_id in first | second:
+            if doc_id in first:
+                existed_before = doc_id not in self.added
+                exists_between = doc_id not in self.removed
+            else:
+                existed_before = exists_between = doc_id not in later.added
+            exists_after = doc_id not in later.removed if doc_id in second else exists_between
+
+            if existed_before and exists_after:
+                modified.append(doc_id)
+            elif exists_after:
+                added.append(doc_id)
+            elif existed_before:
+                removed.append(doc_id)
+            # Added and removed again in between: nothing a reader needs to hear about
+        return Changeset(self.from_version, later.to_version, added, modified, removed)
+
+    def as_dict(self):
+        return {
+            "from_version": self.from_version,
+            "to_version": self.to_version,
+            "added": sorted(self.added),
+            "modified": sorted(self.modified),
+            "removed": sorted(self.removed),
+        }
+
+
+class DocumentCache:
+    """
+    Per-document memo of something derived from the cache (extracted notes, joined
+    transcripts, ...). Entries are tagged with the document's version token, so a
+    lookup from any snapshot only hits if that document is unchanged. Register it
+    with the SnapshotManager to have changed/removed entries evicted on reload.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, snapshot, doc_id, compute):
+        token = snapshot.tokens.get(doc_id)
+        entry = self._entries.get(doc_id)
+        if entry is not None and entry[0] == token:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        value = compute()
+        self._entries[doc_id] = (token, value)
+        return value
+
+    def apply(self, changes):
+        for doc_id in changes.modified | changes.removed:
+            self._entries.pop(doc_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _unchanged(previous, tokens, part, attribute):
+    """previous's compact records (snapshot.<attribute>) whose part of the version token is still the same"""
+    old_tokens = previous.tokens
+    unchanged = {}
+    for doc_id, record in getattr(previous, attribute).items():
+        old, new = old_tokens.get(doc_id), tokens.get(doc_id)
+        if old is not None and new is not None and old[part] == new[part]:
+            unchanged[doc_id] = record
+    return unchanged
+
+
+class CacheSnapshot:
+    """One immutable, fully decoded version of the cache file"""
+
+    def __init__(self, version, path, signature, top, previous=None):
+        self.version = version
+        self.path = path
+        self.signature = signature
+        self.loaded_at = time.time()
+        # Identifies this file version across restarts and processes (unlike version,
+        # which is a per-process counter); used for HTTP validators
+        self.tag = snapshot_tag(path, signature)
+        self.modified_at = signature[0] / 1e9
+
+        cache = top.get("cache", {}) if isinstance(top, dict) else {}
+        state = cache.get("state", {}) if isinstance(cache, dict) else {}
+        state = state if isinstance(state, dict) else {}
+        documents = state.get("documents") or {}
+        transcripts = state.get("transcripts") or {}
+        document_panels = state.get("documentPanels") or {}
+
+        # Tokens come from the full raw data; after that only compact records are kept
+        # (see meetings.py) and the decoded file can be freed
+        self.tokens = compute_tokens(documents, transcripts, document_panels)
+        same_file = previous is not None and previous.path == path
+
+        def reuse(part, attribute):
+            return _unchanged(previous, self.tokens, part, attribute) if same_file else None
+
+        with stage("compact_records"), json_backend.gc_paused():
+            self.documents = compact_documents(documents, reuse(0, "documents"))
+            self.transcripts = compact_transcripts(transcripts, reuse(1, "transcripts"))
+            self.document_panels = compact_panels(document_panels, reuse(2, "document_panels"))
+        self.state = {key: state[key] for key in STATE_KEYS if key in state}
+        if not same_file:
+            # First load: everything is new
+            self.changes = Changeset(0, version, added=self.tokens.keys())
+        else:
+            self.changes = Changeset.between(previous.version, previous.tokens, version, self.tokens)
+
+        self._derived = {}
+        self._derived_lock = threading.Lock()
+        # Structures built on the previous snapshot that can be patched instead of
+        # rebuilt: key -> (value, changeset since that value was built)
+        self._carried = {}
+        if previous is not None and previous.path == path:
+            for key, (value, changes) in previous._carried.items():
+                self._carried[key] = (value, changes.merge(self.changes))
+            for key, value in previous._derived.items():
+                self._carried[key] = (value, self.changes)
+
+    def derived(self, key, build, update=None):
+        """
+        Return a structure computed from this snapshot, building it at most once.
+        Use this for indexes and anything else that is only valid for one version.
+
+        If update is given and the previous snapshot already built this key,
+        update(old_value, snapshot, changeset) is called instead of build so the
+        work is proportional to what changed. update must not modify old_value in
+        place, since requests on the older snapshot may still be reading it.
+        """
+        try:
+            return self._derived[key]
+        except KeyError:
+            pass
+        with self._derived_lock:
+            if key not in self._derived:
+                carried = self._carried.pop(key, None)
+                if carried is not None and update is not None:
+                    old_value, changes = carried
+                    self._derived[key] = update(old_value, self, changes) if changes else old_value
+                else:
+                    self._derived[key] = build(self)
+            return self._derived[key]
+
+    def release_history(self):
+        """Forget structures carried over from the previous snapshot"""
+        self._carried.clear()
+
+
+class SnapshotManager:
+    """
+    Process-wide holder of the current CacheSnapshot.
+
+    get() stats the file on every call (cheap) and returns the current snapshot
+    if the signature still matches. When the file has changed, the new version is
+    decoded on a background thread and swapped in atomically; callers keep getting
+    the previous snapshot until then. Only the very first load blocks.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._current = None
+        self._version = 0
+        self._reloading = False
+        self._failed_signature = None
+        self._failed_at = 0.0
+        self._document_caches = []
+        self._listeners = []
+
+    def register(self, document_cache):
+        """Evict changed documents from document_cache whenever a new version loads"""
+        self._document_caches.append(document_cache)
+        return document_cache
+
+    def on_reload(self, callback):
+        """Call callback(snapshot, changeset) after each new snapshot is published"""
+        self._listeners.append(callback)
+        return callback
+
+    @property
+    def current(self):
+        return self._current
+
+    def get(self, path, wait=False):
+        signature = file_signature(path)
+        if signature is None:
+            raise FileNotFoundError(f"Granola cache not found at {path}")
+
+        current = self._current
+        if current is not None and current.path == path and current.signature == signature:
+            return current
+
+        if current is None or current.path != path or wait:
+            return self._load(path)
+
+        self._reload_in_background(path, signature)
+        return current
+
+    def invalidate(self):
+        """Drop the current snapshot so the next get() reloads from disk"""
+        with self._lock:
+            self._current = None
+
+    def _reload_in_background(self, path, signature):
+        with self._lock:
+            if self._reloading:
+                return
+            if signature == self._failed_signature and time.monotonic() - self._failed_at < RETRY_DELAY_SECONDS:
+                return
+            self._reloading = True
+
+        def run():
+            try:
+                self._load(path, attempts=1)
+            except Exception as e:
+                log.warning("⚠️ Background reload of %s failed, keeping previous snapshot: %s", path, e)
+            finally:
+                with self._lock:
+                    self._reloading = False
+
+        threading.Thread(target=run, name="granola-cache-reload", daemon=True).start()
+
+    def _load(self, path, attempts=COLD_LOAD_ATTEMPTS):
+        kind = "cold" if self._current is None or self._current.path != path else "reload"
+        start = time.perf_counter()
+        last_error = None
+        for attempt in range(attempts):
+            if attempt:
+                time.sleep(RETRY_DELAY_SECONDS)
+            before = file_signature(path)
+            if before is None:
+                raise FileNotFoundError(f"Granola cache not found at {path}")
+
+            with self._lock:
+                current = self._current
+                if current is not None and current.path == path and current.signature == before:
+                    return current
+
+            try:
+                with stage("file_read"):
+                    with open(path, "rb") as f:
+                        raw = f.read()
+                with stage("json_decode"):
+                    top = decode_cache_bytes(raw)
+            except (ValueError, UnicodeDecodeError) as e:
+                # Most likely a half-written file - try again once Granola is done
+                last_error = e
+                self._failed_signature, self._failed_at = before, time.monotonic()
+                RELOADS.inc("retry")
+                continue
+
+            # If the file changed while we were reading it we may have a torn read
+            if file_signature(path) != before:
+                last_error = RuntimeError("cache file changed while it was being read")
+                RELOADS.inc("retry")
+                continue
+
+            snapshot = self._publish(path, before, top)
+            RELOADS.inc("ok")
+            LOAD_SECONDS.observe(time.perf_counter() - start, kind)
+            return snapshot
+
+        RELOADS.inc("failed")
+        raise RuntimeError(f"Could not decode {path}: {last_error}")
+
+    def _publish(self, path, signature, top):
+        with self._lock:
+            previous = self._current
+            self._version += 1
+            with stage("snapshot_build"):
+                snapshot = CacheSnapshot(self._version, path, signature, top, previous=previous)
+            self._current = snapshot
+            self._failed_signature = None
+        if previous is not None:
+            # The new snapshot took what it needs; don't keep a chain of old versions alive
+            previous.release_history()
+
+        changes = snapshot.changes
+        for document_cache in self._document_caches:
+            if previous is None or previous.path != path:
+                document_cache.clear()
+            else:
+                document_cache.apply(changes)
+        for callback in self._listeners:
+            try:
+                with stage("reload_listeners"):
+                    callback(snapshot, changes)
+            except Exception as e:
+                log.exception("⚠️ Reload listener %r failed: %s", callback, e)
+
+        if previous is not None and changes:
+            log.info("🔄 Reloaded cache v%d: %d added, %d modified, %d removed", snapshot.version,
+                     len(changes.added), len(changes.modified), len(changes.removed))
+        return snapshot
@@ -0,0 +1,96 @@
+"""
+Which of my documents changed in each cache reload, for get_changes_since.
+
+Every time a new snapshot is published the log records, for each document
+that was added, modified or removed and is mine before or after the reload,
+whether it was mine before. A consumer holds a cursor - the log's ID plus the
+snapshot version it has seen up to - and asks for everything after it:
+
+    was mine before the first change since the cursor, and is mine now -> modified
+    wasn't, and is                                                       -> added
+    was, and isn't (deleted, or no longer mine)                          -> deleted
+
+so a call costs O(changes since the cursor), not O(documents). The log lives
+in memory and starts again with the process (the ID changes, so cursors from
+an earlier run are recognised and answered with a reset). With the derived
+store the same log is kept in the store instead, shared by every worker.
+"""
+import threading
+import uuid
+from collections import deque
+
+import cursors
+
+# Reloads kept; a cursor older than that gets a reset
+CHANGE_LOG_RELOADS = 1000
+
+
+def encode_change_cursor(log_id, position):
+    """Opaque cursor for a position (snapshot version or store sync number) in one log"""
+    return cursors.encode_cursor("changes", log_id, position)
+
+
+def decode_change_cursor(cursor):
+    """(log_id, position); raises ValueError for anything encode_change_cursor didn't produce"""
+    log_id, position = cursors.decode_cursor("changes", cursor, 2)
+    if not isinstance(log_id, str) or isinstance(position, bool) or not isinstance(position, int):
+        raise ValueError("Invalid cursor")
+    return log_id, position
+
+
+def merge_entries(batches):
+    """{doc_id: was_mine} from (position, {doc_id: was_mine}) batches, oldest first; the first entry wins"""
+    changed = {}
+    for _, entries in batches:
+        for doc_id, was_mine in entries.items():
+            changed.setdefault(doc_id, was_mine)
+    return changed
+
+
+class ChangeLog:
+    def __init__(self, limit=CHANGE_LOG_RELOADS):
+        self.id = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        # (snapshot version, {doc_id: was mine before that version}), oldest first
+        self._batches = deque()
+        self._limit = limit
+        # My document IDs as of the last recorded version
+        self._mine = None
+        # Versions a cursor can point at: start (history is complete from there) to last
+        self.start = None
+        self.last = None
+
+    def record(self, version, changes, mine):
+        """
+        Reload listener half: changes is the snapshot's Changeset, mine the IDs of
+        my documents in the new version
+        """
+        with self._lock:
+            if self._mine is None or changes.from_version == 0:
+                # First load, or another cache file: no history to offer yet
+                self._batches.clear()
+                self.start = version
+            else:
+                before = self._mine
+                entries = {doc_id: doc_id in before for doc_id in changes.touched
+                           if doc_id in before or doc_id in mine}
+                if entries:
+                    self._batches.append((version, entries))
+                    if len(self._batches) > self._limit:
+                        self.start = self._batches.popleft()[0]
+            self._mine = mine
+            self.last = version
+
+    def since(self, position, upto):
+        """
+        (new position, {doc_id: was mine at position}) for the changes after
+        position, up to snapshot version upto. The changes are None if the log
+        can't answer for position (None, or outside what it still holds).
+        """
+        with self._lock:
+            if self.last is None:
+                return None, None
+            last = min(self.last, upto)
+            if position is None or not self.start <= position <= last:
+                return last, None
+            return last, merge_entries(batch for batch in self._batches if position < batch[0] <= last)
@@ -0,0 +1,66 @@
+"""
+Optional local configuration.
+
+Settings are read from a JSON file - granola_config.json next to this module,
+or whatever GRANOLA_CONFIG points at - and individual GRANOLA_* environment
+variables override the file. Everything is optional; the defaults in the code
+are used for anything that isn't set.
+
+    {
+        "my_user_id": "19b41bfc-...",
+        "my_email": "kate@yourcompany.com",
+        "my_name": "Kate White",
+        "cache_path": "/Users/kate/Library/Application Support/Granola/cache-v3.json",
+        "team_patterns": ["standup", "sprint"],
+        "client_patterns": ["<>", "discovery call"],
+        "personal_patterns": ["1:1", "career"],
+        "max_participants": 4,
+        "store_path": "granola_store.sqlite3",
+        "host": "127.0.0.1",
+        "port": 11434,
+        "workers": 1
+    }
+"""
+import json
+import os
+from pathlib import Path
+
+from diagnostics import get_logger
+
+log = get_logger("config")
+
+CONFIG_PATH = Path(__file__).with_name("granola_config.json")
+
+# Environment variable -> config key
+ENV_OVERRIDES = {
+    "GRANOLA_MY_USER_ID": "my_user_id",
+    "GRANOLA_MY_EMAIL": "my_email",
+    "GRANOLA_MY_NAME": "my_name",
+    "GRANOLA_CACHE_PATH": "cache_path",
+    "GRANOLA_STORE_PATH": "store_path",
+    "GRANOLA_HOST": "host",
+    "GRANOLA_PORT": "port",
+    "GRANOLA_WORKERS": "workers",
+}
+
+
+def load_config():
+    """Return the merged configuration dict (empty if nothing is configured)"""
+    path = Path(os.environ.get("GRANOLA_CONFIG") or CONFIG_PATH)
+    config = {}
+    if path.exists():
+        try:
+            with open(path, "r") as f:
+                loaded = json.load(f)
+            if isinstance(loaded, dict):
+                config.update(loaded)
+            else:
+                log.warning("⚠️ Ignoring %s: expected a JSON object", path)
+        except (OSError, ValueError) as e:
+            log.warning("⚠️ Could not read config %s: %s", path, e)
+
+    for env_name, key in ENV_OVERRIDES.items():
+        value = os.environ.get(env_name)
+        if value:
+            config[key] = value
+    return config
@@ -0,0 +1,29 @@
+"""
+Opaque cursors handed out to API clients.
+
+A cursor is a kind tag plus a few JSON values, base64-encoded. The kind keeps
+one method's cursors from being accepted by another (a page cursor passed to
+get_changes_since, say) - each module checks the values it gets back.
+"""
+import base64
+import json
+
+# Bumped if the cursor layout ever changes, so old cursors are rejected cleanly
+CURSOR_VERSION = 2
+
+
+def encode_cursor(kind, *values):
+    raw = json.dumps([CURSOR_VERSION, kind, *values], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(kind, cursor, count):
+    """The count values of a kind cursor; raises ValueError for anything encode_cursor didn't produce"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        decoded = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(decoded, list) or len(decoded) != count + 2 or decoded[:2] != [CURSOR_VERSION, kind]:
+        raise ValueError("Invalid cursor")
+    return decoded[2:]
@@ -0,0 +1,598 @@
+"""
+Optional on-disk copy of everything the server derives from cache-v3.json.
+
+Set GRANOLA_STORE_PATH (or "store_path" in granola_config.json) to a SQLite
+file and the server keeps one row per document there - ownership verdict,
+parsed created_at, enhanced notes, joined transcript - plus an FTS5 index for
+search_meetings. Rows are tagged with the document's version token, so after a
+reload only changed documents are re-extracted and rewritten.
+
+When the store is in sync with the file on disk, the read methods run against
+it instead of a decoded snapshot: a restart doesn't need to parse the cache at
+all, and only the publisher (below) keeps a snapshot in memory - to patch on
+the next reload - so the other processes' memory doesn't grow with the cache.
+
+The store is also how several server processes (uvicorn --workers) share one
+snapshot. Whichever process holds the lock file next to it is the publisher:
+it alone parses cache-v3.json, and it keeps the rows in sync, polling the file
+even when it isn't getting requests itself. The others only read. They map the
+database file (SQLite mmap I/O, so pages are shared through the OS page cache
+rather than copied into each process), see a new version as soon as a sync
+transaction commits, and never parse the cache unless no publisher shows up.
+If the publisher exits, the next process to find the rows stale takes over.
+
+Each sync also appends the documents it touched to a change log table, so
+get_changes_since answers the same way from every worker.
+"""
+import hashlib
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:
+    # No flock (Windows): every process keeps its own rows in sync, as if it were alone
+    fcntl = None
+
+from cache_snapshot import file_signature, snapshot_tag
+from change_log import CHANGE_LOG_RELOADS, merge_entries
+from diagnostics import get_logger
+from search_index import FIELD_WEIGHTS, add_term_scores, tokenize
+
+log = get_logger("store")
+
+# Bump when the tables or what goes into them change; the store is then rebuilt
+SCHEMA_VERSION = 4
+
+# Rows fetched per query when walking a window, so a long stream never holds a
+# cursor open across threads
+BATCH_SIZE = 64
+# How much of the database file each connection reads through a memory map
+MMAP_BYTES = int(os.environ.get("GRANOLA_STORE_MMAP_MB", 512)) * 1024 * 1024
+# Idle read connections kept for reuse by later views
+READER_POOL_SIZE = 4
+# How often the publisher checks cache-v3.json for changes
+PUBLISH_POLL_SECONDS = float(os.environ.get("GRANOLA_PUBLISH_POLL_SECONDS", 1.0))
+# How long a process without rows waits for the publisher before parsing the cache itself
+PUBLISH_WAIT_SECONDS = float(os.environ.get("GRANOLA_PUBLISH_WAIT_SECONDS", 120))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY,
+    token TEXT NOT NULL,
+    mine INTEGER NOT NULL,
+    created_epoch REAL,
+    created_at TEXT,
+    -- Weighted token count of the searched fields (search_index.weighted_length)
+    search_length REAL,
+    title TEXT,
+    notes TEXT,
+    panels TEXT,
+    transcript TEXT,
+    -- [start, end, speaker, offset, length] per transcript segment
+    segments TEXT,
+    enhanced_notes TEXT,
+    summary TEXT,
+    duration INTEGER,
+    participants TEXT
+);
+CREATE INDEX IF NOT EXISTS documents_by_time ON documents (mine, created_epoch, id);
+-- Tokenized like search_index.tokenize: lower-cased runs of word characters
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, notes, panels, transcript, content='documents', content_rowid='rowid',
+    tokenize="unicode61 remove_diacritics 0 tokenchars '_'"
+);
+-- How many documents have each term, and where each occurrence is, for scoring
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_terms USING fts5vocab(documents_fts, 'row');
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_hits USING fts5vocab(documents_fts, 'instance');
+-- The change log (see change_log.py): one row per document touched by a sync
+-- that was or is mine, numbered by the sync that touched it
+CREATE TABLE IF NOT EXISTS changes (sync INTEGER NOT NULL, id TEXT NOT NULL, was_mine INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS changes_by_sync ON changes (sync);
+"""
+
+RECORD_COLUMNS = ("id", "token", "mine", "created_epoch", "created_at", "search_length", "title", "notes",
+                  "panels", "transcript", "segments", "enhanced_notes", "summary", "duration", "participants")
+FTS_COLUMNS = tuple(FIELD_WEIGHTS)
+
+
+def _connect(path, **kwargs):
+    """An autocommit connection (transactions are opened explicitly) reading through mmap"""
+    conn = sqlite3.connect(path, isolation_level=None, **kwargs)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA mmap_size={MMAP_BYTES}")
+    return conn
+
+
+def token_string(token):
+    """Stable text form of a snapshot version token (they mix str, bytes and tuples)"""
+    return hashlib.blake2b(repr(token).encode(), digest_size=12).hexdigest()
+
+
+class StoreView:
+    """
+    Stand-in for a CacheSnapshot when reads are served from the store. It has
+    the identity attributes the server uses for ETags and coalescing; the loader
+    read functions check for it and query view.store instead of the documents.
+    Like a snapshot it is one version: store is a StoreReader pinned to the
+    rows that signature describes, whatever syncs commit while it's in use.
+    """
+
+    def __init__(self, reader, path, signature):
+        self.store = reader
+        self.path = path
+        self.signature = signature
+        self.tag = snapshot_tag(path, signature)
+        self.version = "store:" + self.tag
+        self.modified_at = signature[0] / 1e9
+
+
+class DerivedStore:
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._refreshing = False
+        self._refresh_lock = threading.Lock()
+        self._lock_file = None
+        self._publisher_lock = threading.Lock()
+        self._publish_thread = None
+        # The StoreView of the current rows, while any request is still using it
+        self._view = None
+        self._view_lock = threading.Lock()
+        # Connections of closed readers, reused by the next ones
+        self._idle_readers = []
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        if meta and meta.get("schema") != str(SCHEMA_VERSION) and self.claim_publisher():
+            log.info("💾 Store %s has an old layout, rebuilding it", self.path)
+            conn.executescript("DROP TABLE IF EXISTS documents_terms; DROP TABLE IF EXISTS documents_hits; "
+                               "DROP TABLE IF EXISTS documents_fts; DROP TABLE IF EXISTS documents; "
+                               "DROP TABLE IF EXISTS changes; DROP TABLE IF EXISTS meta;" + SCHEMA)
+            meta = {}
+        # (cache path, signature) the rows currently reflect
+        self._synced = None
+        self._fingerprint = None
+        self._read_meta(meta)
+
+    def _connection(self):
+        """One connection per thread; WAL lets readers run while a sync writes"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = _connect(self.path)
+            self._local.conn = conn
+            # Unknown, so the first _check_published() on this thread reads the meta rows
+            self._local.data_version = None
+        return conn
+
+    def _read_meta(self, meta):
+        # Old-layout rows (left for the publisher to rebuild) don't count as synced
+        if meta.get("signature") and meta.get("schema") == str(SCHEMA_VERSION):
+            self._synced = (meta["cache_path"], tuple(json.loads(meta["signature"])))
+            self._fingerprint = meta.get("fingerprint")
+
+    def _check_published(self):
+        """Pick up a sync another process has committed since this thread last looked"""
+        conn = self._connection()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._local.data_version:
+            self._local.data_version = data_version
+            self._read_meta(dict(conn.execute("SELECT key, value FROM meta")))
+
+    # -- publishing -----------------------------------------------------------
+
+    def claim_publisher(self):
+        """
+        True if this process is (or has just become) the one that parses the
+        cache and syncs the rows; other processes only read them
+        """
+        if fcntl is None or self._lock_file is not None:
+            return True
+        with self._publisher_lock:
+            if self._lock_file is not None:
+                return True
+            lock_file = open(self.path + ".lock", "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            # Held (and the lock with it) until the process exits
+            self._lock_file = lock_file
+        log.info("💾 Publishing the cache snapshot to %s from process %d", self.path, os.getpid())
+        return True
+
+    def is_publisher(self):
+        return fcntl is None or self._lock_file is not None
+
+    def publish_continuously(self, is_stale, load):
+        """
+        On the publisher, check is_stale() every PUBLISH_POLL_SECONDS and call
+        load() (which syncs the rows) when it's true, so the other processes get
+        new versions even if this one isn't serving requests. Starts once.
+        """
+        with self._publisher_lock:
+            if self._publish_thread is not None:
+                return
+            self._publish_thread = threading.Thread(target=self._publish_loop, args=(is_stale, load),
+                                                    name="granola-store-publish", daemon=True)
+        self._publish_thread.start()
+
+    def _publish_loop(self, is_stale, load):
+        while True:
+            try:
+                if is_stale():
+                    load()
+            except Exception as e:
+                log.warning("⚠️ Publishing the cache snapshot failed, will retry: %s", e)
+            time.sleep(PUBLISH_POLL_SECONDS)
+
+    def wait_for_view(self, cache_path, fingerprint, current=False, timeout=PUBLISH_WAIT_SECONDS):
+        """
+        Wait for the publisher to sync rows for cache_path (as it is on disk now,
+        if current) and return their StoreView, or None after timeout seconds
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            view = self.view(cache_path, fingerprint)
+            if view is not None and (not current or self.is_current(cache_path, fingerprint)):
+                return view
+            if time.monotonic() >= deadline or self.claim_publisher():
+                # Timed out, or the publisher went away and this process should load it
+                return None
+            time.sleep(0.1)
+
+    # -- keeping it in sync ---------------------------------------------------
+
+    def view(self, cache_path, fingerprint):
+        """
+        A StoreView of the rows if they were synced from cache_path with the same
+        settings - possibly from an older version of the file - else None
+        """
+        self._check_published()
+        synced = self._synced
+        if synced is None or synced[0] != str(cache_path) or self._fingerprint != fingerprint:
+            return None
+        with self._view_lock:
+            view = self._view() if self._view is not None else None
+            if view is not None and view.signature == synced[1]:
+                return view
+            reader = self.reader()
+            meta = reader.meta
+            # What the reader sees may be newer than _synced, but must still be these settings
+            if meta.get("schema") != str(SCHEMA_VERSION) or meta.get("cache_path") != str(cache_path) \
+                    or meta.get("fingerprint") != fingerprint or not meta.get("signature"):
+                reader.close()
+                return None
+            view = StoreView(reader, cache_path, tuple(json.loads(meta["signature"])))
+            # Weak, so an idle process doesn't hold an old version (and the WAL behind it)
+            self._view = weakref.ref(view)
+            return view
+
+    def reader(self):
+        """A StoreReader of the rows as they are now"""
+        try:
+            conn = self._idle_readers.pop()
+        except IndexError:
+            conn = _connect(self.path, check_same_thread=False)
+        return StoreReader(conn, self._release_reader)
+
+    def _release_reader(self, conn):
+        if len(self._idle_readers) < READER_POOL_SIZE:
+            self._idle_readers.append(conn)
+        else:
+            conn.close()
+
+    def is_current(self, cache_path, fingerprint):
+        """True if the rows reflect cache_path as it is on disk right now"""
+        self._check_published()
+        return self._synced is not None and self._fingerprint == fingerprint \
+            and self._synced == (str(cache_path), file_signature(cache_path))
+
+    def refresh_in_background(self, load):
+        """Run load() (which publishes a snapshot, and so syncs the store) on a thread, once at a time"""
+        with self._refresh_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                load()
+            except Exception as e:
+                log.warning("⚠️ Background store refresh failed, serving previous rows: %s", e)
+            finally:
+                with self._refresh_lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="granola-store-refresh", daemon=True).start()
+
+    def sync(self, snapshot, record_of, fingerprint):
+        """
+        Bring the rows in line with snapshot. record_of(doc_id) returns the
+        column values for one document; it is only called for documents whose
+        version token differs from the stored one (all of them if fingerprint -
+        the identity/ownership settings - changed).
+        """
+        tokens = {doc_id: token_string(snapshot.tokens.get(doc_id)) for doc_id in snapshot.documents}
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                stored, stored_mine = {}, set()
+                for doc_id, token, mine in conn.execute("SELECT id, token, mine FROM documents"):
+                    stored[doc_id] = token
+                    if mine:
+                        stored_mine.add(doc_id)
+                if fingerprint != self._fingerprint:
+                    stored_tokens = {}
+                else:
+                    stored_tokens = stored
+                removed = [doc_id for doc_id in stored if doc_id not in tokens]
+                changed = [doc_id for doc_id, token in tokens.items() if stored_tokens.get(doc_id) != token]
+                # doc_id -> was mine, for the change log
+                touched = {doc_id: doc_id in stored_mine for doc_id in removed if doc_id in stored_mine}
+                # Sum of search_length over the rows, for search's average document length
+                row = conn.execute("SELECT value FROM meta WHERE key = 'search_length'").fetchone()
+                search_length = float(row[0]) if row else 0.0
+                for doc_id in removed:
+                    search_length -= self._delete(conn, doc_id)
+                for doc_id in changed:
+                    if doc_id in stored:
+                        search_length -= self._delete(conn, doc_id)
+                    record = record_of(doc_id)
+                    record["id"], record["token"] = doc_id, tokens[doc_id]
+                    self._insert(conn, record)
+                    search_length += record.get("search_length") or 0.0
+                    if record.get("mine") or doc_id in stored_mine:
+                        touched[doc_id] = doc_id in stored_mine
+                meta = {
+                    "schema": str(SCHEMA_VERSION),
+                    "cache_path": str(snapshot.path),
+                    "signature": json.dumps(list(snapshot.signature)),
+                    "fingerprint": fingerprint,
+                    "search_documents": str(len(tokens)),
+                    "search_length": repr(search_length),
+                }
+                meta.update(self._log_changes(conn, str(snapshot.path), touched))
+                conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", meta.items())
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._synced = (str(snapshot.path), tuple(snapshot.signature))
+            self._fingerprint = fingerprint
+        if removed or changed:
+            log.info("💾 Store synced to cache v%s: %d written, %d removed", snapshot.version, len(changed), len(removed))
+        return len(changed), len(removed)
+
+    def _log_changes(self, conn, cache_path, touched):
+        """Append touched (doc_id -> was mine) to the change log; returns its meta rows"""
+        log_meta = dict(conn.execute("SELECT key, value FROM meta WHERE key LIKE 'log_%'"))
+        if "log_id" not in log_meta or log_meta.get("log_cache_path") != cache_path:
+            # A new log: these rows are its starting point, not changes anyone can have missed
+            conn.execute("DELETE FROM changes")
+            return {"log_id": uuid.uuid4().hex, "log_cache_path": cache_path, "log_start": "0", "log_sync": "0"}
+        if not touched:
+            return {}
+        sync = int(log_meta["log_sync"]) + 1
+        conn.executemany("INSERT INTO changes (sync, id, was_mine) VALUES (?, ?, ?)",
+                         [(sync, doc_id, int(was_mine)) for doc_id, was_mine in touched.items()])
+        result = {"log_sync": str(sync)}
+        start = sync - CHANGE_LOG_RELOADS
+        if start > int(log_meta["log_start"]):
+            conn.execute("DELETE FROM changes WHERE sync <= ?", (start,))
+            result["log_start"] = str(start)
+        return result
+
+    def _delete(self, conn, doc_id):
+        """Remove doc_id's row; returns the search_length it had"""
+        row = conn.execute("SELECT rowid, title, notes, panels, transcript, search_length FROM documents "
+                           "WHERE id = ?", (doc_id,)).fetchone()
+        if row is None:
+            return 0.0
+        # External-content FTS tables need the old values to remove a row
+        conn.execute("INSERT INTO documents_fts (documents_fts, rowid, title, notes, panels, transcript) "
+                     "VALUES ('delete', ?, ?, ?, ?, ?)", row[:5])
+        conn.execute("DELETE FROM documents WHERE rowid = ?", (row[0],))
+        return row[5] or 0.0
+
+    def _insert(self, conn, record):
+        values = [record.get(column) for column in RECORD_COLUMNS]
+        cursor = conn.execute(
+            f"INSERT INTO documents ({', '.join(RECORD_COLUMNS)}) VALUES ({', '.join('?' * len(RECORD_COLUMNS))})",
+            values,
+        )
+        conn.execute("INSERT INTO documents_fts (rowid, title, notes, panels, transcript) VALUES (?, ?, ?, ?, ?)",
+                     (cursor.lastrowid,) + tuple(record.get(column) or "" for column in FTS_COLUMNS))
+
+
+class StoreReader:
+    """
+    Queries against one version of the rows. It has a connection of its own
+    holding a read transaction - WAL keeps that version readable while later
+    syncs commit - shared (one query at a time) by the threads serving a view.
+    The transaction ends, and the connection goes back to the store, once
+    nothing references the reader.
+    """
+
+    def __init__(self, conn, release=None):
+        self._lock = threading.Lock()
+        self._conn = conn
+        # Takes the connection back once the transaction is over (else it's closed)
+        self._release = release
+        self._conn.execute("BEGIN")
+        # The first read fixes the version the whole transaction sees
+        self.meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+
+    def _rows(self, sql, params=()):
+        """(column names, all rows) for one query"""
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            return [d[0] for d in cursor.description], cursor.fetchall()
+
+    def _query(self, sql, params=()):
+        return self._rows(sql, params)[1]
+
+    def close(self):
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            # Ends the read transaction
+            conn.execute("ROLLBACK")
+        except sqlite3.Error:
+            conn.close()
+            return
+        if self._release is not None:
+            self._release(conn)
+        else:
+            conn.close()
+
+    def __del__(self):
+        if getattr(self, "_conn", None) is not None:
+            self.close()
+
+    def excluded_count(self):
+        """Documents that aren't mine (the filtered_documents figure)"""
+        return self._query("SELECT COUNT(*) FROM documents WHERE mine = 0")[0][0]
+
+    def count_since(self, epoch):
+        return self._query("SELECT COUNT(*) FROM documents WHERE mine = 1 AND created_epoch > ?", (epoch,))[0][0]
+
+    def newest(self, columns, limit, start=None, before=None):
+        """
+        Rows of my documents newest first, as dicts with the given columns plus
+        created_epoch and id: at most limit of them (None = all), created after
+        start, sorting below the (epoch, doc_id) key before. Fetched in batches.
+        """
+        select = ", ".join(dict.fromkeys(("id", "created_epoch") + tuple(columns)))
+        remaining = limit
+        while remaining is None or remaining > 0:
+            batch = BATCH_SIZE if remaining is None else min(BATCH_SIZE, remaining)
+            clauses = ["mine = 1", "created_epoch IS NOT NULL"]
+            params = []
+            if start is not None:
+                clauses.append("created_epoch > ?")
+                params.append(start)
+            if before is not None:
+                clauses.append("(created_epoch, id) < (?, ?)")
+                params.extend(before)
+            names, rows = self._rows(
+                f"SELECT {select} FROM documents WHERE {' AND '.join(clauses)} "
+                f"ORDER BY created_epoch DESC, id DESC LIMIT ?",
+                params + [batch],
+            )
+            for row in rows:
+                yield dict(zip(names, row))
+            if len(rows) < batch:
+                return
+            before = (rows[-1][1], rows[-1][0])
+            if remaining is not None:
+                remaining -= len(rows)
+
+    def document(self, doc_id, columns):
+        rows = self._query(f"SELECT {', '.join(columns)} FROM documents WHERE id = ?", (doc_id,))
+        return dict(zip(columns, rows[0])) if rows else None
+
+    def documents(self, doc_ids, columns):
+        """Rows (dicts with the given columns plus id) of whichever of doc_ids exist, in batches"""
+        select = ", ".join(dict.fromkeys(("id",) + tuple(columns)))
+        doc_ids = list(doc_ids)
+        for i in range(0, len(doc_ids), BATCH_SIZE):
+            batch = doc_ids[i:i + BATCH_SIZE]
+            names, rows = self._rows(
+                f"SELECT {select} FROM documents WHERE id IN ({', '.join('?' * len(batch))})", batch)
+            for row in rows:
+                yield dict(zip(names, row))
+
+    def changes_since(self, log_id, position):
+        """
+        (log ID, new position, {doc_id: was mine at position}) from the change
+        log, like ChangeLog.since; the changes are None if the log can't answer
+        for (log_id, position)
+        """
+        log_meta = {key: value for key, value in self.meta.items() if key.startswith("log_")}
+        if "log_id" not in log_meta:
+            return None, None, None
+        last = int(log_meta["log_sync"])
+        if log_id != log_meta["log_id"] or not int(log_meta["log_start"]) <= position <= last:
+            return log_meta["log_id"], last, None
+        rows = self._query("SELECT sync, id, was_mine FROM changes WHERE sync > ? ORDER BY sync", (position,))
+        changed = merge_entries(((sync, {doc_id: bool(was_mine)}) for sync, doc_id, was_mine in rows))
+        return log_meta["log_id"], last, changed
+
+    def search(self, query, limit, since=None, until=None, scope="mine"):
+        """
+        (number of matches, [row dict with score, ...] best first). FTS5 finds
+        the matching documents, but they're scored with search_index's BM25 -
+        term counts read from the FTS index, lengths kept by sync - so scores
+        and order are the same as the in-memory index gives. (FTS5's bm25()
+        weighs lengths differently and scores a term found in more than half
+        the documents as 0.)
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return 0, []
+        match = " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+        clauses = ["documents_fts MATCH ?"]
+        params = [match]
+        # The unary + keeps SQLite from walking documents_by_time and running the
+        # match once per row: the FTS index finds the matches, these filter them
+        if scope != "all":
+            clauses.append("+d.mine = ?")
+            params.append(1 if scope == "mine" else 0)
+        if since is not None:
+            clauses.append("+d.created_epoch >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("+d.created_epoch <= ?")
+            params.append(until)
+        # rowid -> (id, search_length) of every match
+        candidates = {rowid: (doc_id, length or 0.0) for rowid, doc_id, length in self._query(
+            "SELECT d.rowid, d.id, d.search_length FROM documents_fts JOIN documents d "
+            f"ON d.rowid = documents_fts.rowid WHERE {' AND '.join(clauses)}", params)}
+        if not candidates:
+            return 0, []
+
+        count = int(self.meta.get("search_documents", 0))
+        average_length = (float(self.meta.get("search_length", 0)) / count) or 1.0
+        length_of = lambda rowid: candidates[rowid][1]
+        scores = {}
+        for term in terms:
+            matching = self._query("SELECT doc FROM documents_terms WHERE term = ?", (term,))
+            if not matching:
+                continue
+            # rowid -> weighted term frequency, as analyze() counts it
+            posting = {}
+            for rowid, column, hits in self._query(
+                    "SELECT doc, col, COUNT(*) FROM documents_hits WHERE term = ? GROUP BY doc, col", (term,)):
+                if rowid in candidates:
+                    posting[rowid] = posting.get(rowid, 0.0) + FIELD_WEIGHTS[column] * hits
+            add_term_scores(scores, posting, matching[0][0], count, length_of, average_length)
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], candidates[item[0]][0]))
+        if not best:
+            return len(candidates), []
+        names, rows = self._rows(
+            "SELECT rowid, id, title, created_at, notes, panels, transcript FROM documents "
+            f"WHERE rowid IN ({', '.join('?' * len(best))})", [rowid for rowid, _ in best])
+        by_rowid = {row[0]: dict(zip(names[1:], row[1:])) for row in rows}
+        return len(candidates), [dict(by_rowid[rowid], score=score) for rowid, score in best]
+
+def naive_iso(created_at):
+    """The timezone-naive form of a stored aware UTC ISO timestamp"""
+    if created_at is None:
+        return None
+    return datetime.fromisoformat(created_at).astimezone(timezone.utc).replace(tzinfo=None).isoformat()
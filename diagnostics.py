@@ -0,0 +1,104 @@
+"""
+Logging and per-request tracing.
+
+Everything logs through the "granola" logger. Per-document detail is logged at
+DEBUG and should be guarded with debug_enabled() so that, with debug off, hot
+loops pay for one boolean check and nothing else.
+
+    GRANOLA_LOG_LEVEL=DEBUG          turn on per-document detail
+    GRANOLA_DEBUG_SAMPLE_RATE=0.05   ...but only for ~5% of requests
+
+A request can also ask for a trace: the per-document decisions made while
+serving it (ownership verdicts, where notes came from, ...) are collected and
+returned in the response instead of being written to the console.
+"""
+import contextvars
+import logging
+import os
+import random
+import sys
+from contextlib import contextmanager
+
+log = logging.getLogger("granola")
+
+# Share of requests that emit DEBUG lines when DEBUG is on (1.0 = all of them)
+DEBUG_SAMPLE_RATE = 1.0
+
+_sampled = contextvars.ContextVar("granola_debug_sampled", default=True)
+_trace = contextvars.ContextVar("granola_trace", default=None)
+
+
+def configure_logging(level=None, sample_rate=None):
+    """Set up the granola logger from arguments or GRANOLA_LOG_LEVEL / GRANOLA_DEBUG_SAMPLE_RATE"""
+    global DEBUG_SAMPLE_RATE
+
+    level = level or os.environ.get("GRANOLA_LOG_LEVEL", "INFO")
+    log.setLevel(level.upper() if isinstance(level, str) else level)
+    if not log.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(handler)
+        log.propagate = False
+
+    if sample_rate is None:
+        sample_rate = os.environ.get("GRANOLA_DEBUG_SAMPLE_RATE", DEBUG_SAMPLE_RATE)
+    try:
+        DEBUG_SAMPLE_RATE = min(max(float(sample_rate), 0.0), 1.0)
+    except ValueError:
+        log.warning("⚠️ Ignoring invalid GRANOLA_DEBUG_SAMPLE_RATE: %r", sample_rate)
+
+
+def get_logger(name):
+    return log.getChild(name)
+
+
+def debug_enabled():
+    """True if DEBUG lines for the current request would actually be emitted"""
+    return log.isEnabledFor(logging.DEBUG) and _sampled.get()
+
+
+def tracing():
+    """True if the current request asked for a trace"""
+    return _trace.get() is not None
+
+
+def detail_enabled():
+    """True if per-document decisions are wanted at all (debug log or trace)"""
+    return _trace.get() is not None or debug_enabled()
+
+
+def record(logger, doc_id, stage, message, *args):
+    """
+    Note a per-document decision. The message is %-formatted lazily and only if
+    it is going to a debug log line or the request's trace.
+    Callers in hot loops should check detail_enabled() first.
+    """
+    trace = _trace.get()
+    debug = debug_enabled()
+    if trace is None and not debug:
+        return
+    text = message % args if args else message
+    if trace is not None:
+        trace.append({"doc_id": doc_id, "stage": stage, "detail": text})
+    if debug:
+        logger.debug("  Doc %s [%s]: %s", doc_id, stage, text)
+
+
+@contextmanager
+def request_context(trace=False):
+    """
+    Scope one request: decides whether it is sampled for DEBUG output and, if
+    trace is true, yields the list its per-document decisions are appended to.
+    """
+    sampled = DEBUG_SAMPLE_RATE >= 1.0 or random.random() < DEBUG_SAMPLE_RATE
+    sampled_token = _sampled.set(sampled)
+    trace_list = [] if trace else None
+    trace_token = _trace.set(trace_list)
+    try:
+        yield trace_list
+    finally:
+        _trace.reset(trace_token)
+        _sampled.reset(sampled_token)
+
+
+configure_logging()
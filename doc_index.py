@@ -0,0 +1,134 @@
+"""
+Time-ordered index of documents, built once per cache snapshot.
+
+Keeps (created_at epoch, doc_id) pairs sorted ascending so that "newest N" is a
+slice off the end and "everything since X" is a bisection plus a slice.
+"""
+import math
+from bisect import bisect_left
+from itertools import islice
+
+import cursors
+
+
+def _after(epoch):
+    """Search key that sorts after every (epoch, doc_id) entry with this epoch"""
+    return (math.nextafter(epoch, math.inf),)
+
+
+def encode_cursor(entry):
+    """
+    Opaque pagination cursor for an (epoch, doc_id) entry. It names a position
+    in created_at order rather than an offset, so it stays valid across cache
+    reloads: documents added or removed elsewhere don't shift the next page.
+    """
+    epoch, doc_id = entry
+    return cursors.encode_cursor("page", epoch, doc_id)
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for anything it didn't produce"""
+    epoch, doc_id = cursors.decode_cursor("page", cursor, 2)
+    if isinstance(epoch, bool) or not isinstance(epoch, (int, float)) or not isinstance(doc_id, str):
+        raise ValueError("Invalid cursor")
+    return (float(epoch), doc_id)
+
+
+class TimeIndex:
+    def __init__(self, entries, epochs, excluded=frozenset()):
+        # entries: sorted list of (epoch, doc_id); epochs: doc_id -> epoch
+        self.entries = entries
+        self.epochs = epochs
+        # IDs left out by the include filter (e.g. documents that aren't mine)
+        self.excluded = excluded
+
+    @classmethod
+    def build(cls, documents, epoch_of, include=None):
+        """
+        Index every document for which include(doc_id, doc) is true.
+        epoch_of(doc_id, doc) returns the created_at epoch or None to skip it.
+        """
+        epochs = {}
+        excluded = set()
+        for doc_id, doc in documents.items():
+            if include is not None and not include(doc_id, doc):
+                excluded.add(doc_id)
+                continue
+            epoch = epoch_of(doc_id, doc)
+            if epoch is not None:
+                epochs[doc_id] = epoch
+        entries = sorted((epoch, doc_id) for doc_id, epoch in epochs.items())
+        return cls(entries, epochs, frozenset(excluded))
+
+    def updated(self, documents, changes, epoch_of, include=None):
+        """Return a new index with only the IDs in changes re-evaluated"""
+        touched = changes.touched
+        epochs = {doc_id: epoch for doc_id, epoch in self.epochs.items() if doc_id not in touched}
+        excluded = set(self.excluded - touched)
+        for doc_id in changes.added | changes.modified:
+            if doc_id not in documents:
+                continue
+            doc = documents[doc_id]
+            if include is not None and not include(doc_id, doc):
+                excluded.add(doc_id)
+                continue
+            epoch = epoch_of(doc_id, doc)
+            if epoch is not None:
+                epochs[doc_id] = epoch
+
+        entries = [entry for entry in self.entries if entry[1] not in touched]
+        entries.extend((epochs[doc_id], doc_id) for doc_id in touched if doc_id in epochs)
+        # Mostly sorted already, so this is close to linear
+        entries.sort()
+        return TimeIndex(entries, epochs, frozenset(excluded))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def newest(self, limit=None):
+        """Yield (epoch, doc_id) newest first, at most limit of them"""
+        entries = self.entries
+        stop = 0 if limit is None else max(len(entries) - limit, 0)
+        for i in range(len(entries) - 1, stop - 1, -1):
+            yield entries[i]
+
+    def between(self, start=None, end=None, newest_first=True, before=None):
+        """
+        Yield (epoch, doc_id) with start < epoch <= end. Either bound may be None.
+        before is an (epoch, doc_id) key: only entries that sort strictly below it
+        are yielded, which is how a page picks up where the previous one ended.
+        Costs O(log n) to find the range plus the number of entries yielded.
+        """
+        entries = self.entries
+        lo = 0 if start is None else bisect_left(entries, _after(start))
+        hi = len(entries) if end is None else bisect_left(entries, _after(end))
+        if before is not None:
+            hi = min(hi, bisect_left(entries, before))
+        if newest_first:
+            for i in range(hi - 1, lo - 1, -1):
+                yield entries[i]
+        else:
+            for i in range(lo, hi):
+                yield entries[i]
+
+    def since(self, epoch, newest_first=True, before=None):
+        """Yield entries created strictly after epoch"""
+        return self.between(start=epoch, newest_first=newest_first, before=before)
+
+    def page(self, limit, start=None, before=None):
+        """
+        Return (entries, next_key) for one page, newest first: at most limit
+        entries with start < epoch that sort below before. next_key is the last
+        entry returned if there are more, else None. Never touches the entries
+        of earlier pages.
+        """
+        if limit < 1:
+            raise ValueError("page size must be at least 1")
+        entries = list(islice(self.between(start=start, before=before), limit + 1))
+        if len(entries) > limit:
+            return entries[:limit], entries[limit - 1]
+        return entries, None
+
+    def count_since(self, epoch):
+        """How many entries were created strictly after epoch, in O(log n)"""
+        return len(self.entries) - bisect_left(self.entries, _after(epoch))
@@ -1,7 +1,22 @@
+import hashlib
 import json
 from pathlib import Path
-from dateutil.parser import parse as parse_date
 from datetime import datetime, timedelta, timezone
+from cache_snapshot import DocumentCache, SnapshotManager, decode_cache_bytes
+from derived_store import DerivedStore, StoreView, naive_iso
+from prosemirror import PanelTextCache, extract_text
+from transcripts import Transcript
+from meetings import DOCUMENT_TYPES, Meeting, PackedTree, unpack
+from doc_index import TimeIndex, decode_cursor, encode_cursor
+from change_log import ChangeLog, decode_change_cursor, encode_change_cursor
+from search_index import SearchIndex, make_snippet, tokenize, weighted_length
+from timeparse import parse_timestamp
+from config import load_config
+from ownership import OwnershipClassifier
+from diagnostics import detail_enabled, get_logger, record, tracing
+from metrics import gauge_function, stage, watch_cache
+
+log = get_logger("loader")
 
 CACHE_PATH = Path("/Users/katewhite/Library/Application Support/Granola/cache-v3.json")
 
@@ -10,17 +25,87 @@ MY_EMAIL = "kate@yourcompany.com"  # Replace with your actual email
 MY_NAME = "Kate White"  # Replace with your actual name
 MY_USER_ID = "19b41bfc-e113-44f4-8541-49a63b0aadcf"  # Your actual user ID (the one from meetings you were on)
 
+# granola_config.json / GRANOLA_* environment variables override the values above
+_config = load_config()
+MY_EMAIL = _config.get("my_email") or MY_EMAIL
+MY_NAME = _config.get("my_name") or MY_NAME
+MY_USER_ID = _config.get("my_user_id") or MY_USER_ID
+# Point the server at another cache file (e.g. a synthetic one for load tests)
+CACHE_PATH = Path(_config.get("cache_path") or CACHE_PATH)
+
+# Title patterns and identity used to decide which documents are mine
+_ownership = OwnershipClassifier.from_config(_config, user_id=MY_USER_ID, email=MY_EMAIL, name=MY_NAME)
+
+# Process-wide decoded copy of the cache file, refreshed when the file changes
+_snapshots = SnapshotManager()
+
+# Per-document derived values; only documents that changed on reload are recomputed
+_enhanced_notes_cache = _snapshots.register(DocumentCache("enhanced_notes"))
+_transcripts = _snapshots.register(DocumentCache("transcripts"))
+_created_at_cache = _snapshots.register(DocumentCache("created_at"))
+# Extracted AI panel text, per panel version
+_panel_text_cache = _snapshots.register(PanelTextCache())
+# Which of my documents each reload changed, for get_changes_since (the store keeps
+# its own when there is one)
+_change_log = ChangeLog()
+# Hit/miss counts show up on /metrics
+for _cache in (_enhanced_notes_cache, _transcripts, _created_at_cache):
+    watch_cache(_cache.name, _cache)
+watch_cache("panel_text", _panel_text_cache)
+
+def _snapshot_gauges():
+    snapshot = _snapshots.current
+    if snapshot is None:
+        return []
+    return [(("documents",), len(snapshot.documents)), (("transcripts",), len(snapshot.transcripts)),
+            (("version",), snapshot.version), (("loaded_at",), snapshot.loaded_at)]
+
+gauge_function("granola_snapshot", "Current in-memory snapshot: document/transcript counts, version, load time",
+               _snapshot_gauges, ["value"])
+
+# Optional SQLite copy of the derived per-document data (see derived_store.py).
+# When it's in sync with the file, the read functions query it instead of a snapshot.
+STORE_PATH = _config.get("store_path")
+_store = DerivedStore(STORE_PATH) if STORE_PATH else None
+# Stored ownership verdicts are only valid for the identity/patterns they were made with
+_store_fingerprint = hashlib.blake2b(json.dumps(
+    [MY_USER_ID, MY_EMAIL, MY_NAME] + [_config.get(key) for key in
+                                       ("team_patterns", "client_patterns", "personal_patterns", "max_participants")],
+    sort_keys=True, default=str,
+).encode(), digest_size=8).hexdigest()
+
 def load_cache():
+    """Read and fully decode the cache file from disk (bypasses the snapshot)"""
     if not CACHE_PATH.exists():
         raise FileNotFoundError("cache-v3.json not found in project directory")
-    with open(CACHE_PATH, "r") as f:
-        top = json.load(f)
+    with open(CACHE_PATH, "rb") as f:
+        # Double-decodes the embedded JSON string
+        return decode_cache_bytes(f.read())
 
-        # Double-decode the embedded JSON string
-        if isinstance(top.get("cache"), str):
-            top["cache"] = json.loads(top["cache"])
+def get_snapshot(wait=False):
+    """
+    Return the current in-memory CacheSnapshot, reloading only if cache-v3.json
+    changed on disk. Pass wait=True to block until a changed file is reloaded.
 
-        return top
+    With the derived store enabled this returns a StoreView whenever the store
+    has rows for this file; if the file has changed since, the previous rows are
+    served while it is loaded and synced in the background. When several server
+    processes share the store, only the publishing one ever loads the file; the
+    others wait for its rows.
+    """
+    if _store is not None:
+        view = _store.view(CACHE_PATH, _store_fingerprint)
+        current = view is not None and _store.is_current(CACHE_PATH, _store_fingerprint)
+        if view is not None and (not wait or current):
+            if not current and _claim_publisher():
+                _store.refresh_in_background(lambda: _snapshots.get(CACHE_PATH, wait=True))
+            return view
+        if not _claim_publisher():
+            view = _store.wait_for_view(CACHE_PATH, _store_fingerprint, current=wait)
+            if view is not None:
+                return view
+            log.warning("⚠️ No rows published to %s in time, loading the cache in this process", STORE_PATH)
+    return _snapshots.get(CACHE_PATH, wait=wait)
 
 def detect_my_user_id():
     """Try to automatically detect your user ID from the cache"""
@@ -29,8 +114,7 @@ def detect_my_user_id():
         return MY_USER_ID
     
     try:
-        cache_data = load_cache()
-        state = cache_data.get("cache", {}).get("state", {})
+        state = _snapshots.get(CACHE_PATH).state
         
         # Look for user information in various places
         users = state.get("users", {})
@@ -41,7 +125,8 @@ def detect_my_user_id():
             user_id = current_user.get("id") or current_user.get("userId")
             if user_id:
                 MY_USER_ID = str(user_id)
-                print(f"🔍 Detected user ID from currentUser: {MY_USER_ID}")
+                _ownership.set_user_id(MY_USER_ID)
+                log.info("🔍 Detected user ID from currentUser: %s", MY_USER_ID)
                 return MY_USER_ID
         
         # Search through users by email/name
@@ -54,185 +139,218 @@ def detect_my_user_id():
                 if (MY_EMAIL and MY_EMAIL.lower() == email) or \
                    (MY_NAME and (MY_NAME.lower() in name.lower() or MY_NAME.lower() in display_name.lower())):
                     MY_USER_ID = str(user_id)
-                    print(f"🔍 Detected user ID by matching email/name: {MY_USER_ID}")
+                    _ownership.set_user_id(MY_USER_ID)
+                    log.info("🔍 Detected user ID by matching email/name: %s", MY_USER_ID)
                     return MY_USER_ID
         
-        print("⚠️ Could not automatically detect user ID")
+        log.warning("⚠️ Could not automatically detect user ID")
         return None
         
     except Exception as e:
-        print(f"⚠️ Error detecting user ID: {e}")
+        log.warning("⚠️ Error detecting user ID: %s", e)
         return None
 
-def is_my_document(doc_id, doc, state):
+def is_my_document(doc_id, doc, state=None):
     """
     Determine if a document belongs to the current user
     Updated with better logic based on Granola's actual data structure
+    (the verdict is memoized until the document's updated_at changes)
     """
-    if not isinstance(doc, dict):
-        return False
-    
-    # Strategy 1: Check user_id field (most reliable)
-    user_id = doc.get("user_id")
-    if user_id:
-        if MY_USER_ID and str(user_id) == MY_USER_ID:
-            print(f"  ✅ Doc {doc_id}: Owned by me (user_id: {user_id})")
-            return True
-        else:
-            print(f"  ❌ Doc {doc_id}: Owned by someone else (user_id: {user_id}, my_id: {MY_USER_ID})")
-            return False
-    
-    # Strategy 2: Check if document is in workspace (usually team documents)
-    workspace_id = doc.get("workspace_id")
-    if workspace_id:
-        print(f"  ❌ Doc {doc_id}: In workspace (workspace_id: {workspace_id})")
-        return False
-    
-    # Strategy 3: Check visibility and public flags
-    visibility = doc.get("visibility")
-    is_public = doc.get("public", False)
-    
-    if is_public or visibility == "public":
-        print(f"  ❌ Doc {doc_id}: Public document (public: {is_public}, visibility: {visibility})")
-        return False
-    
-    # Strategy 4: Check number of participants - many participants usually means team meeting
-    participants = doc.get("people", [])
-    if isinstance(participants, list) and len(participants) > 4:
-        print(f"  ❌ Doc {doc_id}: Too many participants ({len(participants)}) - likely team meeting")
-        return False
-    
-    # Strategy 5: Check title patterns for team meetings
-    title = doc.get("title", "").lower()
-    team_patterns = [
-        'daily standup', 'standup', 'sprint', 'retrospective', 'planning', 
-        'all hands', 'team meeting', 'scrum', 'demo', 'review meeting'
-    ]
-    
-    if any(pattern in title for pattern in team_patterns):
-        print(f"  ❌ Doc {doc_id}: Team meeting pattern in title: '{doc.get('title', '')}'")
-        return False
-    
-    # Strategy 6: Check for client/external meeting patterns
-    client_patterns = [
-        'intelligems &', '& intelligems', '<>', 'shopify split testing',
-        'demo call', 'intro call', 'discovery call'
-    ]
-    
-    if any(pattern in title for pattern in client_patterns):
-        print(f"  ❌ Doc {doc_id}: Client/external meeting pattern: '{doc.get('title', '')}'")
-        return False
-    
-    # Strategy 7: Look for personal meeting patterns
-    personal_patterns = [
-        '1:1', 'one-on-one', 'personal', 'career', 'feedback',
-        'check-in', 'catch up', 'sync', '/ kate', 'kate /'
-    ]
-    
-    if any(pattern in title for pattern in personal_patterns):
-        print(f"  ✅ Doc {doc_id}: Personal meeting pattern: '{doc.get('title', '')}'")
-        return True
-    
-    # Strategy 8: Default behavior - if we can't determine and no user_id, be more restrictive
-    if not user_id:
-        print(f"  ❌ Doc {doc_id}: No user_id and can't determine ownership - excluding for safety")
-        return False
-    
-    # If we get here, include it (shouldn't happen often with user_id check)
-    print(f"  🤷 Doc {doc_id}: Cannot determine ownership, defaulting to include")
-    return True
+    mine, reason = _ownership.classify(doc_id, doc)
+    if detail_enabled():
+        record(log, doc_id, "ownership", "%s %s", "✅" if mine else "❌", reason)
+    return mine
+
+def _trace_ownership(snapshot):
+    """Add every document's ownership verdict to the current request's trace"""
+    for doc_id, doc in snapshot.documents.items():
+        mine, reason = _ownership.classify(doc_id, doc)
+        record(log, doc_id, "ownership", "%s %s", "✅" if mine else "❌", reason)
+
+def get_my_document_ids(snapshot=None):
+    """IDs of my documents in the snapshot, computed once per snapshot version"""
+    snapshot = snapshot or get_snapshot()
+
+    def build(snap):
+        with stage("ownership_filter"):
+            return _ownership.my_document_ids(snap.documents)
+
+    def update(ids, snap, changes):
+        with stage("ownership_filter"):
+            return _ownership.updated_document_ids(ids, snap.documents, changes)
+
+    return snapshot.derived("my_document_ids", build, update)
+
+def _parse_created(doc_id, doc):
+    created = doc.get("created_at") if isinstance(doc, DOCUMENT_TYPES) else None
+    if not created:
+        return None
+    try:
+        return parse_timestamp(created)
+    except ValueError as e:
+        log.warning("  ⚠️ Doc %s: Failed to parse timestamp: %s", doc_id, e)
+        return None
+
+def created_at_utc(snapshot, doc_id, doc):
+    """
+    A document's created_at as an aware UTC datetime (None if missing or
+    unparseable), parsed at most once per document version.
+    """
+    return _created_at_cache.get(snapshot, doc_id, lambda: _parse_created(doc_id, doc))
 
-def get_recent_meetings(limit=10):
-    state = load_cache().get("cache", {}).get("state", {})
-    documents = state.get("documents", {})
+def get_my_time_index(snapshot=None):
+    """
+    Time-ordered index of my documents that have a created_at, built once per
+    snapshot and patched from the changeset when the cache file changes.
+    """
+    snapshot = snapshot or get_snapshot()
+    my_ids = get_my_document_ids(snapshot)
+
+    def include(doc_id, doc):
+        return doc_id in my_ids
+
+    def created_epoch(doc_id, doc):
+        if isinstance(doc, Meeting):
+            return doc.created_epoch
+        dt = created_at_utc(snapshot, doc_id, doc)
+        return dt.timestamp() if dt is not None else None
 
-    print(f"DEBUG: Found {len(documents)} total documents")
+    def build(snap):
+        with stage("time_index"):
+            return TimeIndex.build(snap.documents, created_epoch, include)
 
+    def update(index, snap, changes):
+        with stage("time_index"):
+            return index.updated(snap.documents, changes, created_epoch, include)
+
+    return snapshot.derived("my_time_index", build, update)
+
+def window_key(days_back, snapshot=None):
+    """
+    Something that changes exactly when the set of my documents in the last
+    days_back days changes: the snapshot stays the same, so only the number of
+    documents still inside the moving cutoff can differ. O(log n).
+    """
+    snapshot = snapshot or get_snapshot()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days_back)
+    if isinstance(snapshot, StoreView):
+        return snapshot.store.count_since(cutoff.timestamp())
+    return get_my_time_index(snapshot).count_since(cutoff.timestamp())
+
+def _meeting_items(snapshot, entries, fields):
+    documents = snapshot.documents
     items = []
+    for epoch, doc_id in entries:
+        doc = documents[doc_id]
+        item = {"id": doc_id}
+        if fields is None or "title" in fields:
+            item["title"] = doc.get("title", "")
+        if fields is None or "start_time" in fields:
+            item["start_time"] = created_at_utc(snapshot, doc_id, doc).isoformat()
+        items.append(item)
+    return items
 
-    for i, (doc_id, doc) in enumerate(documents.items()):
-        # Filter out documents that aren't mine
-        if not is_my_document(doc_id, doc, state):
-            continue
-            
-        created = doc.get("created_at")
-        title = doc.get("title", "")
-        print(f"[{i}] ID: {doc_id}")
-        print("  created_at:", created)
-        print("  title:", title)
-
-        if not created:
-            print("  ⛔ Skipping: no timestamp")
-            continue
+def get_recent_meetings(limit=10, snapshot=None, fields=None):
+    fields = normalize_fields(fields, MEETING_FIELDS)
+    snapshot = snapshot or get_snapshot()
+    if isinstance(snapshot, StoreView):
+        return _store_meetings(snapshot.store.newest(("title", "created_at"), limit), fields)
+    index = get_my_time_index(snapshot)
 
-        try:
-            dt = parse_date(created)
-            items.append({
-                "id": doc_id,
-                "title": title,
-                "start_time": dt.isoformat()
-            })
-        except Exception as e:
-            print(f"  ⚠️ Failed to parse timestamp: {e}")
-
-    print(f"✅ Parsed {len(items)} personal documents with timestamps")
-    sorted_items = sorted(items, key=lambda x: x["start_time"], reverse=True)
-    return sorted_items[:limit]
-
-def get_transcript_by_id(meeting_id):
-    state = load_cache().get("cache", {}).get("state", {})
-    transcripts = state.get("transcripts", {})
-    entry = transcripts.get(meeting_id, {})
-    return {"text": entry.get("text", "")}
-
-def get_summary_by_id(meeting_id):
-    state = load_cache().get("cache", {}).get("state", {})
-    documents = state.get("documents", {})
+    log.debug("Found %d total documents, %d personal documents with timestamps", len(snapshot.documents), len(index))
+    if tracing():
+        _trace_ownership(snapshot)
+    return _meeting_items(snapshot, index.newest(limit), fields)
+
+def get_recent_meetings_page(limit=10, cursor=None, snapshot=None, fields=None):
+    """
+    One page of my meetings, newest first. Pass the next_cursor of the previous
+    page to continue; next_cursor is None on the last page. Raises ValueError
+    for a cursor this server didn't hand out.
+    """
+    fields = normalize_fields(fields, MEETING_FIELDS)
+    before = decode_cursor(cursor) if cursor is not None else None
+    snapshot = snapshot or get_snapshot()
+    if isinstance(snapshot, StoreView):
+        rows, next_key = _store_page(snapshot.store, ("title", "created_at"), limit, before=before)
+        meetings = _store_meetings(rows, fields)
+    else:
+        index = get_my_time_index(snapshot)
+        if tracing():
+            _trace_ownership(snapshot)
+        entries, next_key = index.page(limit, before=before)
+        meetings = _meeting_items(snapshot, entries, fields)
+    return {
+        "meetings": meetings,
+        "next_cursor": encode_cursor(next_key) if next_key is not None else None,
+    }
+
+def get_transcript(snapshot, doc_id):
+    """
+    The Transcript for doc_id (None if there isn't one), built once per version
+    of the document; its joined text is cached on it the first time it's needed.
+    """
+    if isinstance(snapshot, StoreView):
+        row = snapshot.store.document(doc_id, ("transcript", "segments"))
+        if row is None or row["segments"] is None:
+            return None
+        return Transcript.from_joined(row["transcript"] or "", json.loads(row["segments"]))
+    if doc_id not in snapshot.transcripts:
+        return None
+    return _transcripts.get(snapshot, doc_id, lambda: Transcript.from_raw(snapshot.transcripts[doc_id]))
+
+def get_transcript_by_id(meeting_id, snapshot=None, start=None, end=None, speaker=None,
+                         offset=0, max_chars=None):
+    """
+    A meeting's transcript text. start/end (ISO timestamps) and speaker (e.g.
+    "microphone" for you, "system" for everyone else) keep only the matching
+    segments, which are then also returned under "segments"; offset/max_chars
+    pick a character range of the resulting text. Only the characters that end up
+    in the response are copied. Raises ValueError for a bad timestamp.
+    """
+    for bound in (start, end):
+        if bound is not None and not isinstance(bound, str):
+            raise ValueError("start/end must be ISO timestamps")
+    start_epoch = parse_timestamp(start).timestamp() if start else None
+    end_epoch = parse_timestamp(end).timestamp() if end else None
+    snapshot = snapshot or get_snapshot()
+    with stage("transcript_join"):
+        transcript = get_transcript(snapshot, meeting_id) or Transcript([])
+
+        filtered = start_epoch is not None or end_epoch is not None or speaker is not None
+        if filtered:
+            indexes = transcript.select(start_epoch, end_epoch, speaker)
+            part = transcript.subset(indexes)
+        else:
+            part = transcript
+        result = {"text": part.chars(offset, max_chars), "offset": offset, "total_chars": len(part)}
+    if filtered:
+        # Just the segments whose text made it into the response
+        result["segments"] = [transcript.segment(indexes[j]) for j in part.overlapping(offset, max_chars)]
+    return result
+
+def get_summary_by_id(meeting_id, snapshot=None):
+    snapshot = snapshot or get_snapshot()
+    if isinstance(snapshot, StoreView):
+        row = snapshot.store.document(meeting_id, ("summary",))
+        return {"text": (row or {}).get("summary") or ""}
+    documents = snapshot.documents
     doc = documents.get(meeting_id, {})
     return {"text": doc.get("summary", {}).get("text", "")}
 
-def extract_text_from_panel_content(content_dict):
-    """Extract plain text from Granola's panel content structure"""
-    if not isinstance(content_dict, dict):
-        return ""
-    
-    text_parts = []
-    
-    def extract_recursive(obj):
-        if isinstance(obj, dict):
-            # Look for text content
-            if 'text' in obj:
-                text_parts.append(str(obj['text']))
-            
-            # Look for marks (formatting) with text
-            if 'marks' in obj and isinstance(obj['marks'], list):
-                for mark in obj['marks']:
-                    if isinstance(mark, dict) and 'attrs' in mark:
-                        attrs = mark['attrs']
-                        if 'text' in attrs:
-                            text_parts.append(str(attrs['text']))
-            
-            # Recursively process content arrays
-            if 'content' in obj and isinstance(obj['content'], list):
-                for item in obj['content']:
-                    extract_recursive(item)
-        elif isinstance(obj, list):
-            for item in obj:
-                extract_recursive(item)
-    
-    extract_recursive(content_dict)
-    
-    # Join with appropriate spacing
-    result = ' '.join(text_parts).strip()
-    
-    # Clean up extra whitespace
-    import re
-    result = re.sub(r'\s+', ' ', result)
-    
-    return result
+def extract_text_from_panel_content(content_dict, markdown=False):
+    """Extract plain text (or Markdown) from Granola's panel content structure"""
+    return extract_text(content_dict, markdown=markdown)
+
+def _timed_panel_text(content, markdown):
+    with stage("panel_extraction"):
+        return extract_text_from_panel_content(content, markdown=markdown)
 
-def extract_ai_content_from_panels(doc_id, document_panels):
-    """Extract AI-generated content from document panels"""
+def extract_ai_content_from_panels(doc_id, document_panels, markdown=False):
+    """
+    Extract AI-generated content from document panels. Each panel's text is
+    extracted once per (doc_id, panel_id, updated_at) and reused after that.
+    """
     if doc_id not in document_panels:
         return ""
     
@@ -251,8 +369,11 @@ def extract_ai_content_from_panels(doc_id, document_panels):
         
         if 'summary' in template_slug.lower() or 'summary' in title.lower():
             content = panel_data.get('content', {})
-            if isinstance(content, dict):
-                extracted_text = extract_text_from_panel_content(content)
+            if isinstance(content, (dict, PackedTree)):
+                extracted_text = _panel_text_cache.get(
+                    doc_id, (panel_id, markdown), panel_data.get('updated_at'),
+                    lambda: _timed_panel_text(unpack(content), markdown),
+                )
                 if extracted_text.strip():
                     return extracted_text
     
@@ -262,25 +383,27 @@ def extract_enhanced_notes(doc_id, doc, document_panels):
     """
     Extract enhanced notes combining manual notes AND AI-generated panel content
     """
-    if not isinstance(doc, dict):
-        print(f"  🔍 Doc {doc_id}: not a dict, type is {type(doc)}")
-        return ""
-    
-    combined_content = []
+    return _extract_enhanced_notes(doc_id, doc, document_panels)[0]
+
+def _extract_enhanced_notes(doc_id, doc, document_panels):
+    """extract_enhanced_notes, but returns (notes, description of where they came from)"""
+    if not isinstance(doc, DOCUMENT_TYPES):
+        return "", f"not a dict, type is {type(doc)}"
     
     # Strategy 1: Get manual notes first
     manual_notes = ""
+    manual_source = ""
     if 'notes_markdown' in doc:
         value = doc['notes_markdown']
         if isinstance(value, str) and value.strip():
             manual_notes = value.strip()
-            print(f"  ✅ Doc {doc_id}: Found manual notes_markdown (length: {len(manual_notes)})")
+            manual_source = "notes_markdown"
     
     if not manual_notes and 'notes_plain' in doc:
         value = doc['notes_plain']
         if isinstance(value, str) and value.strip():
             manual_notes = value.strip()
-            print(f"  ✅ Doc {doc_id}: Found manual notes_plain (length: {len(manual_notes)})")
+            manual_source = "notes_plain"
     
     # Strategy 2: Get AI-generated panel content
     ai_content = extract_ai_content_from_panels(doc_id, document_panels)
@@ -294,18 +417,15 @@ def extract_enhanced_notes(doc_id, doc, document_panels):
 
 ## AI-Generated Summary
 {ai_content}"""
-        print(f"  ✅ Doc {doc_id}: Combined manual notes + AI content (total length: {len(combined_content)})")
-        return combined_content
+        return combined_content, f"Combined manual {manual_source} + AI content"
     
     elif manual_notes:
         # Only manual notes exist
-        print(f"  ✅ Doc {doc_id}: Using manual notes only (length: {len(manual_notes)})")
-        return manual_notes
+        return manual_notes, f"Using manual {manual_source} only"
     
     elif ai_content:
         # Only AI content exists
-        print(f"  ✅ Doc {doc_id}: Using AI-generated content only (length: {len(ai_content)})")
-        return ai_content
+        return ai_content, "Using AI-generated content only"
     
     # Strategy 4: Try to extract from the 'notes' dict structure as last resort
     if 'notes' in doc:
@@ -313,8 +433,7 @@ def extract_enhanced_notes(doc_id, doc, document_panels):
         if isinstance(notes, dict):
             extracted_text = extract_text_from_notes_structure(notes)
             if extracted_text.strip():
-                print(f"  ✅ Doc {doc_id}: Extracted from notes structure (length: {len(extracted_text)})")
-                return extracted_text
+                return extracted_text, "Extracted from notes structure"
     
     # Strategy 5: Check summary as final fallback
     if 'summary' in doc:
@@ -324,174 +443,511 @@ def extract_enhanced_notes(doc_id, doc, document_panels):
             if isinstance(summary_text, str):
                 cleaned_value = summary_text.strip()
                 if cleaned_value:
-                    print(f"  ✅ Doc {doc_id}: Using summary.text (length: {len(cleaned_value)})")
-                    return cleaned_value
+                    return cleaned_value, "Using summary.text"
         elif isinstance(summary, str):
             cleaned_value = summary.strip()
             if cleaned_value:
-                print(f"  ✅ Doc {doc_id}: Using summary as string (length: {len(cleaned_value)})")
-                return cleaned_value
+                return cleaned_value, "Using summary as string"
     
-    print(f"  ⚠️ Doc {doc_id}: No enhanced notes or AI content found")
-    return ""
+    return "", "No enhanced notes or AI content found"
 
 def extract_text_from_notes_structure(notes_dict):
     """
     Extract plain text from Granola's rich text notes structure
     """
-    if not isinstance(notes_dict, dict):
-        return ""
+    return extract_text(notes_dict, mark_text=False, collapse=False)
+
+def join_transcript(transcript_data, max_chars=None):
+    """
+    Join a transcript entry into one string - entries are usually lists of segments.
+    With max_chars, only the segments needed for that many characters are joined.
+    """
+    return Transcript.from_raw(transcript_data).chars(0, max_chars)
+
+# Fields of a get_last_7_days_content document record, and of a get_recent_meetings item
+CONTENT_FIELDS = ("id", "title", "created_at", "enhanced_notes", "transcript", "duration", "participants")
+MEETING_FIELDS = ("id", "title", "start_time")
+# Page size for the day-window methods when only a cursor is given
+DEFAULT_PAGE_SIZE = 50
+
+def normalize_fields(fields, allowed):
+    """
+    Turn a fields parameter (list or comma-separated string, None = everything)
+    into a set of field names. "id" is always included. Raises ValueError on
+    unknown names.
+    """
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = [f for f in (part.strip() for part in fields.split(",")) if f]
+    if not isinstance(fields, (list, tuple, set, frozenset)):
+        raise ValueError("fields must be a list or a comma-separated string")
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(map(str, unknown))} (allowed: {', '.join(allowed)})")
+    return frozenset(fields) | {"id"}
+
+def _document_content(snapshot, doc_id, detail=False, fields=None,
+                      max_transcript_chars=None, max_notes_chars=None):
+    """
+    Build the content record for one document in the window. Only the fields
+    asked for are computed: leaving out "transcript" skips joining segments and
+    leaving out "enhanced_notes" skips walking the panels.
+    """
+    doc = snapshot.documents[doc_id]
+    transcripts = snapshot.transcripts
+    document_panels = snapshot.document_panels
+    wanted = (lambda name: True) if fields is None else fields.__contains__
+    content = {"id": str(doc_id)}
+    
+    if wanted("title"):
+        content["title"] = str(doc.get("title", "Untitled") if isinstance(doc, DOCUMENT_TYPES) else "Untitled")
+    
+    if wanted("created_at"):
+        # Timezone-naive UTC like the cutoff (documents in a window always have one;
+        # the change feed can include some that don't)
+        created_dt = created_at_utc(snapshot, doc_id, doc)
+        content["created_at"] = created_dt.replace(tzinfo=None).isoformat() if created_dt is not None else None
+    
+    if wanted("enhanced_notes"):
+        # Get enhanced notes OR AI-generated content (NEW LOGIC)
+        enhanced_notes, notes_source = _enhanced_notes_cache.get(
+            snapshot, doc_id, lambda: _extract_enhanced_notes(doc_id, doc, document_panels)
+        )
+        # Ensure enhanced_notes is a string (defensive programming)
+        if not isinstance(enhanced_notes, str):
+            enhanced_notes = str(enhanced_notes) if enhanced_notes is not None else ""
+        if max_notes_chars is not None:
+            enhanced_notes = enhanced_notes[:max_notes_chars]
+        # Now includes AI panel content as fallback
+        content["enhanced_notes"] = enhanced_notes
+        if detail:
+            record(log, doc_id, "notes", "%s %s (length: %d)",
+                   "✅" if enhanced_notes else "⚠️", notes_source, len(enhanced_notes))
+    
+    if wanted("transcript"):
+        # Get transcript text - transcripts are lists
+        transcript_text = ""
+        if doc_id in transcripts:
+            with stage("transcript_join"):
+                transcript = get_transcript(snapshot, doc_id)
+                # Joined once per transcript version; with a limit, only the characters
+                # that will be returned are copied
+                transcript_text = transcript.text() if max_transcript_chars is None \
+                    else transcript.chars(0, max_transcript_chars)
+        content["transcript"] = str(transcript_text)
+        if detail:
+            if doc_id in transcripts:
+                record(log, doc_id, "transcript", "✅ Transcript length: %d", len(transcript_text))
+            else:
+                record(log, doc_id, "transcript", "⚠️ No transcript found")
+    
+    if wanted("duration"):
+        duration = doc.get("duration", 0) if isinstance(doc, DOCUMENT_TYPES) else 0
+        content["duration"] = int(duration) if isinstance(duration, (int, float)) else 0
+    
+    if wanted("participants"):
+        participants = doc.get("people", []) if isinstance(doc, DOCUMENT_TYPES) else []
+        # Ensure participants is a list
+        if not isinstance(participants, list):
+            participants = []
+        content["participants"] = [str(p) for p in participants if p]
+    
+    return content
+
+def open_window(days_back=7, snapshot=None, fields=None,
+                max_transcript_chars=None, max_notes_chars=None, page_size=None, cursor=None):
+    """
+    Start reading the last N days: returns (header, documents) where header has
+    the period/cutoff/filter counts and documents lazily yields one content
+    record at a time, newest first. Nothing is extracted until it is iterated,
+    so callers can stream the window without holding all of it in memory.
+    fields / max_*_chars / page_size / cursor are as for get_last_7_days_content.
+    """
+    fields = normalize_fields(fields, CONTENT_FIELDS)
+    paged = page_size is not None or cursor is not None
+    before = decode_cursor(cursor) if cursor is not None else None
+    snapshot = snapshot or get_snapshot()
+    if isinstance(snapshot, StoreView):
+        return _store_window(snapshot.store, days_back, fields, max_transcript_chars, max_notes_chars,
+                             paged, page_size, before)
     
-    text_parts = []
+    log.debug("🔍 Cache has %d documents, %d transcripts, %d document panels",
+              len(snapshot.documents), len(snapshot.transcripts), len(snapshot.document_panels))
     
-    def extract_recursive(obj):
-        if isinstance(obj, dict):
-            # Look for text content
-            if 'text' in obj:
-                text_parts.append(str(obj['text']))
-            
-            # Recursively process content arrays
-            if 'content' in obj and isinstance(obj['content'], list):
-                for item in obj['content']:
-                    extract_recursive(item)
-        elif isinstance(obj, list):
-            for item in obj:
-                extract_recursive(item)
+    # Calculate cutoff date - make it timezone-naive
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days_back)
+    index = get_my_time_index(snapshot)
+    cutoff_epoch = cutoff.timestamp()
+    cutoff = cutoff.replace(tzinfo=None)
+    if tracing():
+        _trace_ownership(snapshot)
     
-    extract_recursive(notes_dict)
-    return ' '.join(text_parts)
+    header = {
+        "period": f"Last {days_back} days",
+        "cutoff_date": cutoff.isoformat(),
+        # Documents that aren't mine never make it into the index
+        "filtered_documents": len(index.excluded),
+    }
+    if paged:
+        entries, next_key = index.page(page_size or DEFAULT_PAGE_SIZE, start=cutoff_epoch, before=before)
+        header["window_documents"] = index.count_since(cutoff_epoch)
+        header["next_cursor"] = encode_cursor(next_key) if next_key is not None else None
+    else:
+        entries = index.since(cutoff_epoch)
+    
+    def documents():
+        # Checked once per request so the per-document loop is free when nobody is listening
+        detail = detail_enabled()
+        # Newest first, and only the documents inside the window
+        for _, doc_id in entries:
+            try:
+                yield _document_content(snapshot, doc_id, detail, fields,
+                                        max_transcript_chars, max_notes_chars)
+            except Exception as e:
+                log.exception("⚠️ Failed to process document %s: %s", doc_id, e)
+    
+    return header, documents()
 
-def get_last_7_days_content(days_back=7):
+def get_last_7_days_content(days_back=7, snapshot=None, fields=None,
+                            max_transcript_chars=None, max_notes_chars=None, page_size=None, cursor=None):
     """
     Get all documents from the last N days with their full content (transcript + summary).
     Now includes AI-generated content from panels as fallback.
     Returns a structured format that's AI-friendly for summarization.
     UPDATED: Now filters to only include personal documents.
+    Pass snapshot to read a specific cache version (e.g. for a JSON-RPC batch).
+    fields limits each document to those keys (and skips computing the rest);
+    max_transcript_chars / max_notes_chars truncate those fields at the source.
+    With page_size and/or cursor the window is returned a page at a time: the
+    result also has window_documents (the whole window) and next_cursor.
     """
-    cache_data = load_cache()
-    state = cache_data.get("cache", {}).get("state", {})
-    documents = state.get("documents", {})
-    transcripts = state.get("transcripts", {})
-    document_panels = state.get("documentPanels", {})  # NEW: Get panels
-    
-    print(f"🔍 Total documents in cache: {len(documents)}")
-    print(f"🔍 Total transcripts in cache: {len(transcripts)}")
-    print(f"🔍 Total document panels in cache: {len(document_panels)}")
-    
-    # Calculate cutoff date - make it timezone-naive
-    cutoff = datetime.now(timezone.utc) - timedelta(days=days_back)
+    header, documents = open_window(days_back, snapshot, fields, max_transcript_chars, max_notes_chars,
+                                    page_size, cursor)
+    # Already most recent first - the index is walked newest to oldest
+    recent_docs = list(documents)
     
-    recent_docs = []
-    filtered_count = 0
+    log.info("✅ Returning %d personal documents from last %d days (%d non-personal filtered out)",
+             len(recent_docs), days_back, header["filtered_documents"])
     
-    for doc_id, doc in documents.items():
-        # FILTER: Only include documents that belong to me
-        if not is_my_document(doc_id, doc, state):
-            filtered_count += 1
-            continue
-            
-        created = doc.get("created_at")
-        if not created:
-            continue
-            
-        try:
-            created_dt = parse_date(created)
-            
-            # Convert both datetimes to timezone-naive for comparison
-            if created_dt.tzinfo is not None:
-                created_dt = created_dt.astimezone(timezone.utc).replace(tzinfo=None)
-            if cutoff.tzinfo is not None:
-                cutoff = cutoff.replace(tzinfo=None)
-            
-            if created_dt > cutoff:
-                print(f"\n📄 Processing recent personal document: {doc_id}")
-                
-                # Get transcript text - transcripts are lists
-                transcript_text = ""
-                if doc_id in transcripts:
-                    transcript_data = transcripts[doc_id]
-                    print(f"  🔍 Transcript type: {type(transcript_data)}")
-                    
-                    if isinstance(transcript_data, list):
-                        # Join transcript segments - each might be a dict or string
-                        transcript_parts = []
-                        for segment in transcript_data:
-                            if isinstance(segment, dict):
-                                # Look for common transcript fields
-                                text = segment.get("text", "") or segment.get("content", "") or segment.get("transcript", "")
-                                if text:
-                                    transcript_parts.append(str(text))
-                            elif isinstance(segment, str):
-                                transcript_parts.append(segment)
-                        transcript_text = " ".join(transcript_parts)
-                    elif isinstance(transcript_data, str):
-                        transcript_text = transcript_data
-                    elif isinstance(transcript_data, dict):
-                        # Sometimes transcript might be a dict with a text field
-                        transcript_text = str(transcript_data.get("text", ""))
-                    
-                    print(f"  ✅ Transcript length: {len(transcript_text)}")
-                else:
-                    print(f"  ⚠️ No transcript found for {doc_id}")
-                
-                # Get enhanced notes OR AI-generated content (NEW LOGIC)
-                enhanced_notes = extract_enhanced_notes(doc_id, doc, document_panels)
-                
-                # Ensure enhanced_notes is a string (defensive programming)
-                if not isinstance(enhanced_notes, str):
-                    enhanced_notes = str(enhanced_notes) if enhanced_notes is not None else ""
-                
-                # Safe field extraction with type checking
-                title = doc.get("title", "Untitled") if isinstance(doc, dict) else "Untitled"
-                duration = doc.get("duration", 0) if isinstance(doc, dict) else 0
-                participants = doc.get("people", []) if isinstance(doc, dict) else []
-                
-                # Ensure participants is a list
-                if not isinstance(participants, list):
-                    participants = []
-                
-                # Ensure all string fields are properly converted to strings
-                doc_content = {
-                    "id": str(doc_id),
-                    "title": str(title),
-                    "created_at": created_dt.isoformat(),
-                    "enhanced_notes": enhanced_notes,  # Now includes AI panel content as fallback
-                    "transcript": str(transcript_text),
-                    "duration": int(duration) if isinstance(duration, (int, float)) else 0,
-                    "participants": [str(p) for p in participants if p]
-                }
-                
-                print(f"  📋 Enhanced notes length: {len(enhanced_notes)}")
-                print(f"  📋 Transcript length: {len(transcript_text)}")
-                
-                # Double-check that enhanced_notes is not empty before adding
-                if enhanced_notes:
-                    print(f"  ✅ Enhanced notes preview: {enhanced_notes[:100]}...")
-                else:
-                    print(f"  ⚠️ Enhanced notes is empty for {doc_id}")
-                
-                recent_docs.append(doc_content)
-                
-        except Exception as e:
-            print(f"⚠️ Failed to process document {doc_id}: {e}")
-            import traceback
-            traceback.print_exc()
-            continue
-    
-    # Sort by creation date (most recent first)
-    recent_docs.sort(key=lambda x: x["created_at"], reverse=True)
-    
-    print(f"\n✅ Filtered out {filtered_count} non-personal documents")
-    print(f"✅ Returning {len(recent_docs)} personal documents from last {days_back} days")
-    
-    # Final validation - check what we're actually returning
-    for doc in recent_docs:
-        print(f"Final check - {doc['id']}: enhanced_notes length = {len(doc['enhanced_notes'])}")
-    
-    return {
-        "period": f"Last {days_back} days",
-        "cutoff_date": cutoff.isoformat(),
+    result = {
+        "period": header["period"],
+        "cutoff_date": header["cutoff_date"],
         "total_documents": len(recent_docs),
-        "filtered_documents": filtered_count,
+        "filtered_documents": header["filtered_documents"],
         "documents": recent_docs
-    }
\ No newline at end of file
+    }
+    if "next_cursor" in header:
+        result["window_documents"] = header["window_documents"]
+        result["next_cursor"] = header["next_cursor"]
+    return result
+
+# Which documents search_meetings looks at
+SEARCH_SCOPES = ("mine", "others", "all")
+
+def _search_fields(snapshot, doc_id):
+    """The text search_meetings indexes for one document"""
+    doc = snapshot.documents.get(doc_id)
+    if not isinstance(doc, DOCUMENT_TYPES):
+        return {}
+    notes = doc.get("notes_markdown")
+    if not (isinstance(notes, str) and notes.strip()):
+        notes = doc.get("notes_plain")
+    transcript = ""
+    if doc_id in snapshot.transcripts:
+        transcript = get_transcript(snapshot, doc_id).text()
+    return {
+        "title": str(doc.get("title") or ""),
+        "notes": notes if isinstance(notes, str) else "",
+        "panels": extract_ai_content_from_panels(doc_id, snapshot.document_panels),
+        "transcript": transcript,
+    }
+
+def get_search_index(snapshot=None):
+    """
+    Full-text index over every document in the snapshot, built on first use and
+    patched from the changeset (only changed documents are re-tokenized) on reload.
+    """
+    snapshot = snapshot or get_snapshot()
+
+    def build(snap):
+        log.info("🔎 Building search index over %d documents", len(snap.documents))
+        with stage("search_index"):
+            return SearchIndex.build(snap.documents, lambda doc_id: _search_fields(snap, doc_id))
+
+    def update(index, snap, changes):
+        with stage("search_index"):
+            return index.updated(changes, snap.documents, lambda doc_id: _search_fields(snap, doc_id))
+
+    return snapshot.derived("search_index", build, update)
+
+def warm_up(snapshot=None):
+    """
+    Build what the day-window reads on this snapshot need - ownership verdicts
+    and the time index - before the first one asks. (The search index is left
+    to the first search: building it holds the GIL for seconds on a big cache.)
+    A StoreView already has all of it on disk.
+    """
+    snapshot = snapshot or get_snapshot()
+    if not isinstance(snapshot, StoreView):
+        get_my_time_index(snapshot)
+
+def search_meetings(query, limit=10, since=None, until=None, scope="mine", snapshot=None):
+    """
+    Rank meetings against query (BM25 over title, notes, AI panels and transcript).
+    since/until are ISO timestamps bounding created_at; scope is "mine" (the
+    default, like the other read methods), "others" or "all". Raises ValueError
+    for a bad scope or timestamp.
+    """
+    if not isinstance(query, str):
+        raise ValueError("query must be a string")
+    if scope not in SEARCH_SCOPES:
+        raise ValueError(f"scope must be one of: {', '.join(SEARCH_SCOPES)}")
+    for bound in (since, until):
+        if bound is not None and not isinstance(bound, str):
+            raise ValueError("since/until must be ISO timestamps")
+    since_epoch = parse_timestamp(since).timestamp() if since else None
+    until_epoch = parse_timestamp(until).timestamp() if until else None
+    snapshot = snapshot or get_snapshot()
+    terms = sorted(set(tokenize(query)))
+    if isinstance(snapshot, StoreView):
+        total, rows = snapshot.store.search(query, limit, since_epoch, until_epoch, scope)
+        results = []
+        for row in rows:
+            field, snippet = make_snippet(
+                {"title": row["title"] or "", "notes": row["notes"], "panels": row["panels"],
+                 "transcript": row["transcript"]}, terms)
+            results.append({
+                "id": row["id"],
+                "title": str(row["title"] or "Untitled"),
+                "created_at": row["created_at"],
+                "score": round(row["score"], 4),
+                "snippet": snippet,
+                "snippet_field": field,
+            })
+        log.info("🔎 Search %r matched %d documents", query, total)
+        return {"query": query, "total_matches": total, "results": results}
+    documents = snapshot.documents
+    index = get_search_index(snapshot)
+    my_ids = get_my_document_ids(snapshot) if scope != "all" else None
+
+    def accept(doc_id):
+        if my_ids is not None and (doc_id in my_ids) != (scope == "mine"):
+            return False
+        if since_epoch is None and until_epoch is None:
+            return True
+        created = created_at_utc(snapshot, doc_id, documents[doc_id])
+        if created is None:
+            return False
+        epoch = created.timestamp()
+        return (since_epoch is None or epoch >= since_epoch) and (until_epoch is None or epoch <= until_epoch)
+
+    total, ranked = index.search(query, limit, accept)
+    results = []
+    for score, doc_id in ranked:
+        doc = documents[doc_id]
+        created = created_at_utc(snapshot, doc_id, doc)
+        field, snippet = make_snippet(_search_fields(snapshot, doc_id), terms)
+        results.append({
+            "id": doc_id,
+            "title": str(doc.get("title") or "Untitled"),
+            "created_at": created.isoformat() if created is not None else None,
+            "score": round(score, 4),
+            "snippet": snippet,
+            "snippet_field": field,
+        })
+    log.info("🔎 Search %r matched %d documents", query, total)
+    return {"query": query, "total_matches": total, "results": results}
+
+def get_changes_since(cursor=None, snapshot=None, fields=None, max_transcript_chars=None, max_notes_chars=None):
+    """
+    My documents added, modified or deleted since cursor, read from the change
+    log kept as the cache file reloads, so a poll costs O(changes) rather than
+    O(window). Returns the added/modified content records (fields /
+    max_*_chars as for get_last_7_days_content), the deleted IDs and a new
+    cursor to pass next time. reset is true when cursor is None or can no
+    longer be followed (the server restarted, or it is older than the log
+    goes back): re-read what you need, e.g. with get_last_7_days_content, and
+    carry on from the new cursor. A document may be reported again by the
+    following call. Raises ValueError for a cursor this server didn't hand out.
+    """
+    fields = normalize_fields(fields, CONTENT_FIELDS)
+    log_id, position = decode_change_cursor(cursor) if cursor is not None else (None, None)
+    snapshot = snapshot or get_snapshot()
+    if _store is None or isinstance(snapshot, StoreView):
+        return _changes_since(snapshot.store if _store is not None else None, snapshot, log_id, position,
+                              fields, max_transcript_chars, max_notes_chars)
+    # A snapshot from before the store was published: read the log through a reader of our own
+    reader = _store.reader()
+    try:
+        return _changes_since(reader, snapshot, log_id, position, fields, max_transcript_chars, max_notes_chars)
+    finally:
+        reader.close()
+
+def _changes_since(reader, snapshot, log_id, position, fields, max_transcript_chars, max_notes_chars):
+    """get_changes_since, reading the log and documents from reader (None without the store)"""
+    if reader is not None:
+        current_id, last, changed = reader.changes_since(log_id, position)
+    else:
+        current_id = _change_log.id
+        last, changed = _change_log.since(position if log_id == current_id else None, snapshot.version)
+    result = {
+        "cursor": encode_change_cursor(current_id, last) if last is not None else None,
+        "reset": changed is None,
+        "added": [],
+        "modified": [],
+        "deleted": [],
+    }
+    if not changed:
+        return result
+
+    if reader is not None:
+        wanted, columns = _store_columns(fields, max_transcript_chars, max_notes_chars)
+        current = {row["id"]: row for row in reader.documents(changed, columns + ["mine"]) if row["mine"]}
+        content_of = lambda doc_id: _store_content(current[doc_id], wanted)
+    else:
+        my_ids = get_my_document_ids(snapshot)
+        current = {doc_id for doc_id in changed if doc_id in my_ids and doc_id in snapshot.documents}
+        detail = detail_enabled()
+        content_of = lambda doc_id: _document_content(snapshot, doc_id, detail, fields,
+                                                      max_transcript_chars, max_notes_chars)
+    for doc_id in sorted(changed):
+        was_mine = changed[doc_id]
+        if doc_id in current:
+            result["modified" if was_mine else "added"].append(content_of(doc_id))
+        elif was_mine:
+            result["deleted"].append(doc_id)
+    log.info("🔄 Changes since cursor: %d added, %d modified, %d deleted",
+             len(result["added"]), len(result["modified"]), len(result["deleted"]))
+    return result
+
+# ---- Derived store (optional, see derived_store.py) ----
+
+def _store_record(snapshot, doc_id, my_ids):
+    """Column values the store keeps for one document"""
+    doc = snapshot.documents[doc_id]
+    if not isinstance(doc, DOCUMENT_TYPES):
+        doc = {}
+    created = created_at_utc(snapshot, doc_id, doc)
+    text = _search_fields(snapshot, doc_id)
+    content = _document_content(snapshot, doc_id, fields=frozenset(("id", "enhanced_notes", "duration", "participants")))
+    transcript = get_transcript(snapshot, doc_id)
+    summary = doc.get("summary")
+    title = doc.get("title")
+    return {
+        "mine": 1 if doc_id in my_ids else 0,
+        "created_epoch": created.timestamp() if created is not None else None,
+        "created_at": created.isoformat() if created is not None else None,
+        "search_length": weighted_length(text),
+        "title": str(title) if title is not None else None,
+        "notes": text.get("notes", ""),
+        "panels": text.get("panels", ""),
+        "transcript": text.get("transcript", ""),
+        "segments": json.dumps(transcript.segment_rows()) if transcript is not None else None,
+        "enhanced_notes": content["enhanced_notes"],
+        "summary": str(summary.get("text", "")) if isinstance(summary, dict) else "",
+        "duration": content["duration"],
+        "participants": json.dumps(content["participants"]),
+    }
+
+def _sync_store(snapshot, changes):
+    """
+    Reload listener: write changed documents to the store. Reads are served
+    from the store from now on, but the snapshot stays current so the next
+    reload reuses its records (and the per-document caches keep what didn't
+    change) instead of rebuilding everything from the file.
+    """
+    my_ids = get_my_document_ids(snapshot)
+    # A changed document's panels may be edited without a new updated_at; extract them again
+    _panel_text_cache.forget(changes.touched)
+    _store.sync(snapshot, lambda doc_id: _store_record(snapshot, doc_id, my_ids), _store_fingerprint)
+
+def _claim_publisher():
+    """True if this process publishes the store; it then keeps it in sync from now on"""
+    if not _store.claim_publisher():
+        return False
+    _store.publish_continuously(lambda: not _store.is_current(CACHE_PATH, _store_fingerprint),
+                                lambda: _snapshots.get(CACHE_PATH, wait=True))
+    return True
+
+def _log_changes(snapshot, changes):
+    """Reload listener: note which of my documents this version added, changed or removed"""
+    _change_log.record(snapshot.version, changes, get_my_document_ids(snapshot))
+
+if _store is not None:
+    _snapshots.on_reload(_sync_store)
+else:
+    _snapshots.on_reload(_log_changes)
+
+def _store_page(store, columns, limit, start=None, before=None):
+    """Like TimeIndex.page, over store rows: (rows, next (epoch, id) key or None)"""
+    if limit < 1:
+        raise ValueError("page size must be at least 1")
+    rows = list(store.newest(columns, limit + 1, start=start, before=before))
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        return rows[:limit], (last["created_epoch"], last["id"])
+    return rows, None
+
+def _store_meetings(rows, fields):
+    items = []
+    for row in rows:
+        item = {"id": row["id"]}
+        if fields is None or "title" in fields:
+            item["title"] = row["title"] if row["title"] is not None else ""
+        if fields is None or "start_time" in fields:
+            item["start_time"] = row["created_at"]
+        items.append(item)
+    return items
+
+def _store_window(store, days_back, fields, max_transcript_chars, max_notes_chars, paged, page_size, before):
+    """open_window against the store: same header and records, read with one query per batch"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days_back)
+    cutoff_epoch = cutoff.timestamp()
+    header = {
+        "period": f"Last {days_back} days",
+        "cutoff_date": cutoff.replace(tzinfo=None).isoformat(),
+        "filtered_documents": store.excluded_count(),
+    }
+    wanted, columns = _store_columns(fields, max_transcript_chars, max_notes_chars)
+    if paged:
+        rows, next_key = _store_page(store, columns, page_size or DEFAULT_PAGE_SIZE, start=cutoff_epoch, before=before)
+        header["window_documents"] = store.count_since(cutoff_epoch)
+        header["next_cursor"] = encode_cursor(next_key) if next_key is not None else None
+    else:
+        rows = store.newest(columns, None, start=cutoff_epoch)
+
+    def documents():
+        for row in rows:
+            yield _store_content(row, wanted)
+
+    return header, documents()
+
+def _store_columns(fields, max_transcript_chars, max_notes_chars):
+    """(content field names, SELECT expressions for them) for reading content records from the store"""
+    wanted = [name for name in CONTENT_FIELDS if name != "id" and (fields is None or name in fields)]
+    # Truncation happens in SQL, so long transcripts are never read in full
+    limits = {"transcript": max_transcript_chars, "enhanced_notes": max_notes_chars}
+    columns = [
+        f"substr({name}, 1, {int(limits[name])}) AS {name}" if limits.get(name) is not None else name
+        for name in wanted
+    ]
+    return wanted, columns
+
+def _store_content(row, wanted):
+    """The content record for a store row, shaped like _document_content's"""
+    content = {"id": row["id"]}
+    for name in wanted:
+        value = row[name]
+        if name == "title":
+            value = str(value) if value is not None else "Untitled"
+        elif name == "created_at":
+            value = naive_iso(value)
+        elif name == "participants":
+            value = json.loads(value) if value else []
+        elif name == "duration":
+            value = value or 0
+        else:
+            value = value or ""
+        content[name] = value
+    return content
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test for the FastAPI app.
+
+Mixes /jsonrpc methods, /zapier-simple GET/POST and /health at a fixed
+concurrency and reports latency percentiles, throughput and error rate per
+route. A separate probe hits /health at a steady rate the whole time, so you
+can see whether it stays fast while heavy requests are running.
+
+    python load_test.py                                  # in-process, synthetic 2000-meeting cache
+    python load_test.py --spawn --concurrency 32         # against a localhost uvicorn it starts
+    python load_test.py --url http://127.0.0.1:11434     # against a server that's already running
+
+Exits with status 1 if the /health probe's p99 goes over --health-slo-ms or
+any request fails.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+
+
+def _jsonrpc(method, params):
+    return "POST", "/jsonrpc", {"jsonrpc": "2.0", "id": random.randint(1, 1 << 30), "method": method, "params": params}
+
+
+SEARCH_TERMS = ["pricing", "roadmap", "subscription", "onboarding", "hiring", "discovery call", "retention"]
+
+# route -> (weight, request factory returning (method, path, json body or None))
+MIX = {
+    "jsonrpc:get_recent_meetings": (20, lambda ids: _jsonrpc("get_recent_meetings", {"limit": 10})),
+    # Varying days_back means some calls miss the response cache and do real work
+    "jsonrpc:get_last_7_days_content": (15, lambda ids: _jsonrpc(
+        "get_last_7_days_content", {"days_back": random.choice([7, 7, 7, 14, 30, random.randint(1, 90)])})),
+    "jsonrpc:get_transcript": (10, lambda ids: _jsonrpc(
+        "get_transcript", {"meeting_id": random.choice(ids) if ids else "missing", "max_chars": 2000})),
+    "jsonrpc:search_meetings": (10, lambda ids: _jsonrpc(
+        "search_meetings", {"query": random.choice(SEARCH_TERMS), "scope": "all"})),
+    # Incremental consumers polling with no changes to report
+    "jsonrpc:get_changes_since": (5, lambda ids: _jsonrpc("get_changes_since", {"fields": ["title"]})),
+    "GET /zapier-simple": (20, lambda ids: ("GET", "/zapier-simple", None)),
+    "POST /zapier-simple": (10, lambda ids: ("POST", "/zapier-simple", None)),
+    "GET /health": (15, lambda ids: ("GET", "/health", None)),
+}
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    index = min(int(round(q * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def _is_error(response):
+    if response.status_code >= 400:
+        return True
+    if response.headers.get("content-type", "").startswith("application/json") and response.content:
+        try:
+            body = response.json()
+        except ValueError:
+            return True
+        if isinstance(body, dict) and ("error" in body or body.get("status") == "error"):
+            return True
+    return False
+
+
+async def _worker(client, deadline, ids, samples, errors):
+    routes = list(MIX)
+    weights = [MIX[route][0] for route in routes]
+    while time.perf_counter() < deadline:
+        route = random.choices(routes, weights)[0]
+        method, path, body = MIX[route][1](ids)
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body)
+            failed = _is_error(response)
+        except Exception as e:
+            failed = True
+            errors[route].append(repr(e))
+        samples[route].append((time.perf_counter() - start, failed))
+
+
+async def _health_probe(client, deadline, interval, samples):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get("/health")
+            failed = response.status_code != 200
+        except Exception:
+            failed = True
+        elapsed = time.perf_counter() - start
+        samples.append((elapsed, failed))
+        await asyncio.sleep(max(interval - elapsed, 0))
+
+
+async def _meeting_ids(client):
+    """Real meeting IDs for get_transcript calls"""
+    response = await client.post("/jsonrpc", json={
+        "jsonrpc": "2.0", "id": 0, "method": "get_recent_meetings", "params": {"limit": 200}})
+    return [m["id"] for m in response.json().get("result", [])]
+
+
+async def _run(client, args):
+    # Warm-up: the first request pays for the cold parse, which isn't what we're measuring
+    start = time.perf_counter()
+    ids = await _meeting_ids(client)
+    print(f"🔥 Warm-up (cold load) took {(time.perf_counter() - start) * 1000:.0f}ms, {len(ids)} meetings")
+
+    samples = defaultdict(list)
+    errors = defaultdict(list)
+    probe = []
+    deadline = time.perf_counter() + args.duration
+    started = time.perf_counter()
+    await asyncio.gather(
+        _health_probe(client, deadline, args.health_interval_ms / 1000, probe),
+        *(_worker(client, deadline, ids, samples, errors) for _ in range(args.concurrency)),
+    )
+    return samples, errors, probe, time.perf_counter() - started
+
+
+def _report(samples, errors, probe, elapsed, args):
+    print(f"\n{'route':<36} {'reqs':>6} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7}")
+    total = failures = 0
+    for route in sorted(samples):
+        latencies = sorted(latency for latency, _ in samples[route])
+        failed = sum(1 for _, f in samples[route] if f)
+        total += len(latencies)
+        failures += failed
+        print(f"{route:<36} {len(latencies):>6} {len(latencies) / elapsed:>7.1f} "
+              f"{_percentile(latencies, 0.50) * 1000:>6.1f}ms {_percentile(latencies, 0.95) * 1000:>6.1f}ms "
+              f"{_percentile(latencies, 0.99) * 1000:>6.1f}ms {failed / len(latencies) * 100:>6.1f}%")
+    print(f"{'total':<36} {total:>6} {total / elapsed:>7.1f}")
+    for route, messages in errors.items():
+        print(f"  ❌ {route}: {len(messages)} exceptions, e.g. {messages[0]}")
+
+    latencies = sorted(latency for latency, _ in probe)
+    probe_p99 = _percentile(latencies, 0.99) * 1000
+    print(f"\n🩺 /health probe: {len(latencies)} checks, p50 {_percentile(latencies, 0.5) * 1000:.1f}ms, "
+          f"p99 {probe_p99:.1f}ms, max {max(latencies, default=0) * 1000:.1f}ms (SLO {args.health_slo_ms:.0f}ms)")
+
+    ok = True
+    if probe_p99 > args.health_slo_ms:
+        print("❌ /health got slow under load")
+        ok = False
+    if failures or any(f for _, f in probe):
+        print(f"❌ {failures} requests failed")
+        ok = False
+    if ok:
+        print("✅ All requests succeeded and /health stayed fast")
+    return ok
+
+
+def _synthetic_cache(meetings):
+    from synthetic_cache import write_cache
+
+    path = Path(tempfile.gettempdir()) / "granola-bench" / f"cache-{meetings}-seed0.json"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        print(f"🛠️ Generating synthetic cache with {meetings} meetings...")
+        write_cache(path.with_suffix(".tmp"), meetings)
+        os.replace(path.with_suffix(".tmp"), path)
+    return path
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_until_ready(client, timeout=300):
+    """Wait for the server's startup warm-up (/ready), so it isn't measured as load"""
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            response = await client.get("/ready")
+            # A failed warm-up still serves requests, loading the cache on demand
+            if response.status_code == 200 or response.json().get("status") == "failed":
+                return
+        except Exception:
+            if time.perf_counter() > deadline:
+                raise
+        if time.perf_counter() > deadline:
+            raise TimeoutError("server did not become ready")
+        await asyncio.sleep(0.1)
+
+
+async def _main(args):
+    import httpx
+
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    server = None
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits)
+    else:
+        cache_path = Path(args.cache) if args.cache else _synthetic_cache(args.meetings)
+        os.environ["GRANOLA_CACHE_PATH"] = str(cache_path)
+        print(f"📦 Cache: {cache_path}")
+        if args.spawn:
+            port = _free_port()
+            cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                   "--log-level", "warning", "--workers", str(args.workers)]
+            server = subprocess.Popen(cmd, cwd=HERE, env=dict(os.environ, GRANOLA_LOG_LEVEL="WARNING"))
+            client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=timeout, limits=limits)
+        else:
+            os.environ.setdefault("GRANOLA_LOG_LEVEL", "WARNING")
+            sys.path.insert(0, str(HERE))
+            import granola_loader
+            import main
+            from diagnostics import log
+
+            log.setLevel(os.environ["GRANOLA_LOG_LEVEL"])
+            # synthetic_cache may already have imported the loader before the environment was set
+            granola_loader.CACHE_PATH = cache_path
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://loadtest",
+                                       timeout=timeout)
+
+    mode = args.url or ("uvicorn subprocess" if args.spawn else "in-process ASGI")
+    print(f"🚦 {args.concurrency} concurrent clients for {args.duration:.0f}s against {mode}")
+    try:
+        async with client:
+            if server is not None:
+                await _wait_until_ready(client)
+            samples, errors, probe, elapsed = await _run(client, args)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+    return _report(samples, errors, probe, elapsed, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Granola MCP server")
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    parser.add_argument("--spawn", action="store_true", help="start uvicorn on a free localhost port")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --spawn")
+    parser.add_argument("--cache", help="cache file to serve (default: a synthetic one)")
+    parser.add_argument("--meetings", type=int, default=2000, help="size of the synthetic cache")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15, help="seconds")
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout in seconds")
+    parser.add_argument("--health-interval-ms", type=float, default=50)
+    parser.add_argument("--health-slo-ms", type=float, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    ok = asyncio.run(_main(args))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
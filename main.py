@@ -1,133 +1,729 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-import uvicorn
-import json
-import traceback
-from granola_loader import load_cache, get_recent_meetings, get_transcript_by_id, get_summary_by_id, get_last_7_days_content
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, StrictInt, StrictStr
+from typing import Literal, Union
+from contextlib import asynccontextmanager
+import asyncio
+import os
+import time
+from granola_loader import load_cache, get_snapshot, get_recent_meetings, get_transcript_by_id, get_summary_by_id, get_last_7_days_content, open_window, window_key, normalize_fields, CONTENT_FIELDS, get_recent_meetings_page, search_meetings, get_changes_since, warm_up
+from config import load_config
+from doc_index import decode_cursor
+from timeparse import parse_timestamp
+from diagnostics import get_logger, request_context
+from work_pool import coalesce_key, run_blocking
+from response_cache import (COMPRESS_MIN_BYTES, ENCODERS, ResponseCache, compress, encoded_etag, http_date,
+                            make_etag, matching_etag, negotiate_encoding, not_modified_since)
+import json_backend
+import metrics
+from metrics import Counter, Gauge, Histogram, stage, watch_cache
 
-app = FastAPI()
+log = get_logger("server")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 11434
+# Load the cache and prebuild the default payloads at startup (set to 0 to load on first request)
+PREWARM = os.environ.get("GRANOLA_PREWARM", "1") != "0"
+
+# What /ready reports; filled in by _warm_up
+_startup = {"ready": not PREWARM, "error": None, "started_at": time.time(), "warmup_seconds": None}
+
+@asynccontextmanager
+async def _lifespan(app):
+    # Warm up in the background so /health and /ready answer while it runs
+    task = asyncio.create_task(_warm_up()) if PREWARM else None
+    yield
+    if task is not None:
+        task.cancel()
+
+app = FastAPI(lifespan=_lifespan)
+
+# Rendered bodies keyed by ETag, so repeat polls of an unchanged cache cost nothing
+_responses = watch_cache("responses", ResponseCache())
+
+HTTP_SECONDS = Histogram("granola_http_request_duration_seconds",
+                         "Time from receiving a request to sending the last byte", ["route"])
+HTTP_REQUESTS = Counter("granola_http_requests_total", "Requests by route and status code", ["route", "status"])
+RESPONSE_BYTES = Histogram("granola_http_response_bytes", "Response body sizes", ["route"],
+                           buckets=metrics.SIZE_BUCKETS)
+IN_FLIGHT = Gauge("granola_http_requests_in_flight", "Requests currently being served", ["route"])
+RPC_SECONDS = Histogram("granola_rpc_duration_seconds", "JSON-RPC call time by method", ["method"])
+RPC_CALLS = Counter("granola_rpc_calls_total", "JSON-RPC calls by method and outcome (ok, error, cached)",
+                    ["method", "outcome"])
+
+class MetricsMiddleware:
+    """
+    Per-route request count, duration, response size and in-flight gauge.
+    Plain ASGI so streamed bodies are measured up to their last chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.routes = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        if self.routes is None:
+            self.routes = {getattr(route, "path", None) for route in app.routes}
+        # Unknown paths share one label so scanners can't blow up the series count
+        route = scope["path"] if scope["path"] in self.routes else "other"
+        status = 500
+        size = 0
+
+        async def measured_send(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc(route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, measured_send)
+        finally:
+            IN_FLIGHT.dec(route)
+            HTTP_SECONDS.observe(time.perf_counter() - start, route)
+            HTTP_REQUESTS.inc(route, str(status))
+            RESPONSE_BYTES.observe(size, route)
+
+app.add_middleware(MetricsMiddleware)
 
 class JSONRPCRequest(BaseModel):
-    jsonrpc: str
+    jsonrpc: Literal["2.0"]
     method: str
-    params: dict
-    id: int
+    params: Union[dict, list] = {}
+    # Absent for notifications; JSON-RPC allows string, number or null IDs (strict,
+    # so true isn't turned into 1)
+    id: Union[StrictInt, StrictStr, None] = None
+
+def _valid_id(request_id):
+    """request_id if it's one JSON-RPC allows, else None (what error responses then carry)"""
+    if isinstance(request_id, bool) or not isinstance(request_id, (int, str)):
+        return None
+    return request_id
+
+class JSONRPCError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+def _int_param(params, name, minimum=0):
+    """Validate an optional integer parameter (max_*_chars, page_size)"""
+    value = params.get(name)
+    if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < minimum):
+        raise JSONRPCError(INVALID_PARAMS, f"{name} must be an integer >= {minimum}")
+    return value
+
+def _string_param(params, name, required=False):
+    value = params.get(name)
+    if value is None and required:
+        raise JSONRPCError(INVALID_PARAMS, f"Missing parameter: {name}")
+    if value is not None and not isinstance(value, str):
+        raise JSONRPCError(INVALID_PARAMS, f"{name} must be a string")
+    return value
+
+def _cursor_param(params):
+    return _string_param(params, "cursor")
+
+def _days_back_param(params):
+    days_back = _int_param(params, "days_back")
+    return 7 if days_back is None else days_back
+
+def _window_options(p):
+    """Projection/truncation/paging params shared by the day-window methods"""
+    return {
+        "fields": p.get("fields"),
+        "max_transcript_chars": _int_param(p, "max_transcript_chars"),
+        "max_notes_chars": _int_param(p, "max_notes_chars"),
+        "page_size": _int_param(p, "page_size", minimum=1),
+        "cursor": _cursor_param(p),
+    }
+
+def _recent_meetings(p, snapshot):
+    # Passing "cursor" (null for the first page) switches to the paged result shape
+    if "cursor" not in p:
+        limit = _int_param(p, "limit")
+        return get_recent_meetings(10 if limit is None else limit, snapshot=snapshot, fields=p.get("fields"))
+    limit = _int_param(p, "limit", minimum=1)
+    return get_recent_meetings_page(10 if limit is None else limit, _cursor_param(p),
+                                    snapshot=snapshot, fields=p.get("fields"))
+
+# method -> (handler(params, snapshot), parameter names in positional order)
+METHODS = {
+    "get_recent_meetings": (
+        _recent_meetings,
+        ["limit", "fields", "cursor"],
+    ),
+    "get_transcript": (
+        lambda p, snapshot: get_transcript_by_id(
+            _string_param(p, "meeting_id", required=True), snapshot=snapshot, start=p.get("start"), end=p.get("end"),
+            speaker=_string_param(p, "speaker"), offset=_int_param(p, "offset") or 0,
+            max_chars=_int_param(p, "max_chars"),
+        ),
+        ["meeting_id", "start", "end", "speaker", "offset", "max_chars"],
+    ),
+    "get_summary": (
+        lambda p, snapshot: get_summary_by_id(_string_param(p, "meeting_id", required=True), snapshot=snapshot),
+        ["meeting_id"],
+    ),
+    "search_meetings": (
+        lambda p, snapshot: search_meetings(
+            _string_param(p, "query", required=True), _int_param(p, "limit", minimum=1) or 10, p.get("since"), p.get("until"),
+            p.get("scope", "mine"), snapshot=snapshot,
+        ),
+        ["query", "limit", "since", "until", "scope"],
+    ),
+    "get_last_7_days_content": (
+        lambda p, snapshot: get_last_7_days_content(_days_back_param(p), snapshot=snapshot, **_window_options(p)),
+        ["days_back", "fields", "max_transcript_chars", "max_notes_chars", "page_size", "cursor"],
+    ),
+    "get_changes_since": (
+        lambda p, snapshot: get_changes_since(
+            _cursor_param(p), snapshot=snapshot, fields=p.get("fields"),
+            max_transcript_chars=_int_param(p, "max_transcript_chars"),
+            max_notes_chars=_int_param(p, "max_notes_chars"),
+        ),
+        ["cursor", "fields", "max_transcript_chars", "max_notes_chars"],
+    ),
+}
+# Answers that depend on more than the cache file and params (the change log starts
+# again with the process), so they never get an ETag
+UNCACHEABLE_METHODS = {"get_changes_since"}
+
+def _error(request_id, code, message):
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+def _named_params(method, params):
+    """Accept both by-name and by-position params"""
+    if isinstance(params, dict):
+        return dict(params)
+    names = METHODS[method][1]
+    if len(params) > len(names):
+        raise JSONRPCError(INVALID_PARAMS, f"{method} takes at most {len(names)} positional params")
+    return dict(zip(names, params))
+
+def _dispatch(method, params, snapshot):
+    """Run one JSON-RPC method against the given snapshot"""
+    handler, names = METHODS[method]
+    try:
+        return handler(params, snapshot)
+    except KeyError as e:
+        if e.args and e.args[0] in names and e.args[0] not in params:
+            raise JSONRPCError(INVALID_PARAMS, f"Missing parameter: {e.args[0]}")
+        raise
+    except ValueError as e:
+        # Bad fields list and the like
+        raise JSONRPCError(INVALID_PARAMS, str(e))
+
+def _dispatch_bytes(method, params, snapshot):
+    """
+    _dispatch, then serialize the result on the same worker thread - the only
+    serialization of it; these bytes go straight into the response
+    """
+    result = _dispatch(method, params, snapshot)
+    try:
+        with stage("serialization"):
+            return json_backend.dumps(result)
+    except Exception as serialize_error:
+        log.error("❌ JSON serialization error: %s", serialize_error)
+        raise JSONRPCError(INTERNAL_ERROR, f"Serialization error: {str(serialize_error)}")
+
+def _error_body(request_id, code, message):
+    return json_backend.dumps(_error(request_id, code, message))
+
+async def _handle_call(call, snapshot):
+    """
+    Handle one request object. Returns (response bytes, result bytes): the
+    result is serialized exactly once, and result bytes is None for errors.
+    Both are None for a notification.
+    """
+    if not isinstance(call, dict):
+        return _error_body(None, INVALID_REQUEST, "Invalid Request"), None
+    is_notification = "id" not in call
+    try:
+        request_data = JSONRPCRequest(**call)
+    except Exception as e:
+        return _error_body(_valid_id(call.get("id")), INVALID_REQUEST, f"Invalid Request: {e}"), None
+    request_id = request_data.id
+    method = request_data.method
+
+    try:
+        if method not in METHODS:
+            log.warning("❌ Unknown method: %s", method)
+            raise JSONRPCError(METHOD_NOT_FOUND, "Method not found")
+        params = _named_params(method, request_data.params)
+        # "trace": true returns the per-document decisions alongside the result
+        want_trace = bool(params.pop("trace", False))
+
+        log.info("🔍 Received JSON-RPC request: %s with params: %s", method, params)
+
+        with request_context(trace=want_trace) as trace, RPC_SECONDS.time(method):
+            # Traced calls collect their own decisions, so they never share a computation
+            key = None if want_trace else coalesce_key("jsonrpc", snapshot.version, method, params)
+            result_bytes = await run_blocking(_dispatch_bytes, method, params, snapshot, key=key)
+
+        if is_notification:
+            RPC_CALLS.inc(method, "ok")
+            return None, None
+
+        log.info("✅ Successfully processed %s", method)
+        RPC_CALLS.inc(method, "ok")
+        return _rpc_envelope(request_id, result_bytes, trace), result_bytes
+
+    except JSONRPCError as e:
+        RPC_CALLS.inc(method if method in METHODS else "unknown", "error")
+        return (None, None) if is_notification else (_error_body(request_id, e.code, e.message), None)
+    except Exception as e:
+        log.exception("❌ Error processing request: %s", e)
+        RPC_CALLS.inc(method if method in METHODS else "unknown", "error")
+        return (None, None) if is_notification else (_error_body(request_id, INTERNAL_ERROR, str(e)), None)
+
+def _validators(snapshot, route, params, days_back=None):
+    """
+    ETag and Last-Modified time for reading route with params from snapshot.
+    Day-window reads also depend on how many documents are still inside the
+    window, which can change while the cache file doesn't.
+    """
+    window = window_key(days_back, snapshot) if days_back is not None else None
+    etag = make_etag(snapshot.tag, route, sorted(params.items(), key=lambda kv: kv[0]), window)
+    return etag, snapshot.modified_at
+
+def _cache_headers(etag, last_modified):
+    return {"ETag": etag, "Last-Modified": http_date(last_modified), "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding"}
+
+def _not_modified(req, etag, last_modified, time_dependent):
+    """
+    Evaluate If-None-Match (or, failing that, If-Modified-Since) against a
+    response's validators. Returns the 304 response, or None to send the body.
+    """
+    headers = _cache_headers(etag, last_modified)
+    if_none_match = req.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Echo the variant (plain, gzip, zstd) the client has
+        matched = matching_etag(if_none_match, etag)
+        if matched is None:
+            return None
+        headers["ETag"] = matched
+        return Response(status_code=304, headers=headers)
+    # The file's mtime says nothing about a moving day window, so only use it for the rest
+    if not time_dependent and not_modified_since(req.headers.get("if-modified-since"), last_modified):
+        return Response(status_code=304, headers=headers)
+    return None
+
+async def _json_body_response(req, body, headers=None, cache_key=None):
+    """
+    Send already-serialized JSON, compressed if the client accepts gzip/zstd
+    and it's big enough to bother. With cache_key=(etag, variant) the compressed
+    bytes are kept with the cached body, so repeat polls don't recompress.
+    Compression runs on the worker pool, never on the event loop.
+    """
+    headers = dict(headers) if headers else {}
+    encoding = negotiate_encoding(req.headers.get("accept-encoding"), len(body))
+    if len(body) >= COMPRESS_MIN_BYTES:
+        headers["Vary"] = "Accept-Encoding"
+    if encoding is not None:
+        def make():
+            with stage("compression"):
+                return compress(body, encoding)
+
+        if cache_key is not None:
+            etag, variant = cache_key
+            compressed = _responses.cached_variant(etag, (encoding, variant))
+            if compressed is None:
+                compressed = await run_blocking(_responses.variant, etag, (encoding, variant), make)
+            body = compressed
+        else:
+            body = await run_blocking(make)
+        headers["Content-Encoding"] = encoding
+        if "ETag" in headers:
+            headers["ETag"] = encoded_etag(headers["ETag"], encoding)
+    return Response(body, media_type="application/json", headers=headers)
+
+def _cacheable_call(call):
+    """(method, named params, days_back) for a single call whose response can be cached, else None"""
+    if not isinstance(call, dict) or _valid_id(call.get("id")) is None or call.get("jsonrpc") != "2.0":
+        return None
+    method = call.get("method")
+    if method not in METHODS or method in UNCACHEABLE_METHODS:
+        return None
+    try:
+        params = _named_params(method, call.get("params", {}))
+    except Exception:
+        return None
+    if params.get("trace"):
+        return None
+    days_back = None
+    if method == "get_last_7_days_content":
+        try:
+            days_back = _days_back_param(params)
+        except JSONRPCError:
+            return None
+    return method, params, days_back
+
+def _rpc_envelope(request_id, result_bytes, trace=None):
+    """Wrap an already-serialized result in a JSON-RPC response"""
+    envelope = b'{"jsonrpc":"2.0","id":' + json_backend.dumps(request_id) + b',"result":' + result_bytes
+    if trace is not None:
+        envelope += b',"trace":' + json_backend.dumps(trace)
+    return envelope + b"}"
+
+async def _cached_call(req, call, snapshot, cacheable):
+    """Answer a single cacheable call with a 304, a cached body or a fresh one"""
+    method, params, days_back = cacheable
+    # etag names the result; the response body also carries the caller's id, so its
+    # validator does too
+    etag, last_modified = await run_blocking(_validators, snapshot, f"jsonrpc:{method}", params, days_back)
+    response_etag = make_etag(etag, call["id"])
+    not_modified = _not_modified(req, response_etag, last_modified, days_back is not None)
+    if not_modified is not None:
+        RPC_CALLS.inc(method, "cached")
+        return not_modified
+
+    result_bytes = _responses.get(etag)
+    if result_bytes is None:
+        body, result_bytes = await _handle_call(call, snapshot)
+        if result_bytes is None:
+            return await _json_body_response(req, body)
+        _responses.put(etag, result_bytes)
+    else:
+        RPC_CALLS.inc(method, "cached")
+        body = _rpc_envelope(call["id"], result_bytes)
+    # The envelope carries the caller's id, so compressed copies are kept per id
+    return await _json_body_response(req, body, _cache_headers(response_etag, last_modified),
+                               cache_key=(etag, json_backend.dumps(call["id"])))
+
+def _stream_window_json(days_back, snapshot, prefix=b"", suffix=b"", options=None):
+    """
+    Yield the get_last_7_days_content result as chunked JSON, one document per
+    chunk. total_documents comes after the documents array since it's only
+    known at the end; key order doesn't matter to JSON parsers.
+    """
+    header, documents = open_window(days_back, snapshot, **(options or {}))
+    dumps = json_backend.dumps
+    paging = b""
+    if "next_cursor" in header:
+        paging = b',"window_documents":' + dumps(header["window_documents"]) \
+            + b',"next_cursor":' + dumps(header["next_cursor"])
+    yield prefix + b'{"period":' + dumps(header["period"]) + b',"cutoff_date":' + dumps(header["cutoff_date"]) \
+        + b',"filtered_documents":' + dumps(header["filtered_documents"]) + paging + b',"documents":['
+    total = 0
+    for doc in documents:
+        yield (b"," if total else b"") + dumps(doc)
+        total += 1
+    yield b'],"total_documents":' + dumps(total) + b"}" + suffix
+
+def _stream_window_ndjson(days_back, snapshot, options=None):
+    """Yield the window as NDJSON: a header line, one line per document, an end line"""
+    header, documents = open_window(days_back, snapshot, **(options or {}))
+    dumps = json_backend.dumps
+    yield dumps(dict(header, type="window")) + b"\n"
+    total = 0
+    for doc in documents:
+        yield dumps(dict(doc, type="document")) + b"\n"
+        total += 1
+    yield dumps({"type": "end", "total_documents": total}) + b"\n"
+
+def _streaming_call(call):
+    """
+    (days_back, window options) for a single get_last_7_days_content call that
+    asked for "stream": true, else None. Raises JSONRPCError for bad options.
+    """
+    if not isinstance(call, dict) or call.get("method") != "get_last_7_days_content" \
+            or _valid_id(call.get("id")) is None or call.get("jsonrpc") != "2.0":
+        return None
+    params = call.get("params")
+    if not isinstance(params, dict) or not params.get("stream"):
+        return None
+    days_back = _days_back_param(params)
+    options = _window_options(params)
+    try:
+        # Check these now; once streaming starts there's no way to report an error
+        normalize_fields(options["fields"], CONTENT_FIELDS)
+        if options["cursor"] is not None:
+            decode_cursor(options["cursor"])
+    except ValueError as e:
+        raise JSONRPCError(INVALID_PARAMS, str(e))
+    return days_back, options
 
 @app.post("/jsonrpc")
 async def jsonrpc_handler(req: Request):
+    """
+    JSON-RPC 2.0 endpoint: single calls, batches (arrays of calls) and
+    notifications (calls without an id, which get no response). Every call in
+    a batch reads the same cache snapshot and independent calls run concurrently.
+    """
     try:
         body = await req.json()
-        request_data = JSONRPCRequest(**body)
-        method = request_data.method
-        params = request_data.params
-
-        print(f"🔍 Received JSON-RPC request: {method} with params: {params}")
-
-        if method == "get_recent_meetings":
-            result = get_recent_meetings(params.get("limit", 10))
-        elif method == "get_transcript":
-            result = get_transcript_by_id(params["meeting_id"])
-        elif method == "get_summary":
-            result = get_summary_by_id(params["meeting_id"])
-        elif method == "get_last_7_days_content":
-            days_back = params.get("days_back", 7)
-            result = get_last_7_days_content(days_back)
-            
-            # Debug: Check what we're about to return
-            print(f"🔍 About to return {len(result.get('documents', []))} documents")
-            for i, doc in enumerate(result.get('documents', [])):
-                enhanced_notes_len = len(doc.get('enhanced_notes', ''))
-                print(f"  Doc {i+1} ({doc.get('id', 'unknown')}): enhanced_notes length = {enhanced_notes_len}")
-                if enhanced_notes_len > 0:
-                    print(f"    Preview: {doc.get('enhanced_notes', '')[:100]}...")
-        else:
-            error_response = {"jsonrpc": "2.0", "id": request_data.id, "error": {"code": -32601, "message": "Method not found"}}
-            print(f"❌ Unknown method: {method}")
-            return JSONResponse(content=error_response)
+    except Exception as e:
+        return JSONResponse(content=_error(None, PARSE_ERROR, f"Parse error: {e}"))
 
-        # Ensure the result is JSON serializable
-        try:
-            # Test serialization
-            json.dumps(result)
-            response = {"jsonrpc": "2.0", "id": request_data.id, "result": result}
-            print(f"✅ Successfully processed {method}")
-            return JSONResponse(content=response)
-        except Exception as serialize_error:
-            print(f"❌ JSON serialization error: {serialize_error}")
-            error_response = {"jsonrpc": "2.0", "id": request_data.id, "error": {"code": -32603, "message": f"Serialization error: {str(serialize_error)}"}}
-            return JSONResponse(content=error_response)
+    is_batch = isinstance(body, list)
+    calls = body if is_batch else [body]
+    if not calls:
+        return JSONResponse(content=_error(None, INVALID_REQUEST, "Invalid Request: empty batch"))
 
+    try:
+        snapshot = await run_blocking(get_snapshot, key="snapshot")
     except Exception as e:
-        print(f"❌ Error processing request: {e}")
-        traceback.print_exc()
-        error_response = {"jsonrpc": "2.0", "id": getattr(request_data, 'id', 0), "error": {"code": -32603, "message": str(e)}}
-        return JSONResponse(content=error_response)
+        log.exception("❌ Error loading cache: %s", e)
+        responses = [
+            _error_body(_valid_id(call.get("id")) if isinstance(call, dict) else None, INTERNAL_ERROR, str(e))
+            for call in calls if not (isinstance(call, dict) and "id" not in call)
+        ]
+    else:
+        try:
+            streaming = None if is_batch else _streaming_call(body)
+        except JSONRPCError as e:
+            return JSONResponse(content=_error(body["id"], e.code, e.message))
+        if streaming is not None:
+            # Same envelope as a normal response, but the result is written as it's produced
+            stream_days, options = streaming
+            prefix = b'{"jsonrpc":"2.0","id":' + json_backend.dumps(body["id"]) + b',"result":'
+            chunks = _stream_window_json(stream_days, snapshot, prefix=prefix, suffix=b"}", options=options)
+            return StreamingResponse(chunks, media_type="application/json")
+        cacheable = None if is_batch else _cacheable_call(body)
+        if cacheable is not None:
+            return await _cached_call(req, body, snapshot, cacheable)
+        results = await asyncio.gather(*(_handle_call(call, snapshot) for call in calls))
+        responses = [response for response, _ in results if response is not None]
+
+    if not responses:
+        # Only notifications - nothing to send back
+        return Response(status_code=204)
+    return await _json_body_response(req, b"[" + b",".join(responses) + b"]" if is_batch else responses[0])
+
+@app.api_route("/documents/stream", methods=["GET", "POST"])
+async def stream_documents(days_back: int = 7, format: str = "ndjson", fields: str = None,
+                           max_transcript_chars: int = None, max_notes_chars: int = None,
+                           page_size: int = None, cursor: str = None):
+    """
+    Stream the last N days of documents as they are extracted, so time to first
+    byte and memory stay flat however big the window is. format is "ndjson"
+    (one JSON object per line) or "json" (the get_last_7_days_content shape).
+    fields is a comma-separated list of document keys to include; page_size and
+    cursor page through the window like get_last_7_days_content.
+    """
+    try:
+        options = _rest_window_options(fields, max_transcript_chars, max_notes_chars)
+        if days_back < 0:
+            raise ValueError("days_back must be at least 0")
+        if page_size is not None and page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        if cursor is not None:
+            decode_cursor(cursor)
+        options.update(page_size=page_size, cursor=cursor)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"status": "error", "message": str(e)})
+    snapshot = await run_blocking(get_snapshot, key="snapshot")
+    if format == "json":
+        return StreamingResponse(_stream_window_json(days_back, snapshot, options=options), media_type="application/json")
+    if format != "ndjson":
+        return JSONResponse(status_code=400, content={"status": "error", "message": f"Unknown format: {format}"})
+    return StreamingResponse(_stream_window_ndjson(days_back, snapshot, options), media_type="application/x-ndjson")
 
 @app.get("/health")
 async def health_check():
     """Simple health check endpoint"""
     return {"status": "healthy", "message": "Granola MCP Server is running"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 once the cache is loaded and the default payloads are built, 503 before that"""
+    if _startup["ready"]:
+        return {"status": "ready", "warmup_seconds": _startup["warmup_seconds"]}
+    status = "failed" if _startup["error"] else "starting"
+    return JSONResponse(status_code=503, content={
+        "status": status, "message": _startup["error"], "uptime_seconds": round(time.time() - _startup["started_at"], 3),
+    })
+
+async def _warm_up():
+    """
+    Load the cache, build the indexes and render the default /zapier-simple
+    payload (and its compressed forms) into the response cache, then report
+    ready. Requests arriving meanwhile join the same snapshot load.
+    """
+    start = time.perf_counter()
+    try:
+        snapshot = await run_blocking(get_snapshot, key="snapshot")
+        await run_blocking(warm_up, snapshot)
+        params = {"days_back": 7, "max_notes_chars": None}
+        etag, _ = await run_blocking(_validators, snapshot, "zapier-simple", params, 7)
+        body = await _cached_body(snapshot, "zapier-simple", params, build_zapier_payload, etag)
+        if len(body) >= COMPRESS_MIN_BYTES:
+            for encoding in ENCODERS:
+                await run_blocking(_responses.variant, etag, (encoding, None), lambda: compress(body, encoding))
+    except Exception as e:
+        log.exception("❌ Startup warm-up failed, requests will load the cache themselves: %s", e)
+        _startup["error"] = str(e)
+        return
+    _startup["warmup_seconds"] = round(time.perf_counter() - start, 3)
+    _startup["ready"] = True
+    log.info("✅ Ready after %.2fs warm-up", _startup["warmup_seconds"])
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus scrape endpoint: stage/method latencies, reloads, cache hit ratios, response sizes"""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+def _rest_window_options(fields, max_transcript_chars, max_notes_chars):
+    """Validate the projection/truncation query params; raises ValueError"""
+    for name, value in (("max_transcript_chars", max_transcript_chars), ("max_notes_chars", max_notes_chars)):
+        if value is not None and value < 0:
+            raise ValueError(f"{name} must be a non-negative integer")
+    # Sorted, so the same selection in a different order shares an ETag
+    fields = normalize_fields(fields, CONTENT_FIELDS)
+    return {
+        "fields": sorted(fields) if fields is not None else None,
+        "max_transcript_chars": max_transcript_chars,
+        "max_notes_chars": max_notes_chars,
+    }
+
+async def _cached_get(req, route, params, build):
+    """
+    Serve a day-window REST payload with ETag/304 support. build(snapshot, **params)
+    runs on the worker pool only when there's no cached body for the ETag.
+    """
+    days_back = params["days_back"]
+    snapshot = await run_blocking(get_snapshot, key="snapshot")
+    etag, last_modified = await run_blocking(_validators, snapshot, route, params, days_back)
+    not_modified = _not_modified(req, etag, last_modified, True)
+    if not_modified is not None:
+        return not_modified
+
+    body = await _cached_body(snapshot, route, params, build, etag)
+    return await _json_body_response(req, body, _cache_headers(etag, last_modified), cache_key=(etag, None))
+
+async def _cached_body(snapshot, route, params, build, etag):
+    """The serialized payload for etag, rendered and cached if it isn't already"""
+    body = _responses.get(etag)
+    if body is None:
+        def render():
+            payload = build(snapshot, **params)
+            with stage("serialization"):
+                return json_backend.dumps(payload)
+
+        # Zaps often fire together; identical polls share one computation
+        body = await run_blocking(render, key=coalesce_key(route, etag))
+        _responses.put(etag, body)
+    return body
+
+def build_test_payload(snapshot, days_back=7, **options):
+    result = get_last_7_days_content(days_back, snapshot=snapshot, **options)
+    return {
+        "status": "success", 
+        "documents_found": len(result.get('documents', [])),
+        "sample_data": result
+    }
+
 @app.get("/test")
-async def test_endpoint():
+async def test_endpoint(req: Request, trace: bool = False, fields: str = None,
+                        max_transcript_chars: int = None, max_notes_chars: int = None):
     """Test endpoint to verify data extraction"""
     try:
-        result = get_last_7_days_content(7)
-        return {
-            "status": "success", 
-            "documents_found": len(result.get('documents', [])),
-            "sample_data": result
-        }
+        params = dict(_rest_window_options(fields, max_transcript_chars, max_notes_chars), days_back=7)
+        if not trace:
+            return await _cached_get(req, "test", params, build_test_payload)
+        with request_context(trace=True) as trace_list:
+            snapshot = await run_blocking(get_snapshot, key="snapshot")
+            response = await run_blocking(lambda: build_test_payload(snapshot, **params))
+        return dict(response, trace=trace_list)
+    except ValueError as e:
+        # Unknown fields and the like, as for /documents/stream
+        return JSONResponse(status_code=400, content={"status": "error", "message": str(e)})
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-@app.get("/zapier-simple")
-async def zapier_simple_endpoint():
-    """Simple Zapier endpoint that returns formatted text blocks"""
-    try:
-        result = get_last_7_days_content(7)
-        documents = result.get('documents', [])
-        
-        print(f"🔍 Processing {len(documents)} documents (no filtering)")
+# All the Zapier text blocks use - transcripts are never joined for this endpoint
+ZAPIER_FIELDS = ["title", "created_at", "enhanced_notes"]
+
+def build_zapier_payload(snapshot=None, days_back=7, max_notes_chars=None):
+    """Format the last N days of documents as the text blocks Zapier expects"""
+    result = get_last_7_days_content(days_back, snapshot=snapshot, fields=ZAPIER_FIELDS,
+                                     max_notes_chars=max_notes_chars)
+    documents = result.get('documents', [])
+    
+    log.info("🔍 Processing %d documents (no filtering)", len(documents))
+    
+    # Create simple formatted text blocks for ALL documents
+    formatted_calls = []
+    for doc in documents:
+        # Format the date nicely
+        created_at = doc.get('created_at', '')
+        try:
+            dt = parse_timestamp(created_at)
+            formatted_date = dt.strftime('%B %d, %Y at %I:%M %p')
+        except:
+            formatted_date = created_at
         
-        # Create simple formatted text blocks for ALL documents
-        formatted_calls = []
-        for doc in documents:
-            # Format the date nicely
-            created_at = doc.get('created_at', '')
-            try:
-                from dateutil.parser import parse as parse_date
-                dt = parse_date(created_at)
-                formatted_date = dt.strftime('%B %d, %Y at %I:%M %p')
-            except:
-                formatted_date = created_at
-            
-            # Create the formatted text block
-            formatted_text = f"""Title: {doc.get('title', 'Untitled')}
+        # Create the formatted text block
+        formatted_text = f"""Title: {doc.get('title', 'Untitled')}
 Call date: {formatted_date}
 Enhanced Notes: {doc.get('enhanced_notes', '')}"""
-            
-            formatted_calls.append(formatted_text)
         
-        return {
-            "total_calls": len(formatted_calls),
-            "calls": formatted_calls
-        }
+        formatted_calls.append(formatted_text)
+    
+    return {
+        "total_calls": len(formatted_calls),
+        "calls": formatted_calls
+    }
+
+@app.get("/zapier-simple")
+async def zapier_simple_endpoint(req: Request, trace: bool = False, max_notes_chars: int = None):
+    """Simple Zapier endpoint that returns formatted text blocks"""
+    try:
+        if max_notes_chars is not None and max_notes_chars < 0:
+            raise ValueError("max_notes_chars must be a non-negative integer")
+        params = {"days_back": 7, "max_notes_chars": max_notes_chars}
+        if not trace:
+            return await _cached_get(req, "zapier-simple", params, build_zapier_payload)
+        with request_context(trace=True) as trace_list:
+            payload = await run_blocking(lambda: build_zapier_payload(**params))
+        return dict(payload, trace=trace_list)
         
     except Exception as e:
-        print(f"❌ Error in zapier-simple: {e}")
-        traceback.print_exc()
+        log.exception("❌ Error in zapier-simple: %s", e)
         return {"status": "error", "message": str(e)}
 
 @app.post("/zapier-simple")
-async def zapier_simple_post():
+async def zapier_simple_post(req: Request, trace: bool = False, max_notes_chars: int = None):
     """POST version of the simple Zapier endpoint"""
-    return await zapier_simple_endpoint()
+    return await zapier_simple_endpoint(req, trace, max_notes_chars)
 
-if __name__ == "__main__":
+def serve(argv=None):
+    """Run the server with production settings; --reload is for development only"""
+    import argparse
+    import uvicorn
+
+    config = load_config()
+    parser = argparse.ArgumentParser(description="Granola MCP Server")
+    parser.add_argument("--host", default=config.get("host", DEFAULT_HOST))
+    parser.add_argument("--port", type=int, default=int(config.get("port", DEFAULT_PORT)))
+    parser.add_argument("--workers", type=int, default=int(config.get("workers", 1)))
+    parser.add_argument("--reload", action="store_true", help="restart whenever a source file changes")
+    args = parser.parse_args(argv)
+    if args.reload and args.workers > 1:
+        parser.error("--reload can't be combined with --workers")
+    if args.workers > 1 and not config.get("store_path"):
+        log.warning("⚠️ Each of the %d workers will parse and hold its own copy of the cache; "
+                    "set store_path (GRANOLA_STORE_PATH) to share one", args.workers)
+
+    base = f"http://{args.host}:{args.port}"
     print("🚀 Starting Granola MCP Server...")
-    print("📡 Health check available at: http://127.0.0.1:11434/health")
-    print("🧪 Test endpoint available at: http://127.0.0.1:11434/test")
-    print("🎯 Simple Zapier endpoint available at: http://127.0.0.1:11434/zapier-simple")
-    uvicorn.run("main:app", host="127.0.0.1", port=11434, reload=True)
\ No newline at end of file
+    print(f"📡 Health check available at: {base}/health (ready: {base}/ready)")
+    print(f"🧪 Test endpoint available at: {base}/test")
+    print(f"🎯 Simple Zapier endpoint available at: {base}/zapier-simple")
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers, reload=args.reload)
+
+if __name__ == "__main__":
+    serve()
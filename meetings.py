@@ -0,0 +1,183 @@
+"""
+Compact per-meeting records.
+
+A decoded Granola document carries dozens of fields (people objects, calendar
+event data, notes trees, chapter markers, ...) of which the server reads about
+a dozen. CacheSnapshot projects each one into a Meeting holding just those,
+once its version tokens have been computed from the raw data, so the raw dicts
+can be freed as soon as the snapshot is built.
+
+Meeting answers get() / in / [] for the Granola keys it keeps, so the code that
+reads documents works the same on a Meeting as on the raw dict. Panels keep
+only what a summary is read from. ProseMirror trees (panel content, the notes
+fallback) are only read when their text is extracted, which is memoized, so
+they are kept serialized as a PackedTree and decoded on demand. Transcripts
+are handled the same way: a packed Transcript keeps its segment texts
+serialized and joins them the first time its text is read.
+
+Strings a record keeps are detached() from the decoded file: one surviving
+string is enough to keep the allocator from returning the memory around it, so
+sharing them would pin most of the raw data after it has been freed.
+
+Records are immutable once built, so a reload reuses the previous snapshot's
+record for every ID whose part of the version token hasn't changed.
+"""
+import sys
+
+import json_backend
+from timeparse import parse_epoch, parse_timestamp
+from transcripts import Transcript
+
+# Granola document keys a Meeting keeps; everything else is dropped
+KEYS = ("title", "created_at", "updated_at", "user_id", "workspace_id", "visibility", "public",
+        "people", "duration", "notes_markdown", "notes_plain", "notes", "summary")
+
+# Keys of an AI panel that extract_ai_content_from_panels reads
+PANEL_KEYS = ("template_slug", "title", "updated_at", "content")
+
+# Parts of the cache state read outside documents/transcripts/documentPanels
+STATE_KEYS = ("users", "currentUser")
+
+_ABSENT = object()
+
+
+def detached(value):
+    """A copy of value if it's a str (so it doesn't share memory with the decoded file), else value"""
+    return (value + " ")[:-1] if isinstance(value, str) else value
+
+
+def interned_id(doc_id):
+    return sys.intern(detached(doc_id)) if isinstance(doc_id, str) else doc_id
+
+
+class PackedTree:
+    """A decoded JSON tree kept as its serialized bytes until someone reads it"""
+    __slots__ = ("data",)
+
+    def __init__(self, tree):
+        self.data = json_backend.dumps(tree)
+
+    def load(self):
+        return json_backend.loads(self.data)
+
+
+def unpack(value):
+    """value, or the tree it stands for if it's a PackedTree"""
+    return value.load() if isinstance(value, PackedTree) else value
+
+
+def _usable_text(value):
+    return isinstance(value, str) and bool(value.strip())
+
+
+def _created_epoch(created_at):
+    if not created_at:
+        return None
+    epoch = parse_epoch(created_at)
+    if epoch is None:
+        try:
+            epoch = parse_timestamp(created_at).timestamp()
+        except ValueError:
+            return None
+    return epoch
+
+
+class Meeting:
+    __slots__ = ("id", "created_epoch") + KEYS
+
+    def __init__(self, doc_id, doc):
+        self.id = doc_id
+        for key in KEYS:
+            setattr(self, key, detached(doc.get(key, _ABSENT)))
+        # Seconds since the epoch, or None without a parseable created_at
+        self.created_epoch = _created_epoch(doc.get("created_at"))
+
+        # People are only ever counted or rendered with str(); keep the strings
+        if isinstance(self.people, list):
+            self.people = [str(p) if p else p for p in self.people]
+        elif self.people is not _ABSENT:
+            self.people = ()
+        # Non-string manual notes are never used
+        for key in ("notes_markdown", "notes_plain"):
+            if getattr(self, key) is not _ABSENT and not isinstance(getattr(self, key), str):
+                setattr(self, key, None)
+        # The notes tree is only a fallback for documents without manual notes
+        if _usable_text(self.notes_markdown) or _usable_text(self.notes_plain) or not isinstance(self.notes, dict):
+            self.notes = _ABSENT
+        else:
+            self.notes = PackedTree(self.notes)
+        if isinstance(self.summary, dict):
+            self.summary = {"text": self.summary["text"]} if "text" in self.summary else {}
+
+    def get(self, key, default=None):
+        value = getattr(self, key, _ABSENT) if key in KEYS else _ABSENT
+        return default if value is _ABSENT else unpack(value)
+
+    def __contains__(self, key):
+        return key in KEYS and getattr(self, key) is not _ABSENT
+
+    def __getitem__(self, key):
+        value = getattr(self, key, _ABSENT) if key in KEYS else _ABSENT
+        if value is _ABSENT:
+            raise KeyError(key)
+        return unpack(value)
+
+    def __repr__(self):
+        return f"Meeting({self.id!r}, {self.get('title')!r})"
+
+
+# What the document readers accept: a Meeting, or a raw dict straight from the cache
+DOCUMENT_TYPES = (dict, Meeting)
+
+
+def _compact(values, project, reuse):
+    compact = {}
+    for doc_id, value in values.items():
+        doc_id = interned_id(doc_id)
+        kept = reuse.get(doc_id) if reuse else None
+        compact[doc_id] = kept if kept is not None else project(doc_id, value)
+    return compact
+
+
+def compact_documents(documents, reuse=None):
+    """doc_id -> Meeting for every dict document (anything else is kept as is), with interned IDs"""
+    return _compact(documents, lambda doc_id, doc: Meeting(doc_id, doc) if isinstance(doc, dict) else doc, reuse)
+
+
+def _maybe_summary_panel(panel):
+    # Mirrors the test in extract_ai_content_from_panels; anything it would trip over is kept
+    slug, title = panel.get("template_slug", ""), panel.get("title", "")
+    if isinstance(slug, str) and isinstance(title, str):
+        return "summary" in slug.lower() or "summary" in title.lower()
+    return True
+
+
+def _summary_panel(panel):
+    compact = {key: detached(panel[key]) for key in PANEL_KEYS if key in panel}
+    for key in ("template_slug", "title"):
+        # The same few values on every panel
+        if isinstance(compact.get(key), str):
+            compact[key] = sys.intern(compact[key])
+    if isinstance(compact.get("content"), dict):
+        compact["content"] = PackedTree(compact["content"])
+    return compact
+
+
+def _summary_panels(doc_id, panels):
+    if not isinstance(panels, dict):
+        return panels
+    return {
+        detached(panel_id): _summary_panel(panel)
+        for panel_id, panel in panels.items()
+        if isinstance(panel, dict) and _maybe_summary_panel(panel)
+    }
+
+
+def compact_panels(document_panels, reuse=None):
+    """Only the panels that can be read as a summary, with only the keys that get read"""
+    return _compact(document_panels, _summary_panels, reuse)
+
+
+def compact_transcripts(transcripts, reuse=None):
+    """doc_id -> packed (not yet joined) Transcript"""
+    return _compact(transcripts, lambda doc_id, data: Transcript.from_raw(data).pack(), reuse)
@@ -0,0 +1,203 @@
+"""
+Process-local counters and histograms, exported in the Prometheus text format
+at /metrics.
+
+    with stage("json_decode"):
+        top = decode_cache_bytes(raw)
+
+Recording is one perf_counter() pair, a bisect and a short locked update, so
+it's cheap enough to leave on. Cache hit/miss counts aren't recorded at all on
+the hot path: caches are registered with watch_cache() and their own hits and
+misses attributes are read when /metrics is scraped.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds in seconds: from a memo hit up to a cold parse of a large cache
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Upper bounds in bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_metrics = []
+# (name, object with hits/misses attributes) scraped into the cache_* families
+_caches = []
+# Functions returning [(labels tuple, value)] for gauges that are read on scrape
+_gauge_functions = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        # Unlabelled metrics show up as 0 before anything is recorded
+        self._values = {} if self.labelnames else {(): 0}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_label_text(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return series[2] if series is not None else 0
+
+    def time(self, *labels):
+        """Context manager observing how long its block took"""
+        return _Timer(self, labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, ([*counts], total, count)) for labels, (counts, total, count) in self._series.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _number(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}")
+            label_text = _label_text(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_number(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+STAGE_SECONDS = Histogram(
+    "granola_stage_duration_seconds",
+    "Time spent in each loader stage (file read, JSON decode, ownership filtering, ...)",
+    ["stage"],
+)
+
+
+def stage(name):
+    """Time a block under granola_stage_duration_seconds{stage=name}"""
+    return _Timer(STAGE_SECONDS, (name,))
+
+
+def watch_cache(name, cache):
+    """Export cache.hits / cache.misses as granola_cache_{hits,misses}_total{cache=name}"""
+    _caches.append((name, cache))
+    return cache
+
+
+def gauge_function(name, help, read, labelnames=()):
+    """A gauge whose [(labels, value)] come from read() at scrape time"""
+    _gauge_functions.append((name, help, tuple(labelnames), read))
+
+
+def _cache_lines():
+    if not _caches:
+        return []
+    counts = [(_escape(name), cache.hits, cache.misses) for name, cache in _caches]
+    lines = ["# HELP granola_cache_hits_total Lookups answered from the cache",
+             "# TYPE granola_cache_hits_total counter"]
+    lines.extend(f'granola_cache_hits_total{{cache="{name}"}} {hits}' for name, hits, _ in counts)
+    lines += ["# HELP granola_cache_misses_total Lookups that had to compute the value",
+              "# TYPE granola_cache_misses_total counter"]
+    lines.extend(f'granola_cache_misses_total{{cache="{name}"}} {misses}' for name, _, misses in counts)
+    lines += ["# HELP granola_cache_hit_ratio Share of lookups answered from the cache since startup",
+              "# TYPE granola_cache_hit_ratio gauge"]
+    for name, hits, misses in counts:
+        ratio = hits / (hits + misses) if hits + misses else 0.0
+        lines.append(f'granola_cache_hit_ratio{{cache="{name}"}} {_number(ratio)}')
+    return lines
+
+
+def render():
+    """Every metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    lines.extend(_cache_lines())
+    for name, help, labelnames, read in _gauge_functions:
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in read():
+            lines.append(f"{name}{_label_text(labelnames, labels)} {_number(value)}")
+    return "\n".join(lines) + "\n"
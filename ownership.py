@@ -0,0 +1,165 @@
+"""
+Decide whether a Granola document is one of "my" meetings.
+
+The rules are the ones is_my_document has always used (user_id, workspace,
+visibility, participant count, then title patterns), but the title patterns are
+compiled into a single regex and each verdict is memoized per
+(doc_id, updated_at), so a document is only classified again when it changes.
+"""
+import re
+
+from meetings import DOCUMENT_TYPES
+
+DEFAULT_TEAM_PATTERNS = [
+    'daily standup', 'standup', 'sprint', 'retrospective', 'planning',
+    'all hands', 'team meeting', 'scrum', 'demo', 'review meeting'
+]
+DEFAULT_CLIENT_PATTERNS = [
+    'intelligems &', '& intelligems', '<>', 'shopify split testing',
+    'demo call', 'intro call', 'discovery call'
+]
+DEFAULT_PERSONAL_PATTERNS = [
+    '1:1', 'one-on-one', 'personal', 'career', 'feedback',
+    'check-in', 'catch up', 'sync', '/ kate', 'kate /'
+]
+# More participants than this usually means a team meeting
+DEFAULT_MAX_PARTICIPANTS = 4
+
+# Title pattern groups in precedence order: a team match beats a client match,
+# which beats a personal match
+_GROUPS = ("team", "client", "personal")
+
+
+def compile_title_patterns(team, client, personal):
+    """
+    Build one regex that reports every pattern group matching anywhere in a title.
+    Each alternative sits inside a lookahead so matches never consume text and a
+    lower-precedence match can't hide a higher-precedence one that overlaps it.
+    """
+    alternatives = []
+    for group, patterns in zip(_GROUPS, (team, client, personal)):
+        patterns = [p.lower() for p in patterns if p]
+        if patterns:
+            # Longest first so the reported match is the most specific one
+            body = "|".join(re.escape(p) for p in sorted(patterns, key=len, reverse=True))
+            alternatives.append(f"(?P<{group}>{body})")
+    if not alternatives:
+        return None
+    return re.compile("(?=" + "|".join(alternatives) + ")")
+
+
+class OwnershipClassifier:
+    def __init__(self, user_id=None, email=None, name=None,
+                 team_patterns=DEFAULT_TEAM_PATTERNS,
+                 client_patterns=DEFAULT_CLIENT_PATTERNS,
+                 personal_patterns=DEFAULT_PERSONAL_PATTERNS,
+                 max_participants=DEFAULT_MAX_PARTICIPANTS):
+        self.user_id = str(user_id) if user_id else None
+        self.email = email
+        self.name = name
+        self.max_participants = max_participants
+        self._title_re = compile_title_patterns(team_patterns, client_patterns, personal_patterns)
+        # doc_id -> (updated_at, verdict, reason)
+        self._memo = {}
+
+    @classmethod
+    def from_config(cls, config, user_id=None, email=None, name=None):
+        """Build a classifier from a config dict, using the given identity as defaults"""
+        return cls(
+            user_id=config.get("my_user_id") or user_id,
+            email=config.get("my_email") or email,
+            name=config.get("my_name") or name,
+            team_patterns=config.get("team_patterns", DEFAULT_TEAM_PATTERNS),
+            client_patterns=config.get("client_patterns", DEFAULT_CLIENT_PATTERNS),
+            personal_patterns=config.get("personal_patterns", DEFAULT_PERSONAL_PATTERNS),
+            max_participants=int(config.get("max_participants", DEFAULT_MAX_PARTICIPANTS)),
+        )
+
+    def set_user_id(self, user_id):
+        self.user_id = str(user_id) if user_id else None
+        self._memo.clear()
+
+    def forget(self, doc_ids):
+        """Drop memoized verdicts, e.g. for documents removed from the cache"""
+        for doc_id in doc_ids:
+            self._memo.pop(doc_id, None)
+
+    def title_match(self, title):
+        """Return (group, pattern) for the highest-precedence pattern in title, or None"""
+        if self._title_re is None or not title:
+            return None
+        best = None
+        for m in self._title_re.finditer(title.lower()):
+            group = m.lastgroup
+            if best is None or _GROUPS.index(group) < _GROUPS.index(best[0]):
+                best = (group, m.group(group))
+                if group == _GROUPS[0]:
+                    break
+        return best
+
+    def classify(self, doc_id, doc):
+        """Return (is_mine, reason), reusing the verdict if the document hasn't changed"""
+        if not isinstance(doc, DOCUMENT_TYPES):
+            return False, "not a document"
+
+        updated_at = doc.get("updated_at")
+        if updated_at:
+            memo = self._memo.get(doc_id)
+            if memo is not None and memo[0] == updated_at:
+                return memo[1], memo[2]
+
+        verdict, reason = self._classify(doc)
+        if updated_at:
+            self._memo[doc_id] = (updated_at, verdict, reason)
+        return verdict, reason
+
+    def _classify(self, doc):
+        # Strategy 1: Check user_id field (most reliable)
+        user_id = doc.get("user_id")
+        if user_id:
+            if self.user_id and str(user_id) == self.user_id:
+                return True, f"Owned by me (user_id: {user_id})"
+            return False, f"Owned by someone else (user_id: {user_id}, my_id: {self.user_id})"
+
+        # Strategy 2: Check if document is in workspace (usually team documents)
+        workspace_id = doc.get("workspace_id")
+        if workspace_id:
+            return False, f"In workspace (workspace_id: {workspace_id})"
+
+        # Strategy 3: Check visibility and public flags
+        visibility = doc.get("visibility")
+        is_public = doc.get("public", False)
+        if is_public or visibility == "public":
+            return False, f"Public document (public: {is_public}, visibility: {visibility})"
+
+        # Strategy 4: Check number of participants - many participants usually means team meeting
+        participants = doc.get("people", [])
+        if isinstance(participants, list) and len(participants) > self.max_participants:
+            return False, f"Too many participants ({len(participants)}) - likely team meeting"
+
+        # Strategies 5-7: team, client/external and personal title patterns, in that order
+        title = doc.get("title", "")
+        match = self.title_match(title if isinstance(title, str) else "")
+        if match is not None:
+            group, pattern = match
+            if group == "team":
+                return False, f"Team meeting pattern in title: '{title}'"
+            if group == "client":
+                return False, f"Client/external meeting pattern: '{title}'"
+            return True, f"Personal meeting pattern: '{title}'"
+
+        # Strategy 8: No user_id and can't determine - be restrictive
+        return False, "No user_id and can't determine ownership - excluding for safety"
+
+    def my_document_ids(self, documents):
+        """IDs of every document in documents that is mine"""
+        return frozenset(doc_id for doc_id, doc in documents.items() if self.classify(doc_id, doc)[0])
+
+    def updated_document_ids(self, previous_ids, documents, changes):
+        """Patch a my_document_ids() result with the IDs touched by a reload changeset"""
+        self.forget(changes.removed)
+        mine = set(previous_ids - changes.touched)
+        for doc_id in changes.added | changes.modified:
+            if doc_id in documents and self.classify(doc_id, documents[doc_id])[0]:
+                mine.add(doc_id)
+        return frozenset(mine)
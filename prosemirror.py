@@ -0,0 +1,166 @@
+"""
+Text extraction from the ProseMirror JSON Granola stores notes and AI panels in.
+
+    {"type": "doc", "content": [
+        {"type": "heading", "attrs": {"level": 2}, "content": [{"type": "text", "text": "Next steps"}]},
+        {"type": "bulletList", "content": [{"type": "listItem", "content": [...]}]}
+    ]}
+
+Both walkers use an explicit stack rather than recursion, so a deeply nested
+document can't hit the recursion limit.
+"""
+import re
+
+_WHITESPACE = re.compile(r"\s+")
+_INLINE_WHITESPACE = re.compile(r"[^\S\n]+")
+
+# Nodes whose text is one Markdown block
+_TEXT_BLOCKS = ("paragraph", "heading", "codeBlock")
+
+
+def iter_text(node, mark_text=True, breaks=False):
+    """
+    Yield every "text" value under node in document order. With mark_text, the
+    "text" attribute of marks (e.g. a mention's label) is yielded after its node;
+    with breaks, hardBreak nodes yield a newline.
+    """
+    stack = [node]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            if "text" in obj:
+                yield str(obj["text"])
+            if mark_text and isinstance(obj.get("marks"), list):
+                for mark in obj["marks"]:
+                    if isinstance(mark, dict) and isinstance(mark.get("attrs"), dict) and "text" in mark["attrs"]:
+                        yield str(mark["attrs"]["text"])
+            content = obj.get("content")
+            if isinstance(content, list):
+                stack.extend(reversed(content))
+            elif breaks and obj.get("type") == "hardBreak":
+                yield "\n"
+        elif isinstance(obj, list):
+            stack.extend(reversed(obj))
+
+
+def extract_text(node, markdown=False, mark_text=True, collapse=True):
+    """
+    Plain text of a ProseMirror node: text runs joined with spaces and, with
+    collapse, trimmed with every run of whitespace squeezed to one space. With
+    markdown=True, paragraphs, headings, lists, quotes and code blocks are kept
+    as Markdown instead.
+    """
+    if not isinstance(node, dict):
+        return ""
+    if markdown:
+        return _markdown(node, mark_text)
+    text = " ".join(iter_text(node, mark_text))
+    return _WHITESPACE.sub(" ", text.strip()) if collapse else text
+
+
+def _inline(node, mark_text):
+    text = "".join(iter_text(node, mark_text, breaks=True))
+    return "\n".join(line.strip() for line in _INLINE_WHITESPACE.sub(" ", text).split("\n"))
+
+
+def _markdown(node, mark_text):
+    # (text, top-level block it belongs to) per block, in document order
+    blocks = []
+    # (node, prefix for its first line, prefix for the lines after that, top-level block)
+    stack = [(node, "", "", None)]
+    while stack:
+        obj, first, rest, group = stack.pop()
+        if not isinstance(obj, dict):
+            continue
+        kind = obj.get("type")
+        content = obj.get("content") if isinstance(obj.get("content"), list) else []
+
+        if kind in _TEXT_BLOCKS or (kind == "text" and "text" in obj):
+            if kind == "codeBlock":
+                # Keep the code's own spacing
+                text = "```\n" + "".join(iter_text(obj, mark_text, breaks=True)) + "\n```"
+            else:
+                text = _inline(obj, mark_text)
+            if kind == "heading":
+                level = (obj.get("attrs") or {}).get("level", 1)
+                level = level if isinstance(level, int) and 1 <= level <= 6 else 1
+                text = "#" * level + " " + text
+            if text.strip():
+                lines = text.split("\n")
+                blocks.append(("\n".join([first + lines[0]] + [rest + line for line in lines[1:]]), group))
+            continue
+        if kind == "horizontalRule":
+            blocks.append((first + "---", group))
+            continue
+
+        children = []
+        if kind in ("bulletList", "orderedList"):
+            number = (obj.get("attrs") or {}).get("order", 1)
+            number = number if isinstance(number, int) else 1
+            for offset, item in enumerate(content):
+                marker = "- " if kind == "bulletList" else f"{number + offset}. "
+                children.append((item, rest + marker, rest + " " * len(marker), group))
+        elif kind == "blockquote":
+            children = [(child, rest + "> ", rest + "> ", group) for child in content]
+        else:
+            # doc, listItem and anything unknown: the first child continues the
+            # current line (e.g. after a list marker), the rest are indented under it
+            children = [(child, first if i == 0 else rest, rest, i if group is None else group)
+                        for i, child in enumerate(content)]
+        stack.extend(reversed(children))
+
+    # Blank lines between top-level blocks; lines of one list or quote stay together
+    out = []
+    previous = None
+    for text, group in blocks:
+        if out:
+            out.append("\n" if group is not None and group == previous else "\n\n")
+        out.append(text)
+        previous = group
+    return "".join(out)
+
+
+class PanelTextCache:
+    """
+    Extracted panel text keyed by (doc_id, panel_id), valid while the panel's
+    updated_at is unchanged. Register it with the SnapshotManager so panels of
+    removed documents are dropped on reload; edited panels get a new updated_at.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, doc_id, panel_id, updated_at, compute):
+        if not updated_at:
+            # No version to check against, so nothing can safely be reused
+            return compute()
+        key = (doc_id, panel_id)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == updated_at:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        value = compute()
+        self._entries[key] = (updated_at, value)
+        return value
+
+    def apply(self, changes):
+        gone = changes.removed
+        if gone:
+            for key in [key for key in self._entries if key[0] in gone]:
+                del self._entries[key]
+
+    def forget(self, doc_ids):
+        """Drop the panels of doc_ids, so their text is extracted again next time"""
+        doc_ids = set(doc_ids)
+        if doc_ids:
+            for key in [key for key in self._entries if key[0] in doc_ids]:
+                del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
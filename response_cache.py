@@ -0,0 +1,186 @@
+"""
+HTTP validators, content negotiation and a small cache of rendered response bodies.
+
+ETags are derived from the cache snapshot's tag plus everything else the
+response depends on (route, parameters, the day window). A request whose
+If-None-Match matches gets a 304 without any loader work, and a request for a
+body we rendered recently is answered from the LRU below - including its
+gzip/zstd variants, so a repeat poll doesn't even recompress.
+
+zstd is offered when the zstandard package is installed; gzip always is.
+"""
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# How many rendered bodies to keep (they can be a few hundred KB each)
+MAX_ENTRIES = int(os.environ.get("GRANOLA_RESPONSE_CACHE_SIZE", 32))
+# Bodies smaller than this are sent uncompressed; it isn't worth the CPU
+COMPRESS_MIN_BYTES = int(os.environ.get("GRANOLA_COMPRESS_MIN_BYTES", 1024))
+# Compressed variants kept per body (one per encoding, or per encoding and JSON-RPC id)
+MAX_VARIANTS = 8
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# encoding -> compress(bytes), in order of preference when the client rates them equally
+ENCODERS = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = lambda body: zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+ENCODERS["gzip"] = lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def make_etag(*parts):
+    """Strong ETag for the given parts (anything with a stable repr)"""
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def encoded_etag(etag, encoding):
+    """The ETag of the encoding-compressed representation of the body etag names"""
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+
+def matching_etag(if_none_match, etag):
+    """
+    Which of etag and its compressed variants an If-None-Match header value
+    matches (weak comparison, per RFC 9110), or None
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    variants = {encoded_etag(etag, encoding) for encoding in (None, *ENCODERS)}
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in variants:
+            return candidate
+    return None
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header value matches etag or one of its compressed variants"""
+    return matching_etag(if_none_match, etag) is not None
+
+
+def negotiate_encoding(accept_encoding, size):
+    """
+    The content coding to send a size-byte body with given an Accept-Encoding
+    header: "zstd", "gzip" or None (identity). Honours q-values; when the client
+    rates them equally zstd wins.
+    """
+    if not accept_encoding or size < COMPRESS_MIN_BYTES:
+        return None
+    ratings = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                continue
+        ratings[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in ENCODERS:
+        q = ratings.get(encoding, ratings.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body, encoding):
+    return body if encoding is None else ENCODERS[encoding](body)
+
+
+def http_date(timestamp):
+    return formatdate(timestamp, usegmt=True)
+
+
+def not_modified_since(if_modified_since, timestamp):
+    """True if the If-Modified-Since header is at or after timestamp"""
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates only have second resolution
+    return int(timestamp) <= since
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU of etag -> rendered body bytes. Compressed variants of a
+    body are kept in its entry and evicted together with it.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, etag):
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(etag)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, etag, body):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            # (body, variant key -> bytes)
+            self._entries[etag] = (body, OrderedDict())
+            self._entries.move_to_end(etag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def cached_variant(self, etag, key):
+        """The variant built for key under etag, or None - never builds one"""
+        entry = self._entries.get(etag)
+        return entry[1].get(key) if entry is not None else None
+
+    def variant(self, etag, key, make):
+        """
+        A derived form of the body cached under etag (e.g. its gzip encoding),
+        built with make() the first time key is asked for. Bodies that aren't
+        cached (any more) just get make().
+        """
+        entry = self._entries.get(etag)
+        if entry is not None:
+            value = entry[1].get(key)
+            if value is not None:
+                return value
+        value = make()
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is not None:
+                variants = entry[1]
+                variants[key] = value
+                while len(variants) > MAX_VARIANTS:
+                    variants.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
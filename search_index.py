@@ -0,0 +1,180 @@
+"""
+In-memory full-text index over meetings, ranked with BM25.
+
+One index is built per cache snapshot from each document's title, manual notes,
+AI panel text and joined transcript, and patched from the changeset when the
+cache file changes. Fields are weighted (a hit in the title counts for more than
+one in a transcript) by scaling term frequencies and lengths, BM25F-style.
+"""
+import heapq
+import math
+import re
+
+TOKEN_RE = re.compile(r"\w+")
+
+# BM25 parameters - the usual defaults
+K1 = 1.2
+B = 0.75
+
+# How much a term occurrence in each field counts, and the order snippets are taken in
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "notes": 1.5,
+    "panels": 1.5,
+    "transcript": 1.0,
+}
+
+SNIPPET_CHARS = 160
+
+
+def tokenize(text):
+    """Lower-cased word tokens of text"""
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def analyze(fields):
+    """
+    Turn {field: text} into (weighted term frequencies, weighted length) - the
+    only things BM25 needs to know about a document.
+    """
+    frequencies = {}
+    length = 0.0
+    for field, weight in FIELD_WEIGHTS.items():
+        tokens = tokenize(fields.get(field))
+        length += weight * len(tokens)
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0.0) + weight
+    return frequencies, length
+
+
+def weighted_length(fields):
+    """The weighted length analyze() gives fields, without counting terms"""
+    return sum(weight * len(tokenize(fields.get(field))) for field, weight in FIELD_WEIGHTS.items())
+
+
+def add_term_scores(scores, posting, matching, count, length_of, average_length):
+    """
+    Add one query term's BM25 score to scores ({doc_id: score}) for every
+    document in posting ({doc_id: weighted term frequency}). matching is how
+    many of the count indexed documents contain the term, and length_of(doc_id)
+    a document's weighted length.
+    """
+    idf = math.log(1 + (count - matching + 0.5) / (matching + 0.5))
+    for doc_id, tf in posting.items():
+        norm = K1 * (1 - B + B * length_of(doc_id) / average_length)
+        scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+
+
+def make_snippet(fields, terms, width=SNIPPET_CHARS):
+    """
+    (field, text) around the first occurrence of any of terms, searching the
+    fields in FIELD_WEIGHTS order. Falls back to the start of the first
+    non-empty field when no term is found as a whole word.
+    """
+    if terms:
+        pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, terms)) + r")\b", re.IGNORECASE)
+        for field in FIELD_WEIGHTS:
+            text = fields.get(field) or ""
+            match = pattern.search(text)
+            if match is None:
+                continue
+            start = max(match.start() - width // 3, 0)
+            end = min(start + width, len(text))
+            snippet = " ".join(text[start:end].split())
+            return field, ("…" if start else "") + snippet + ("…" if end < len(text) else "")
+    for field in FIELD_WEIGHTS:
+        text = fields.get(field) or ""
+        if text.strip():
+            snippet = " ".join(text[:width].split())
+            return field, snippet + ("…" if len(text) > width else "")
+    return None, ""
+
+
+class SearchIndex:
+    def __init__(self, postings, doc_terms, total_length):
+        # term -> {doc_id: weighted term frequency}
+        self.postings = postings
+        # doc_id -> (weighted term frequencies, weighted length), kept so a
+        # changed document's old postings can be found and removed
+        self.doc_terms = doc_terms
+        self.total_length = total_length
+
+    @classmethod
+    def build(cls, doc_ids, fields_of):
+        """Index every doc_id; fields_of(doc_id) returns its {field: text}"""
+        postings = {}
+        doc_terms = {}
+        total_length = 0.0
+        for doc_id in doc_ids:
+            frequencies, length = doc_terms[doc_id] = analyze(fields_of(doc_id))
+            total_length += length
+            for term, tf in frequencies.items():
+                postings.setdefault(term, {})[doc_id] = tf
+        return cls(postings, doc_terms, total_length)
+
+    def updated(self, changes, doc_ids, fields_of):
+        """
+        Return a new index with the IDs in changes re-analyzed. Only the posting
+        lists of terms those documents use are copied; everything else is shared
+        with this index, which is left untouched for readers of the old snapshot.
+        """
+        postings = dict(self.postings)
+        doc_terms = dict(self.doc_terms)
+        total_length = self.total_length
+        copied = set()
+
+        def own(term):
+            if term in copied:
+                return postings.setdefault(term, {})
+            copied.add(term)
+            posting = postings[term] = dict(postings.get(term, ()))
+            return posting
+
+        for doc_id in changes.touched:
+            old = doc_terms.pop(doc_id, None)
+            if old is None:
+                continue
+            total_length -= old[1]
+            for term in old[0]:
+                own(term).pop(doc_id, None)
+
+        for doc_id in changes.added | changes.modified:
+            if doc_id not in doc_ids:
+                continue
+            frequencies, length = doc_terms[doc_id] = analyze(fields_of(doc_id))
+            total_length += length
+            for term, tf in frequencies.items():
+                own(term)[doc_id] = tf
+
+        for term in copied:
+            if not postings.get(term):
+                postings.pop(term, None)
+        return SearchIndex(postings, doc_terms, total_length)
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    def search(self, query, limit=10, accept=None):
+        """
+        Rank documents against query. Returns (number of matching documents,
+        [(score, doc_id), ...] best first, at most limit). accept(doc_id), if
+        given, filters candidates before they are counted or ranked.
+        """
+        count = len(self.doc_terms)
+        if not count:
+            return 0, []
+        average_length = (self.total_length / count) or 1.0
+        doc_terms = self.doc_terms
+
+        scores = {}
+        length_of = lambda doc_id: doc_terms[doc_id][1]
+        # Sorted, so scores are summed in the same order every time
+        for term in sorted(set(tokenize(query))):
+            posting = self.postings.get(term)
+            if posting:
+                add_term_scores(scores, posting, len(posting), count, length_of, average_length)
+
+        if accept is not None:
+            scores = {doc_id: score for doc_id, score in scores.items() if accept(doc_id)}
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return len(scores), [(score, doc_id) for doc_id, score in best]
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic Granola cache-v3.json files for benchmarks and load tests.
+
+The output has the same shape the real app writes: a top-level {"cache": "..."}
+whose value is a JSON string holding {"state": {...}}, with documents,
+list-shaped transcripts and ProseMirror documentPanels.
+
+    python synthetic_cache.py 10000 /tmp/cache-10k.json
+    python synthetic_cache.py 100k /tmp/cache-100k.json
+"""
+import argparse
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from granola_loader import MY_USER_ID
+
+# Standard benchmark sizes: name -> (meetings, transcript segments per meeting).
+# The 100k cache gets shorter transcripts so generating it fits in laptop RAM;
+# it's still several hundred MB on disk.
+PRESETS = {
+    "100": (100, (0, 120)),
+    "10k": (10_000, (0, 120)),
+    "100k": (100_000, (0, 24)),
+}
+
+OTHER_USER_IDS = [str(uuid.UUID(int=i + 1)) for i in range(12)]
+
+TITLE_TEMPLATES = [
+    "Kate / {name} 1:1",
+    "{name} / Kate",
+    "Career check-in with {name}",
+    "Catch up with {name}",
+    "Daily standup",
+    "Sprint planning",
+    "Retrospective",
+    "Intelligems & {company}",
+    "{company} <> Intelligems",
+    "Discovery call - {company}",
+    "{company} checkout review",
+    "Pricing experiment sync",
+    "Shipping rates deep dive",
+    "Untitled meeting",
+]
+NAMES = ["Drew", "Chris", "Maya", "Jordan", "Priya", "Sam", "Alex", "Taylor"]
+COMPANIES = ["Hexclad", "Acme", "Bluebird", "Northwind", "Globex", "Initech"]
+WORDS = (
+    "checkout shipping rates pricing experiment split testing conversion cart "
+    "subscription bundle discount margin revenue funnel landing page shopify "
+    "theme customer support onboarding integration dashboard report metric "
+    "launch timeline roadmap feedback hiring budget forecast retention"
+).split()
+
+
+def _sentence(rng, low=6, high=18):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(low, high))]
+    return " ".join(words).capitalize() + "."
+
+
+def _text_node(text):
+    return {"type": "text", "text": text}
+
+
+def _paragraph(text):
+    return {"type": "paragraph", "content": [_text_node(text)]}
+
+
+def _prosemirror_doc(rng, sections):
+    content = []
+    for _ in range(sections):
+        content.append({
+            "type": "heading",
+            "attrs": {"level": 3},
+            "content": [_text_node(" ".join(rng.choice(WORDS) for _ in range(3)).title())],
+        })
+        items = []
+        for _ in range(rng.randint(2, 5)):
+            items.append({"type": "listItem", "content": [_paragraph(_sentence(rng))]})
+        content.append({"type": "bulletList", "content": items})
+    return {"type": "doc", "content": content}
+
+
+def _iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
+def _transcript(rng, start, segments):
+    out = []
+    t = start
+    for i in range(segments):
+        end = t + timedelta(seconds=rng.randint(2, 20))
+        out.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "document_id": None,
+            "start_timestamp": _iso(t),
+            "end_timestamp": _iso(end),
+            "text": _sentence(rng, 4, 30),
+            "source": "microphone" if i % 2 else "system",
+            "is_final": True,
+        })
+        t = end
+    return out
+
+
+def generate_state(count, seed=0, days=120, transcript_segments=(0, 120)):
+    """Build the decoded `state` dict for count meetings spread over the last `days` days"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    documents, transcripts, panels = {}, {}, {}
+
+    for i in range(count):
+        doc_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        created = now - timedelta(seconds=rng.randint(0, days * 86400))
+        updated = created + timedelta(minutes=rng.randint(0, 240))
+        title = rng.choice(TITLE_TEMPLATES).format(name=rng.choice(NAMES), company=rng.choice(COMPANIES))
+
+        roll = rng.random()
+        doc = {
+            "id": doc_id,
+            "created_at": _iso(created),
+            "updated_at": _iso(updated),
+            "deleted_at": None,
+            "title": title,
+            "type": "meeting",
+            "notes": _prosemirror_doc(rng, rng.randint(0, 2)),
+            "notes_plain": "",
+            "notes_markdown": "",
+            "people": [
+                {"name": rng.choice(NAMES), "email": f"user{rng.randint(1, 500)}@example.com"}
+                for _ in range(rng.randint(1, 7))
+            ],
+            "google_calendar_event": {"id": f"evt{i}", "summary": title},
+            "duration": rng.randint(300, 3600),
+            "public": roll > 0.97,
+            "visibility": None,
+        }
+        if roll < 0.6:
+            doc["user_id"] = MY_USER_ID
+        elif roll < 0.8:
+            doc["user_id"] = rng.choice(OTHER_USER_IDS)
+        elif roll < 0.85:
+            doc["workspace_id"] = str(uuid.UUID(int=rng.getrandbits(128)))
+        if rng.random() < 0.5:
+            notes = "\n".join(f"- {_sentence(rng)}" for _ in range(rng.randint(1, 8)))
+            doc["notes_markdown"] = notes
+            doc["notes_plain"] = notes.replace("- ", "")
+        documents[doc_id] = doc
+
+        if rng.random() < 0.7:
+            low, high = transcript_segments
+            transcripts[doc_id] = _transcript(rng, created, rng.randint(low, high))
+
+        if rng.random() < 0.85:
+            panel_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            panels[doc_id] = {
+                panel_id: {
+                    "id": panel_id,
+                    "document_id": doc_id,
+                    "title": "Summary",
+                    "template_slug": "meeting-summary-consolidated",
+                    "content": _prosemirror_doc(rng, rng.randint(2, 5)),
+                    "created_at": _iso(updated),
+                    "updated_at": _iso(updated),
+                }
+            }
+
+    return {"documents": documents, "transcripts": transcripts, "documentPanels": panels}
+
+
+def parse_count(value):
+    """Meeting count from "250", "10k", "1.5m" or a PRESETS name"""
+    value = str(value).strip().lower()
+    if value in PRESETS:
+        return PRESETS[value][0]
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    if multiplier != 1:
+        value = value[:-1]
+    return int(float(value) * multiplier)
+
+
+def preset_segments(count):
+    """Transcript length range the preset of this size uses (the default otherwise)"""
+    for preset_count, segments in PRESETS.values():
+        if preset_count == count:
+            return segments
+    return (0, 120)
+
+
+def write_cache(path, count, seed=0, days=120, transcript_segments=None):
+    """Write a double-encoded cache-v3.json with count meetings to path"""
+    segments = transcript_segments or preset_segments(count)
+    state = generate_state(count, seed=seed, days=days, transcript_segments=segments)
+    inner = json.dumps({"state": state, "version": 3})
+    with open(path, "w") as f:
+        json.dump({"cache": inner}, f)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("count", type=parse_count, help="number of meetings, e.g. 250, 10k or 100k")
+    parser.add_argument("path", help="where to write the cache file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--days", type=int, default=120, help="spread meetings over this many days")
+    args = parser.parse_args()
+
+    write_cache(args.path, args.count, seed=args.seed, days=args.days)
+    print(f"✅ Wrote {args.count} meetings to {args.path}")
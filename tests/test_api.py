@@ -0,0 +1,117 @@
+import json
+import os
+
+import pytest
+
+os.environ.pop("GRANOLA_STORE_PATH", None)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import granola_loader  # noqa: E402
+import main  # noqa: E402
+import response_cache  # noqa: E402
+import synthetic_cache  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    path = tmp_path_factory.mktemp("cache") / "cache-v3.json"
+    synthetic_cache.write_cache(path, 60, days=20, transcript_segments=(2, 6))
+    previous = granola_loader.CACHE_PATH
+    granola_loader.CACHE_PATH = path
+    try:
+        yield TestClient(main.app)
+    finally:
+        granola_loader.CACHE_PATH = previous
+
+
+def _rpc(client, method, params, request_id=1, headers=None):
+    return client.post("/jsonrpc", json={"jsonrpc": "2.0", "id": request_id, "method": method, "params": params},
+                       headers=headers)
+
+
+def test_conditional_requests(client):
+    first = _rpc(client, "get_recent_meetings", {"limit": 5})
+    assert first.status_code == 200 and first.headers["last-modified"]
+    etag = first.headers["etag"]
+    again = _rpc(client, "get_recent_meetings", {"limit": 5}, headers={"if-none-match": etag})
+    assert again.status_code == 304 and again.headers["etag"] == etag
+    # Another caller id gets another body, so another validator
+    other = _rpc(client, "get_recent_meetings", {"limit": 5}, request_id="x", headers={"if-none-match": etag})
+    assert other.status_code == 200 and other.json()["id"] == "x" and other.headers["etag"] != etag
+    since = _rpc(client, "get_recent_meetings", {"limit": 5},
+                 headers={"if-modified-since": first.headers["last-modified"]})
+    assert since.status_code == 304
+    # A day window moves with the clock, so the file's mtime can't answer for it
+    window = _rpc(client, "get_last_7_days_content", {"days_back": 3},
+                  headers={"if-modified-since": first.headers["last-modified"]})
+    assert window.status_code == 200
+    rest = client.get("/zapier-simple")
+    assert client.get("/zapier-simple", headers={"if-none-match": rest.headers["etag"]}).status_code == 304
+
+
+@pytest.mark.parametrize("accept, encoding", [
+    ("gzip", "gzip"), ("identity", None), ("gzip;q=0", None), ("br, gzip;q=0.5", "gzip"),
+])
+def test_compression_is_negotiated(client, accept, encoding):
+    plain = _rpc(client, "get_last_7_days_content", {"days_back": 20}, headers={"accept-encoding": "identity"})
+    response = _rpc(client, "get_last_7_days_content", {"days_back": 20}, headers={"accept-encoding": accept})
+    assert response.headers.get("content-encoding") == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json() == plain.json()
+    if encoding is not None:
+        assert response.headers["etag"] == response_cache.encoded_etag(plain.headers["etag"], encoding)
+
+
+def test_zstd_only_when_available(client):
+    response = _rpc(client, "get_last_7_days_content", {"days_back": 20}, headers={"accept-encoding": "zstd, gzip"})
+    expected = "zstd" if "zstd" in response_cache.ENCODERS else "gzip"
+    assert response.headers["content-encoding"] == expected
+
+
+def test_batches_and_notifications(client):
+    response = client.post("/jsonrpc", json=[
+        {"jsonrpc": "2.0", "id": 1, "method": "get_recent_meetings", "params": {"limit": 2}},
+        {"jsonrpc": "2.0", "method": "get_summary", "params": {"meeting_id": "x"}},
+        {"jsonrpc": "2.0", "id": "b", "method": "nope"},
+        {"jsonrpc": "2.0", "id": 3, "method": "get_summary", "params": {"meeting_id": ["x"]}},
+        5,
+    ])
+    body = response.json()
+    assert [item.get("id") for item in body] == [1, "b", 3, None]
+    assert len(body[0]["result"]) == 2
+    assert [item["error"]["code"] for item in body[1:]] == [-32601, -32602, -32600]
+    notification = {"jsonrpc": "2.0", "method": "get_summary", "params": {"meeting_id": "x"}}
+    assert client.post("/jsonrpc", json=notification).status_code == 204
+    assert client.post("/jsonrpc", json=[notification, notification]).status_code == 204
+
+
+def _without_cutoff(result):
+    return {key: value for key, value in result.items() if key != "cutoff_date"}
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"days_back": 10, "fields": "title,transcript", "max_transcript_chars": 12},
+    {"days_back": 20, "page_size": 4},
+    {"days_back": 0},
+])
+def test_streamed_windows_match(client, params):
+    plain = _rpc(client, "get_last_7_days_content", params).json()["result"]
+    streamed = _rpc(client, "get_last_7_days_content", dict(params, stream=True)).json()["result"]
+    assert _without_cutoff(streamed) == _without_cutoff(plain)
+    rest = client.get("/documents/stream", params=dict(params, format="json")).json()
+    assert _without_cutoff(rest) == _without_cutoff(plain)
+    lines = [json.loads(line) for line in client.get("/documents/stream", params=params).text.splitlines()]
+    assert [line["type"] for line in lines] == ["window"] + ["document"] * len(plain["documents"]) + ["end"]
+
+
+@pytest.mark.parametrize("days_back", [-3, "7", True])
+def test_bad_days_back_is_rejected_with_or_without_streaming(client, days_back):
+    for stream in (False, True):
+        response = _rpc(client, "get_last_7_days_content", {"days_back": days_back, "stream": stream})
+        assert response.json()["error"]["code"] == -32602
+
+
+def test_negative_days_back_is_a_bad_request(client):
+    assert client.get("/documents/stream", params={"days_back": -5}).status_code == 400
@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+
+import pytest
+
+import derived_store
+from cache_snapshot import Changeset
+from change_log import ChangeLog, decode_change_cursor, encode_change_cursor
+from derived_store import DerivedStore
+
+
+def test_cursor_round_trip():
+    assert decode_change_cursor(encode_change_cursor("abc", 7)) == ("abc", 7)
+    for bad in ["junk", encode_change_cursor("abc", True), encode_change_cursor(3, 7)]:
+        with pytest.raises(ValueError):
+            decode_change_cursor(bad)
+
+
+def _log():
+    log = ChangeLog(limit=3)
+    # Version 1: the first load, nothing to report yet
+    log.record(1, Changeset(0, 1, added=["a", "b", "x"]), {"a", "b"})
+    return log
+
+
+def test_first_load_starts_the_history():
+    log = _log()
+    assert (log.start, log.last) == (1, 1)
+    assert log.since(1, 1) == (1, {})
+    # No cursor, or one from before the log: a reset
+    assert log.since(None, 1) == (1, None)
+    assert log.since(0, 1) == (1, None)
+
+
+def test_since_reports_whether_each_document_was_mine():
+    log = _log()
+    # v2: a modified, b removed, c added (mine), x modified but not mine either side
+    log.record(2, Changeset(1, 2, added=["c"], modified=["a", "x"], removed=["b"]), {"a", "c"})
+    # v3: c modified, x becomes mine, a stops being mine
+    log.record(3, Changeset(2, 3, modified=["c", "x", "a"]), {"c", "x"})
+    assert log.since(1, 3) == (3, {"a": True, "b": True, "c": False, "x": False})
+    assert log.since(2, 3) == (3, {"c": True, "x": False, "a": True})
+    assert log.since(3, 3) == (3, {})
+
+
+def test_since_stops_at_the_snapshot_being_read():
+    log = _log()
+    log.record(2, Changeset(1, 2, added=["c"]), {"a", "b", "c"})
+    log.record(3, Changeset(2, 3, removed=["a"]), {"b", "c"})
+    # A request still on version 2 mustn't be told about (or skip past) version 3
+    assert log.since(1, 2) == (2, {"c": False})
+    assert log.since(3, 2) == (2, None)
+
+
+def test_reloads_without_my_changes_still_advance():
+    log = _log()
+    log.record(2, Changeset(1, 2, modified=["x"]), {"a", "b"})
+    assert log.since(1, 2) == (2, {})
+
+
+def test_old_cursors_get_a_reset_once_trimmed():
+    log = _log()
+    for version in range(2, 7):
+        log.record(version, Changeset(version - 1, version, modified=["a"]), {"a", "b"})
+    # Only the last 3 batches are kept: versions 4, 5 and 6
+    assert log.start == 3
+    assert log.since(2, 6) == (6, None)
+    assert log.since(3, 6) == (6, {"a": True})
+
+
+def test_another_file_starts_again():
+    log = _log()
+    log.record(2, Changeset(1, 2, added=["c"]), {"a", "b", "c"})
+    log.record(3, Changeset(0, 3, added=["z"]), {"z"})
+    assert log.since(1, 3) == (3, None)
+    assert log.since(3, 3) == (3, {})
+
+
+def _sync(store, version, mine, others=()):
+    """Sync a store to documents whose token is their version, mine/others as given"""
+    documents = {doc_id: {} for doc_id in (*mine, *others)}
+    snapshot = SimpleNamespace(path="/cache.json", signature=(version, 1), version=version, documents=documents,
+                               tokens={doc_id: token for doc_id, token in {**mine, **dict(others)}.items()})
+    store.sync(snapshot, lambda doc_id: {"mine": 1 if doc_id in mine else 0, "title": doc_id}, "settings")
+
+
+def _changes(store, position):
+    reader = store.reader()
+    try:
+        return reader.changes_since(reader.meta["log_id"], position)[1:]
+    finally:
+        reader.close()
+
+
+def test_store_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(derived_store, "CHANGE_LOG_RELOADS", 2)
+    store = DerivedStore(tmp_path / "store.db")
+    _sync(store, 1, {"a": 1, "b": 1}, {"x": 1})
+    # The first sync starts the log
+    assert _changes(store, 0) == (0, {})
+    _sync(store, 2, {"a": 2, "c": 1}, {"x": 2})
+    assert _changes(store, 0) == (1, {"a": True, "b": True, "c": False})
+    # Nothing of mine touched: no new sync number
+    _sync(store, 3, {"a": 2, "c": 1}, {"x": 3})
+    assert _changes(store, 1) == (1, {})
+    _sync(store, 4, {"c": 2}, {"x": 3})
+    _sync(store, 5, {"c": 3}, {"x": 3})
+    # Sync numbers 1-3 were logged and only the last 2 kept, so 0 can't be answered any more
+    assert _changes(store, 0) == (3, None)
+    assert _changes(store, 1) == (3, {"a": True, "c": True})
+    assert _changes(store, 2) == (3, {"c": True})
@@ -0,0 +1,64 @@
+import itertools
+
+import pytest
+
+from cache_snapshot import Changeset
+
+
+def _states():
+    """Every way one document can exist (True) or not across three versions"""
+    return list(itertools.product([False, True], repeat=3))
+
+
+def _changeset(from_version, to_version, before, after, modified=False):
+    if before and after:
+        return Changeset(from_version, to_version, modified=["d"] if modified else [])
+    if after:
+        return Changeset(from_version, to_version, added=["d"])
+    if before:
+        return Changeset(from_version, to_version, removed=["d"])
+    return Changeset(from_version, to_version)
+
+
+@pytest.mark.parametrize("states", _states())
+@pytest.mark.parametrize("first_modified", [False, True])
+@pytest.mark.parametrize("second_modified", [False, True])
+def test_merge_matches_diffing_the_ends(states, first_modified, second_modified):
+    v1, v2, v3 = states
+    first = _changeset(1, 2, v1, v2, first_modified)
+    second = _changeset(2, 3, v2, v3, second_modified)
+    merged = first.merge(second)
+
+    assert (merged.from_version, merged.to_version) == (1, 3)
+    if not v1 and v3:
+        assert merged.as_dict()["added"] == ["d"]
+    elif v1 and not v3:
+        assert merged.as_dict()["removed"] == ["d"]
+    elif v1 and v3 and ("d" in first.touched or "d" in second.touched):
+        # Removed and re-added counts as modified too
+        assert merged.as_dict()["modified"] == ["d"]
+    else:
+        # Never there, added then removed again, or untouched
+        assert not merged
+
+
+def test_between_diffs_tokens():
+    old = {"a": (1, None, None), "b": (1, None, None), "c": (1, None, None)}
+    new = {"a": (1, None, None), "b": (2, None, None), "d": (1, None, None)}
+    changes = Changeset.between(1, old, 2, new)
+    assert changes.as_dict() == {"from_version": 1, "to_version": 2,
+                                 "added": ["d"], "modified": ["b"], "removed": ["c"]}
+    assert changes.touched == {"b", "c", "d"}
+
+
+def test_merge_is_associative_over_a_chain():
+    steps = [
+        Changeset(1, 2, added=["a", "b"]),
+        Changeset(2, 3, modified=["a"], removed=["b"]),
+        Changeset(3, 4, added=["b", "c"]),
+        Changeset(4, 5, removed=["c"], modified=["b"]),
+    ]
+    left = steps[0].merge(steps[1]).merge(steps[2]).merge(steps[3])
+    right = steps[0].merge(steps[1].merge(steps[2].merge(steps[3])))
+    assert left.as_dict() == right.as_dict() == {"from_version": 1, "to_version": 5,
+                                                 "added": ["a", "b"], "modified": [], "removed": []}
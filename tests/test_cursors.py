@@ -0,0 +1,35 @@
+import base64
+import json
+
+import pytest
+
+import cursors
+
+
+@pytest.mark.parametrize("values", [(), (1,), (1.5, "doc"), ("log", 0), (None, [1, 2], {"a": "ü"})])
+def test_round_trip(values):
+    cursor = cursors.encode_cursor("kind", *values)
+    assert "=" not in cursor
+    assert cursors.decode_cursor("kind", cursor, len(values)) == list(values)
+
+
+def test_kind_and_count_must_match():
+    cursor = cursors.encode_cursor("page", 1.0, "a")
+    with pytest.raises(ValueError):
+        cursors.decode_cursor("changes", cursor, 2)
+    with pytest.raises(ValueError):
+        cursors.decode_cursor("page", cursor, 3)
+
+
+def _raw(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).rstrip(b"=").decode()
+
+
+@pytest.mark.parametrize("cursor", [
+    "", "%%%", "a", _raw({"page": 1}), _raw("page"),
+    # An older layout
+    _raw([cursors.CURSOR_VERSION - 1, "page", 1.0, "a"]),
+])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        cursors.decode_cursor("page", cursor, 2)
@@ -0,0 +1,50 @@
+import pytest
+
+import cursors
+from doc_index import TimeIndex, decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("entry", [(0.0, ""), (1714572000.5, "doc-1"), (-1.0, "ü/+="), (1e12, "x" * 200)])
+def test_cursor_round_trip(entry):
+    cursor = encode_cursor(entry)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == entry
+
+
+@pytest.mark.parametrize("cursor", ["", "junk", "!!!", encode_cursor((1.0, "a"))[:-2],
+                                    # Well-formed, but the wrong values or kind
+                                    cursors.encode_cursor("page", 1.0),
+                                    cursors.encode_cursor("page", True, "a"),
+                                    cursors.encode_cursor("page", 1.0, 2),
+                                    cursors.encode_cursor("changes", 1.0, "a")])
+def test_bad_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def _index(count, same_epoch=False):
+    documents = {f"d{i:02d}": (100.0 if same_epoch else float(i)) for i in range(count)}
+    return TimeIndex.build(documents, lambda doc_id, epoch: epoch)
+
+
+@pytest.mark.parametrize("same_epoch", [False, True])
+@pytest.mark.parametrize("limit", [1, 3, 10, 25])
+def test_pages_cover_the_index_once_through_cursors(same_epoch, limit):
+    index = _index(10, same_epoch)
+    seen, before = [], None
+    while True:
+        entries, next_key = index.page(limit, before=before)
+        seen.extend(entries)
+        if next_key is None:
+            break
+        before = decode_cursor(encode_cursor(next_key))
+    assert seen == list(index.newest())
+
+
+def test_page_after_a_window_start():
+    index = _index(10)
+    entries, next_key = index.page(3, start=5.0)
+    assert [doc_id for _, doc_id in entries] == ["d09", "d08", "d07"]
+    entries, next_key = index.page(3, start=5.0, before=next_key)
+    assert [doc_id for _, doc_id in entries] == ["d06"]
+    assert next_key is None
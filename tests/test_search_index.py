@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+
+from cache_snapshot import Changeset
+from derived_store import DerivedStore
+from search_index import SearchIndex, weighted_length
+
+# "checkout" is in more than half the documents, which FTS5's bm25() scores as 0
+FIELDS = {
+    "a": {"title": "Checkout redesign", "notes": "checkout flow, checkout errors", "transcript": "we looked at it"},
+    "b": {"title": "Weekly sync", "panels": "checkout numbers are up", "transcript": "checkout checkout pricing"},
+    "c": {"title": "Pricing review", "notes": "pricing tiers", "transcript": "the checkout page shows pricing"},
+    "d": {"title": "Hiring", "notes": "two roles", "transcript": "checkout came up once"},
+    "e": {"title": "Retro", "notes": "", "transcript": "snake_case names and more pricing"},
+    "f": {},
+}
+MINE = {"a", "c", "e"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DerivedStore(tmp_path / "store.db")
+    snapshot = SimpleNamespace(path="/cache.json", signature=(1, 1), version=1,
+                               documents=dict.fromkeys(FIELDS, {}), tokens=dict.fromkeys(FIELDS, 1))
+    store.sync(snapshot, lambda doc_id: dict(FIELDS[doc_id], mine=int(doc_id in MINE),
+                                             search_length=weighted_length(FIELDS[doc_id])), "settings")
+    return store
+
+
+def _store_search(store, query, scope="all"):
+    reader = store.reader()
+    try:
+        total, rows = reader.search(query, 10, scope=scope)
+    finally:
+        reader.close()
+    return total, [(round(row["score"], 10), row["id"]) for row in rows]
+
+
+def _index_search(index, query, scope="all"):
+    accept = None if scope == "all" else lambda doc_id: (doc_id in MINE) == (scope == "mine")
+    total, ranked = index.search(query, 10, accept)
+    return total, [(round(score, 10), doc_id) for score, doc_id in ranked]
+
+
+@pytest.mark.parametrize("query, scope", [
+    ("checkout", "all"), ("checkout pricing", "all"), ("pricing", "mine"), ("checkout", "others"),
+    ("snake_case", "all"), ("nothing here", "all"),
+])
+def test_store_ranks_like_the_index(store, query, scope):
+    index = SearchIndex.build(FIELDS, FIELDS.__getitem__)
+    assert _store_search(store, query, scope) == _index_search(index, query, scope)
+
+
+def test_common_terms_still_rank(store):
+    total, ranked = _store_search(store, "checkout")
+    assert total == 4
+    # Title and notes hits weigh more than transcript ones; c and d only differ in length
+    assert [doc_id for _, doc_id in ranked] == ["a", "b", "d", "c"]
+    assert all(score > 0 for score, _ in ranked)
+
+
+def test_updated_index_matches_a_rebuild():
+    index = SearchIndex.build(FIELDS, FIELDS.__getitem__)
+    changed = dict(FIELDS, d={"title": "Checkout hiring"}, g={"notes": "checkout"})
+    del changed["a"]
+    updated = index.updated(Changeset(1, 2, added=["g"], modified=["d"], removed=["a"]), changed,
+                            changed.__getitem__)
+    rebuilt = SearchIndex.build(changed, changed.__getitem__)
+    assert updated.search("checkout pricing") == rebuilt.search("checkout pricing")
+    # The old index is left as it was for readers of the old snapshot
+    assert index.search("checkout") == SearchIndex.build(FIELDS, FIELDS.__getitem__).search("checkout")
@@ -0,0 +1,109 @@
+import pytest
+
+from transcripts import Transcript
+
+
+def _segments():
+    return [
+        {"start_timestamp": "2024-05-01T14:00:00Z", "end_timestamp": "2024-05-01T14:00:05Z",
+         "text": "hello there", "source": "microphone"},
+        {"start_timestamp": "2024-05-01T14:00:05Z", "end_timestamp": "2024-05-01T14:00:09Z",
+         "text": "hi", "source": "system"},
+        # Skipped: no text
+        {"start_timestamp": "2024-05-01T14:00:09Z", "end_timestamp": "2024-05-01T14:00:10Z",
+         "text": "", "source": "system"},
+        {"start_timestamp": "2024-05-01T14:00:10Z", "end_timestamp": "2024-05-01T14:00:20Z",
+         "text": "how are you", "source": "Microphone"},
+        # No timestamps: never matches a time range
+        {"text": "untimed", "source": "system"},
+    ]
+
+
+def _variants():
+    """The same transcript unjoined, joined and packed"""
+    fresh = Transcript.from_raw(_segments())
+    joined = Transcript.from_raw(_segments())
+    joined.text()
+    packed = Transcript.from_raw(_segments()).pack()
+    return [fresh, joined, packed]
+
+
+FULL = "hello there hi how are you untimed"
+
+
+@pytest.mark.parametrize("transcript", _variants(), ids=["fresh", "joined", "packed"])
+def test_text_and_length(transcript):
+    assert len(transcript) == len(FULL)
+    assert list(transcript.texts) == ["hello there", "hi", "how are you", "untimed"]
+    assert transcript.text() == FULL
+
+
+@pytest.mark.parametrize("offset, max_chars", [
+    (0, None), (0, 5),
+    # Ending on, and starting at, the separator between two segments
+    (6, 5), (6, 6), (11, 3),
+    # Inside one segment, and running past the end
+    (12, 1), (len(FULL) - 3, 100),
+    (len(FULL), None), (len(FULL) + 5, 1), (3, 0),
+])
+def test_chars_matches_slicing_the_joined_text(offset, max_chars):
+    expected = FULL[offset:] if max_chars is None else FULL[offset:offset + max_chars]
+    for transcript in _variants():
+        assert transcript.chars(offset, max_chars) == expected
+
+
+@pytest.mark.parametrize("data", [None, "", {}, [{"text": ""}], [3, None]])
+def test_empty_transcripts(data):
+    transcript = Transcript.from_raw(data)
+    assert len(transcript) == 0
+    assert transcript.chars(0) == transcript.chars(5, 10) == ""
+    assert transcript.overlapping() == []
+    assert transcript.select(0, 10) == []
+
+
+def test_overlapping():
+    for transcript in _variants():
+        assert transcript.overlapping() == [0, 1, 2, 3]
+        # "hello there" is [0, 11), the separator is at 11, "hi" at [12, 14)
+        assert transcript.overlapping(0, 11) == [0]
+        assert transcript.overlapping(11, 1) == []
+        assert transcript.overlapping(10, 3) == [0, 1]
+        assert transcript.overlapping(len(FULL)) == []
+
+
+def test_select():
+    start = 1714572000.0  # 2024-05-01T14:00:00Z
+    for transcript in _variants():
+        assert transcript.select(start, start + 5) == [0]
+        # Segment 1 ends at +9 and segment 2 starts at +10: nothing touches [+9, +10)
+        assert transcript.select(start + 9, start + 10) == []
+        assert transcript.select(start=start + 10) == [2]
+        assert transcript.select(speaker="MICROPHONE") == [0, 2]
+        assert transcript.select(start + 4, start + 11, speaker="system") == [1]
+
+
+def test_subset_and_segment():
+    for transcript in _variants():
+        part = transcript.subset(transcript.select(speaker="system"))
+        assert part.text() == "hi untimed"
+        assert part.chars(3, 3) == "unt"
+        assert transcript.segment(3) == {"start_timestamp": None, "end_timestamp": None,
+                                         "speaker": "system", "text": "untimed"}
+
+
+def test_segment_rows_round_trip():
+    original = Transcript.from_raw(_segments())
+    rebuilt = Transcript.from_joined(original.text(), original.segment_rows())
+    assert rebuilt.text() == original.text()
+    assert [rebuilt.segment(i) for i in range(4)] == [original.segment(i) for i in range(4)]
+
+
+def test_packed_transcripts_join_on_first_read():
+    packed = Transcript.from_raw(_segments()).pack()
+    assert packed._joined is None and len(packed) == len(FULL)
+    assert packed.select(speaker="system") == [1, 3]
+    assert packed._joined is None
+    assert packed.chars(12, 2) == "hi"
+    # Joined once, then kept instead of the serialized segments
+    assert packed._joined == FULL and packed._packed is None
+    assert packed.text() is packed._joined
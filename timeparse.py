@@ -0,0 +1,75 @@
+"""
+Fast parsing for the ISO-8601 timestamps Granola writes.
+
+Granola's timestamps look like 2024-05-01T14:03:22.123Z. A precompiled regex
+handles that shape (and the usual variants: no fraction, numeric offsets, a
+space instead of T) several times faster than dateutil, which is only used as
+a fallback for anything else.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+_ISO_RE = re.compile(
+    r"\s*(\d{4})-(\d{2})-(\d{2})"
+    r"(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:[.,](\d{1,9}))?)?)?"
+    r"\s*(Z|z|[+-]\d{2}(?::?\d{2})?)?\s*$"
+)
+
+
+def _offset(tz):
+    if tz is None or tz in ("Z", "z"):
+        return timezone.utc
+    sign = -1 if tz[0] == "-" else 1
+    digits = tz[1:].replace(":", "")
+    minutes = int(digits[:2]) * 60 + (int(digits[2:4]) if len(digits) > 2 else 0)
+    return timezone(sign * timedelta(minutes=minutes)) if minutes else timezone.utc
+
+
+def _parse_fast(value):
+    m = _ISO_RE.match(value)
+    if m is None:
+        return None
+    year, month, day, hour, minute, second, fraction, tz = m.groups()
+    microsecond = int(fraction[:6].ljust(6, "0")) if fraction else 0
+    return datetime(
+        int(year), int(month), int(day),
+        int(hour or 0), int(minute or 0), int(second or 0), microsecond,
+        tzinfo=_offset(tz),
+    )
+
+
+@lru_cache(maxsize=8192)
+def parse_timestamp(value):
+    """
+    Parse value into an aware datetime normalized to UTC. Naive timestamps are
+    taken to be UTC already. Raises ValueError if value can't be parsed.
+    """
+    if not isinstance(value, str):
+        raise ValueError(f"not a timestamp: {value!r}")
+    try:
+        dt = _parse_fast(value)
+    except ValueError:
+        dt = None
+    if dt is None:
+        from dateutil.parser import parse as parse_date
+
+        try:
+            dt = parse_date(value)
+        except (ValueError, OverflowError) as e:
+            raise ValueError(f"could not parse timestamp {value!r}: {e}") from None
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def parse_epoch(value):
+    """
+    Epoch seconds for a Granola timestamp, or None if it doesn't have the usual
+    shape. Not cached - meant for the many one-off timestamps in transcripts.
+    """
+    try:
+        dt = _parse_fast(value) if isinstance(value, str) else None
+    except ValueError:
+        return None
+    return dt.timestamp() if dt is not None else None
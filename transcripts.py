@@ -0,0 +1,271 @@
+"""
+Compact, lazily joined transcripts.
+
+Granola stores a transcript as a list of segments:
+
+    [{"start_timestamp": "2024-05-01T14:03:22.123Z", "end_timestamp": "...",
+      "text": "...", "source": "microphone"}, ...]
+
+A Transcript keeps only the segment texts, their timestamps and speakers. The
+joined string is built the first time someone asks for all of it and kept from
+then on, and a character range, time range or speaker can be read without
+building the rest.
+
+Snapshots hold pack()ed transcripts: the segment texts serialized together
+(like the ProseMirror trees in meetings.py) plus their offsets, with the
+timestamps in one string that's split again only when a time range or the
+segments themselves are asked for. A packed transcript is joined the first
+time its text is read and keeps the joined string instead of the serialized
+segments from then on; snapshots share unchanged transcripts, so that happens
+once per transcript version. Keeping one blob instead of an object per segment
+is most of what makes a snapshot smaller than the decoded cache.
+"""
+import sys
+from array import array
+from bisect import bisect_right
+from itertools import compress
+
+import json_backend
+from timeparse import parse_epoch
+
+SEPARATOR = " "
+# Joins the timestamps of a packed transcript
+_TIMES_SEPARATOR = "\n"
+
+
+def _segment_text(segment):
+    # Same fields, in the same order, that join_transcript has always looked at
+    text = segment.get("text", "") or segment.get("content", "") or segment.get("transcript", "")
+    return str(text) if text else ""
+
+
+def _speaker(segment):
+    speaker = segment.get("speaker") or segment.get("source")
+    # A handful of distinct values repeated on every segment
+    return sys.intern(str(speaker)) if speaker else None
+
+
+def _pack_times(values):
+    """values as one string, if they're all strings that can be split apart again"""
+    if values and all(isinstance(v, str) and _TIMES_SEPARATOR not in v for v in values):
+        return _TIMES_SEPARATOR.join(values)
+    return values
+
+
+class Transcript:
+    __slots__ = ("_texts", "_packed", "_starts", "_ends", "speakers", "offsets", "_length", "_joined", "_epochs")
+
+    def __init__(self, texts, start_times=None, end_times=None, speakers=None):
+        count = len(texts)
+        self._texts = tuple(texts)
+        self._packed = None
+        # Raw timestamp strings (or, once packed, one string of them); only parsed
+        # if someone slices by time
+        self._starts = tuple(start_times) if start_times is not None else (None,) * count
+        self._ends = tuple(end_times) if end_times is not None else (None,) * count
+        self.speakers = tuple(speakers) if speakers is not None else (None,) * count
+        # offsets[i] is where texts[i] starts in the joined string
+        self.offsets = array("q")
+        position = 0
+        for text in self._texts:
+            self.offsets.append(position)
+            position += len(text) + len(SEPARATOR)
+        self._length = position - len(SEPARATOR) if count else 0
+        self._joined = None
+        self._epochs = None
+
+    def pack(self):
+        """The same transcript holding its segment texts serialized (not joined) and packed timestamps"""
+        if self._texts is None:
+            return self
+        packed = Transcript.__new__(Transcript)
+        packed._texts = None
+        packed._packed = json_backend.dumps(self._texts) if self._joined is None else None
+        packed._starts = _pack_times(self._starts)
+        packed._ends = _pack_times(self._ends)
+        packed.speakers = self.speakers
+        packed.offsets = self.offsets
+        packed._length = self._length
+        packed._joined = self._joined
+        packed._epochs = self._epochs
+        return packed
+
+    @property
+    def texts(self):
+        if self._texts is None:
+            return tuple(self._text(i) for i in range(len(self.offsets)))
+        return self._texts
+
+    @property
+    def start_times(self):
+        if isinstance(self._starts, str):
+            self._starts = tuple(self._starts.split(_TIMES_SEPARATOR))
+        return self._starts
+
+    @property
+    def end_times(self):
+        if isinstance(self._ends, str):
+            self._ends = tuple(self._ends.split(_TIMES_SEPARATOR))
+        return self._ends
+
+    def _end(self, i):
+        """Where segment i's text ends in the joined string"""
+        if i + 1 < len(self.offsets):
+            return self.offsets[i + 1] - len(SEPARATOR)
+        return len(self)
+
+    def _text(self, i):
+        if self._texts is not None:
+            return self._texts[i]
+        return self.text()[self.offsets[i]:self._end(i)]
+
+    @classmethod
+    def from_raw(cls, data):
+        """Build from a transcript entry as found in the cache (list, str or dict)"""
+        if isinstance(data, Transcript):
+            # Snapshots already hold compact transcripts
+            return data
+        if isinstance(data, list):
+            texts, starts, ends, speakers = [], [], [], []
+            for segment in data:
+                if isinstance(segment, dict):
+                    text = _segment_text(segment)
+                    if not text:
+                        continue
+                elif isinstance(segment, str):
+                    text = segment
+                else:
+                    continue
+                texts.append(text)
+                if isinstance(segment, dict):
+                    starts.append(segment.get("start_timestamp"))
+                    ends.append(segment.get("end_timestamp"))
+                    speakers.append(_speaker(segment))
+                else:
+                    starts.append(None)
+                    ends.append(None)
+                    speakers.append(None)
+            return cls(texts, starts, ends, speakers)
+        if isinstance(data, str):
+            return cls([data] if data else [])
+        if isinstance(data, dict):
+            # Sometimes transcript might be a dict with a text field
+            text = str(data.get("text", ""))
+            return cls([text] if text else [])
+        return cls([])
+
+    @classmethod
+    def from_joined(cls, joined, segments):
+        """
+        Rebuild from a joined string plus the [start, end, speaker, offset, length]
+        rows from segment_rows() - how the derived store keeps transcripts.
+        """
+        texts = [joined[offset:offset + length] for _, _, _, offset, length in segments]
+        transcript = cls(texts, [row[0] for row in segments], [row[1] for row in segments],
+                         [row[2] for row in segments])
+        transcript._joined = joined
+        return transcript
+
+    def segment_rows(self):
+        """Everything but the text, for storing next to the joined string"""
+        return [
+            [start, end, speaker, offset, self._end(i) - offset]
+            for i, (start, end, speaker, offset) in
+            enumerate(zip(self.start_times, self.end_times, self.speakers, self.offsets))
+        ]
+
+    def __len__(self):
+        """Length of the joined text, without joining it"""
+        return self._length
+
+    def text(self):
+        if self._joined is None:
+            packed = self._packed
+            if self._texts is not None:
+                self._joined = SEPARATOR.join(self._texts)
+            elif packed is not None:
+                self._joined = SEPARATOR.join(json_backend.loads(packed))
+                # The joined string stands in for the serialized segments from now on
+                self._packed = None
+            # (otherwise another thread joined it in between)
+        return self._joined
+
+    def chars(self, offset=0, max_chars=None):
+        """joined[offset:offset + max_chars], touching only the segments in that range"""
+        if not self.offsets:
+            return ""
+        if self._texts is None or self._joined is not None or (offset <= 0 and max_chars is None):
+            text = self.text()
+            return text[offset:] if max_chars is None else text[offset:offset + max_chars]
+        first = max(bisect_right(self.offsets, offset) - 1, 0)
+        stop = len(self) if max_chars is None else offset + max_chars
+        pieces = []
+        for i in range(first, len(self._texts)):
+            if self.offsets[i] >= stop:
+                # The range may end on the separator before this segment
+                pieces.append("")
+                break
+            pieces.append(self._texts[i])
+        base = self.offsets[first]
+        return SEPARATOR.join(pieces)[offset - base:stop - base]
+
+    def overlapping(self, offset=0, max_chars=None):
+        """Indexes of segments with text inside joined[offset:offset + max_chars]"""
+        first = max(bisect_right(self.offsets, offset) - 1, 0)
+        stop = len(self) if max_chars is None else offset + max_chars
+        indexes = []
+        for i in range(first, len(self.offsets)):
+            if self.offsets[i] >= stop:
+                break
+            if self._end(i) > offset:
+                indexes.append(i)
+        return indexes
+
+    def _segment_epochs(self):
+        if self._epochs is None:
+            starts = array("d", (_epoch_or_nan(value) for value in self.start_times))
+            ends = array("d", (_epoch_or_nan(value) for value in self.end_times))
+            self._epochs = (starts, ends)
+        return self._epochs
+
+    def select(self, start=None, end=None, speaker=None):
+        """
+        Indexes of segments overlapping [start, end) (epoch seconds, either may
+        be None) and, if given, spoken by speaker (case-insensitive). Segments
+        without timestamps never match a time range.
+        """
+        keep = [True] * len(self.offsets)
+        if start is not None or end is not None:
+            starts, ends = self._segment_epochs()
+            for i in range(len(keep)):
+                segment_start, segment_end = starts[i], ends[i]
+                if segment_end != segment_end:
+                    segment_end = segment_start
+                # Half-open, so a segment that merely touches the range isn't included.
+                # NaN compares false, so untimed segments drop out here.
+                keep[i] = (start is None or segment_end > start or segment_start >= start) \
+                    and (end is None or segment_start < end)
+        if speaker is not None:
+            wanted = speaker.lower()
+            keep = [k and s is not None and s.lower() == wanted for k, s in zip(keep, self.speakers)]
+        return list(compress(range(len(keep)), keep))
+
+    def segment(self, i):
+        return {
+            "start_timestamp": self.start_times[i],
+            "end_timestamp": self.end_times[i],
+            "speaker": self.speakers[i],
+            "text": self._text(i),
+        }
+
+    def subset(self, indexes):
+        """A Transcript of just those segments (sharing the strings)"""
+        return Transcript(
+            [self._text(i) for i in indexes], [self.start_times[i] for i in indexes],
+            [self.end_times[i] for i in indexes], [self.speakers[i] for i in indexes],
+        )
+
+
+def _epoch_or_nan(value):
+    epoch = parse_epoch(value) if value else None
+    return float("nan") if epoch is None else epoch
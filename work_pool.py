@@ -0,0 +1,73 @@
+"""
+Runs blocking loader work off the event loop.
+
+The loader functions are synchronous and can be CPU-heavy (a cold cache parse,
+extracting notes for a big window), so the async endpoints hand them to a small
+thread pool instead of calling them directly. That keeps /health and other
+clients responsive while a slow request is running.
+
+Identical concurrent calls - several Zapier zaps polling /zapier-simple at the
+same moment - can share one in-flight computation by passing the same key.
+"""
+import asyncio
+import contextvars
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from diagnostics import get_logger
+from metrics import Counter, Gauge
+
+log = get_logger("work")
+
+PENDING = Gauge("granola_worker_tasks", "Calls queued or running on the loader worker pool")
+JOINED = Counter("granola_coalesced_calls_total", "Calls that waited on an identical in-flight call instead of running")
+
+MAX_WORKERS = int(os.environ.get("GRANOLA_WORKER_THREADS", min(4, os.cpu_count() or 1)))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="granola-loader")
+# (event loop, key) -> future for the computation currently running under that key
+_inflight = {}
+
+
+def coalesce_key(*parts):
+    """Build a hashable key from JSON-like parts (e.g. a method name and its params dict)"""
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+async def run_blocking(func, *args, key=None):
+    """
+    Run func(*args) on the worker pool and return its result.
+
+    If key is given and a call with the same key is already running, wait for
+    that one instead of starting another. Context variables (request trace,
+    debug sampling) are carried over to the worker thread, so don't coalesce
+    calls whose results depend on them.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    if key is None:
+        return await _submit(loop, context, func, args)
+
+    inflight_key = (loop, key)
+    future = _inflight.get(inflight_key)
+    if future is None:
+        future = _submit(loop, context, func, args)
+        _inflight[inflight_key] = future
+        future.add_done_callback(lambda _: _inflight.pop(inflight_key, None))
+    else:
+        JOINED.inc()
+        log.debug("🔗 Joining in-flight call %s", key)
+    # shield: one caller disconnecting mustn't cancel the work the others are waiting on
+    return await asyncio.shield(future)
+
+
+def _submit(loop, context, func, args):
+    PENDING.inc()
+    future = loop.run_in_executor(_executor, context.run, func, *args)
+    future.add_done_callback(lambda _: PENDING.dec())
+    return future
+
+
+def inflight_count():
+    return len(_inflight)